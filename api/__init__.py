@@ -21,6 +21,8 @@ from api.visit_routes import (
     save_consultation,
     get_patient_visits,
     delete_patient_visit,
+    get_detection_status,
+    trace_disease_detection,
     generate_clinical_summary,
     check_longitudinal_risks
 )
@@ -30,6 +32,7 @@ from api.analytics_routes import (
     get_patient_analytics,
     get_feedback_stats,
     initialize_rare_disease_matrix,
+    rescreen_all_patients,
     get_cancer_screening_alerts,
     save_clinician_feedback,
     extract_text_from_pdf,
@@ -55,6 +58,8 @@ __all__ = [
     'save_consultation',
     'get_patient_visits',
     'delete_patient_visit',
+    'get_detection_status',
+    'trace_disease_detection',
     'generate_clinical_summary',
     'check_longitudinal_risks',
     
@@ -62,6 +67,7 @@ __all__ = [
     'get_patient_analytics',
     'get_feedback_stats',
     'initialize_rare_disease_matrix',
+    'rescreen_all_patients',
     'get_cancer_screening_alerts',
     'save_clinician_feedback',
     'extract_text_from_pdf',
@@ -9,12 +9,13 @@ from typing import Dict, List
 import logging
 from datetime import datetime, timedelta
 
-from data.db.json_adapter import JSONAdapter
+from data.db.factory import create_adapter
+from data.db.config_registry import config_registry
 
 logger = logging.getLogger(__name__)
 
 # Initialize services
-db = JSONAdapter()
+db = create_adapter()
 
 
 def get_patient_analytics() -> Dict:
@@ -34,7 +35,7 @@ def get_patient_analytics() -> Dict:
         today = datetime.now().date()
         
         # Process all patients
-        for patient_data in db.get_all_patients():
+        for patient_data in db.iter_patients(fields=['name', 'visits']):
             total_patients += 1
             visits = patient_data.get('visits', [])
             total_visits += len(visits)
@@ -123,7 +124,7 @@ def get_feedback_stats() -> Dict:
         thumbs_down = 0
         feedback_by_doctor = {}
         
-        for patient_data in db.get_all_patients():
+        for patient_data in db.iter_patients(fields=['visits']):
             for visit in patient_data.get('visits', []):
                 if 'feedback' in visit:
                     feedback = visit['feedback']
@@ -179,20 +180,22 @@ def save_visit_feedback(patient_id: str, visit_id: str, feedback_data: Dict) ->
         for visit in patient_data.get('visits', []):
             if visit.get('visit_id') == visit_id:
                 # Save feedback
-                visit['feedback'] = {
-                    'timestamp': datetime.now().isoformat(),
-                    'helpful': feedback_data.get('helpful'),  # True/False for thumbs up/down
-                    'rating': feedback_data.get('rating'),  # 1-5 stars
-                    'comment': feedback_data.get('comment', ''),
-                    'doctor': feedback_data.get('doctor', 'Unknown')
+                visit_updates = {
+                    'feedback': {
+                        'timestamp': datetime.now().isoformat(),
+                        'helpful': feedback_data.get('helpful'),  # True/False for thumbs up/down
+                        'rating': feedback_data.get('rating'),  # 1-5 stars
+                        'comment': feedback_data.get('comment', ''),
+                        'doctor': feedback_data.get('doctor', 'Unknown')
+                    }
                 }
                 
                 # Track if prescription was edited
                 if 'prescription_edited' in feedback_data:
-                    visit['prescription_edited'] = feedback_data['prescription_edited']
+                    visit_updates['prescription_edited'] = feedback_data['prescription_edited']
                 
-                # Save updated data
-                db.save_patient(patient_data)
+                # Save only the changed visit fields
+                db.update_visit(patient_id, visit_id, visit_updates)
                 
                 return {
                     "success": True,
@@ -219,7 +222,7 @@ def get_doctor_performance(doctor_name: str) -> Dict:
         total_feedback = 0
         avg_time_per_visit = []
         
-        for patient_data in db.get_all_patients():
+        for patient_data in db.iter_patients(fields=['visits']):
             for visit in patient_data.get('visits', []):
                 if visit.get('doctor') == doctor_name:
                     visits_count += 1
@@ -275,33 +278,21 @@ def get_doctor_performance(doctor_name: str) -> Dict:
 
 # Keep existing functions unchanged
 def initialize_rare_disease_matrix() -> Dict:
-    """Initialize or reload disease configurations"""
+    """Merge the disease configs and (re)compile the catalogue artifact"""
     try:
-        # Check which config files exist
-        configs_loaded = []
-        disease_count = 0
-        
-        config_files = [
-            'rare_diseases_comprehensive',
-            'disease_watchlist',
-            'rare_disease_matrix'
-        ]
+        from core.clinical.disease_catalogue import load_catalogue
         
-        for config_name in config_files:
-            config_data = db.load_config(config_name)
-            if config_data:
-                configs_loaded.append(config_name)
-                if isinstance(config_data, dict):
-                    if 'diseases' in config_data:
-                        disease_count += len(config_data['diseases'])
-                    else:
-                        disease_count += len(config_data)
+        catalogue = load_catalogue()
+        configs_loaded = catalogue.source_names
+        disease_count = len(catalogue.diseases)
         
         return {
             "success": True,
             "message": f"Loaded {disease_count} diseases from {len(configs_loaded)} config files",
             "configs_loaded": configs_loaded,
-            "disease_count": disease_count
+            "disease_count": disease_count,
+            "catalogue_version": catalogue.version,
+            "config_version": config_registry.version
         }
         
     except Exception as e:
@@ -313,6 +304,22 @@ def initialize_rare_disease_matrix() -> Dict:
         }
 
 
+def rescreen_all_patients(workers: int = None, resume: bool = True) -> Dict:
+    """Rescreen every patient against the current disease config (batch job)"""
+    try:
+        from core.clinical.cohort_rescreen import rescreen_cohort
+        
+        summary = rescreen_cohort(db, workers=workers, resume=resume)
+        return {"success": True, **summary}
+        
+    except Exception as e:
+        logger.error(f"Error rescreening patients: {e}")
+        return {
+            "success": False,
+            "message": str(e)
+        }
+
+
 def get_cancer_screening_alerts(patient_id: str = None) -> List[Dict]:
     """Get cancer screening recommendations"""
     alerts = []
@@ -325,7 +332,7 @@ def get_cancer_screening_alerts(patient_id: str = None) -> List[Dict]:
                 alerts = _check_cancer_screening_for_patient(patient_data)
         else:
             # Get alerts for all patients
-            for patient_data in db.get_all_patients():
+            for patient_data in db.iter_patients(fields=['name', 'age', 'sex']):
                 patient_alerts = _check_cancer_screening_for_patient(patient_data)
                 alerts.extend(patient_alerts)
         
@@ -388,10 +395,6 @@ def save_clinician_feedback(patient_id: str, visit_id: str, feedback_data: Dict)
         # Find the visit
         for visit in patient_data.get('visits', []):
             if visit.get('visit_id') == visit_id:
-                # Initialize feedback list if not exists
-                if 'clinician_feedback' not in visit:
-                    visit['clinician_feedback'] = []
-                
                 # Add feedback entry
                 feedback_entry = {
                     'timestamp': datetime.now().isoformat(),
@@ -402,21 +405,23 @@ def save_clinician_feedback(patient_id: str, visit_id: str, feedback_data: Dict)
                     'comments': feedback_data.get('comments', '')
                 }
                 
-                visit['clinician_feedback'].append(feedback_entry)
+                visit_updates = {
+                    'clinician_feedback': visit.get('clinician_feedback', []) + [feedback_entry]
+                }
                 
                 # Update edited content if provided
                 if 'edited_summary' in feedback_data:
-                    visit['original_summary'] = visit.get('summary', '')
-                    visit['summary'] = feedback_data['edited_summary']
-                    visit['summary_edited'] = True
+                    visit_updates['original_summary'] = visit.get('summary', '')
+                    visit_updates['summary'] = feedback_data['edited_summary']
+                    visit_updates['summary_edited'] = True
                 
                 if 'edited_prescription' in feedback_data:
-                    visit['original_prescription'] = visit.get('prescription', '')
-                    visit['prescription'] = feedback_data['edited_prescription']
-                    visit['prescription_edited'] = True
+                    visit_updates['original_prescription'] = visit.get('prescription', '')
+                    visit_updates['prescription'] = feedback_data['edited_prescription']
+                    visit_updates['prescription_edited'] = True
                 
-                # Save updated data
-                db.save_patient(patient_data)
+                # Save only the changed visit fields
+                db.update_visit(patient_id, visit_id, visit_updates)
                 
                 return {
                     "success": True,
@@ -9,12 +9,12 @@ import logging
 from core.patients.patient_manager import PatientManager
 from core.patients.patient_model import PatientCreate, PatientUpdate
 from core.clinical.vitals_validator import VitalsValidator
-from data.db.json_adapter import JSONAdapter
+from data.db.factory import create_adapter
 
 logger = logging.getLogger(__name__)
 
 # Initialize services
-db = JSONAdapter()
+db = create_adapter()
 patient_manager = PatientManager(db)
 vitals_validator = VitalsValidator()
 
@@ -3,17 +3,17 @@ Visit API Routes
 Handles all visit-related endpoints for Streamlit
 """
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 import logging
 
 from core.visits.visit_manager import VisitManager
 from core.ai.gpt_engine import GPTEngine
-from data.db.json_adapter import JSONAdapter
+from data.db.factory import create_adapter
 
 logger = logging.getLogger(__name__)
 
 # Initialize services
-db = JSONAdapter()
+db = create_adapter()
 visit_manager = VisitManager(db)
 gpt_engine = GPTEngine()
 
@@ -42,10 +42,11 @@ def save_consultation(patient_id: str, visit_id: str, consultation_data: Dict) -
         }
 
 
-def get_patient_visits(patient_id: str) -> List[Dict]:
-    """Get all visits for a patient"""
+def get_patient_visits(patient_id: str, limit: Optional[int] = None,
+                       since: Optional[str] = None) -> List[Dict]:
+    """Get visits for a patient, newest first (optionally a page)"""
     try:
-        return visit_manager.get_patient_visits(patient_id)
+        return visit_manager.get_patient_visits(patient_id, limit=limit, since=since)
     except Exception as e:
         logger.error(f"Error getting visits: {e}")
         return []
@@ -63,6 +64,27 @@ def delete_patient_visit(patient_id: str, visit_id: str) -> Dict:
         }
 
 
+def get_detection_status(patient_id: str, visit_id: str) -> Dict:
+    """Poll background disease detection for a saved visit"""
+    try:
+        return visit_manager.get_detection_status(patient_id, visit_id)
+    except Exception as e:
+        logger.error(f"Error getting detection status: {e}")
+        return {"status": "unknown", "visit_id": visit_id}
+
+
+def trace_disease_detection(patient_id: str, visit_id: Optional[str] = None) -> Dict:
+    """Explain a visit's disease detection: stage timings and rejected diseases"""
+    try:
+        return visit_manager.trace_detection(patient_id, visit_id)
+    except Exception as e:
+        logger.error(f"Error tracing disease detection: {e}")
+        return {
+            "success": False,
+            "message": "Failed to trace disease detection"
+        }
+
+
 def generate_clinical_summary(symptoms_text: str, patient_data: Dict = None, 
                             include_prescription: bool = True, 
                             format_type: str = "SOAP") -> Dict:
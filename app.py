@@ -81,40 +81,6 @@ def safe_save_visit(patient_id: str, visit_data: dict) -> dict:
             "message": f"Error in safe_save_visit: {str(e)}"
         }
 
-# Temporary fix for disease config format issue
-def fix_disease_config():
-    """Fix the disease detector config loading issue"""
-    try:
-        import json
-        
-        # Try to load and fix rare_diseases_comprehensive.json
-        config_path = "data/config/rare_diseases_comprehensive.json"
-        if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # If it has a 'diseases' key that's a list, convert to dict
-            if isinstance(data, dict) and 'diseases' in data and isinstance(data['diseases'], list):
-                # Convert list to dict using disease name as key
-                diseases_dict = {}
-                for disease in data['diseases']:
-                    if isinstance(disease, dict) and 'name' in disease:
-                        # Use disease name as key, converting to valid key format
-                        key = disease['name'].lower().replace(' ', '_').replace("'", "")
-                        diseases_dict[key] = disease
-                
-                # Save the fixed version
-                fixed_data = {'diseases': diseases_dict}
-                with open(config_path, 'w', encoding='utf-8') as f:
-                    json.dump(fixed_data, f, indent=2, ensure_ascii=False)
-                
-                print(f"Fixed disease config format - converted {len(diseases_dict)} diseases from list to dict")
-    except Exception as e:
-        print(f"Could not fix disease config: {e}")
-
-# Call the fix on startup
-fix_disease_config()
-
 # Page configuration
 st.set_page_config(
     page_title="Smart EMR",
@@ -697,6 +663,8 @@ else:  # Main EMR page
                                             for alert in visit_result['disease_alerts']:
                                                 st.write(f"- **{alert['disease']}** ({alert['confidence']*100:.0f}% confidence)")
                                                 st.write(f"  {alert['message']}")
+                                        elif save_result.get('detection_status') == 'pending':
+                                            st.info("🔍 Rare disease screening is running in the background; alerts will appear on this visit when ready.")
                                     else:
                                         st.error("Failed to save consultation")
                                 else:
@@ -0,0 +1,95 @@
+"""
+Patient Codec Benchmark
+Encode/decode time and on-disk size per codec for synthetic patients
+
+Run from the repository root:
+    python -m benchmarks.bench_codecs
+"""
+
+import json
+import time
+import random
+from datetime import datetime, timedelta
+
+from data.db.codecs import available_codecs, decode_record
+
+SYMPTOMS = ["fever", "cough", "fatigue", "tremor", "jaundice", "headache",
+            "abdominal pain", "joint pain", "rash", "weight loss"]
+
+
+def synthetic_patient(visit_count: int, seed: int = 7) -> dict:
+    """Patient shaped like VisitManager output, with alerts and vitals validation"""
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 1)
+    visits = []
+    tracking = {}
+
+    for i in range(visit_count):
+        timestamp = (start + timedelta(days=i * 3)).isoformat()
+        symptoms = rng.sample(SYMPTOMS, 3)
+        for symptom in symptoms:
+            tracking.setdefault(symptom, []).append(
+                {'date': timestamp.split('T')[0], 'visit_date': timestamp}
+            )
+
+        visits.append({
+            'visit_id': f"V{i:06d}",
+            'timestamp': timestamp,
+            'chief_complaint': f"Patient complains of {', '.join(symptoms)} for a week",
+            'vitals': {'bp': '120/80', 'hr': 78, 'temp': 98.6, 'spo2': 98},
+            'vitals_validation': {
+                'status': 'normal',
+                'details': {k: {'value': v, 'status': 'normal', 'range': [60, 100]}
+                            for k, v in {'hr': 78, 'spo2': 98, 'temp': 98.6}.items()}
+            },
+            'extracted_symptoms': symptoms,
+            'summary': "S: " + " ".join(symptoms) * 5,
+            'disease_alerts': [{
+                'disease': "Wilson's Disease",
+                'confidence': 0.72,
+                'matched_symptoms': symptoms,
+                'timeline': [{'symptom': s, 'date': timestamp.split('T')[0]}
+                             for s in symptoms * 4]
+            }]
+        })
+
+    return {
+        'id': 'P20250101000000', 'name': 'Synthetic Patient', 'age': 40,
+        'sex': 'female', 'mobile': '+919876543210',
+        'registration_date': start.isoformat(),
+        'visits': visits, 'symptom_tracking': tracking
+    }
+
+
+def measure(fn, repeat: int) -> float:
+    """Best-of-repeat wall time in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+if __name__ == "__main__":
+    codecs = available_codecs()
+    print(f"{'visits':>6} {'codec':<12} {'encode ms':>10} {'decode ms':>10} {'size KB':>10}")
+
+    for visit_count in (10, 100, 1000):
+        patient = synthetic_patient(visit_count)
+        repeat = 50 if visit_count < 1000 else 10
+
+        # Baseline: the previous pretty-printed format
+        pretty = json.dumps(patient, indent=2, ensure_ascii=False).encode('utf-8')
+        encode_ms = measure(lambda: json.dumps(patient, indent=2, ensure_ascii=False), repeat)
+        decode_ms = measure(lambda: json.loads(pretty), repeat)
+        print(f"{visit_count:>6} {'json-indent':<12} {encode_ms:>10.2f} {decode_ms:>10.2f} "
+              f"{len(pretty) / 1024:>10.1f}")
+
+        for name, codec in codecs.items():
+            data = codec.encode(patient)
+            assert decode_record(data) == patient
+            encode_ms = measure(lambda: codec.encode(patient), repeat)
+            decode_ms = measure(lambda: decode_record(data), repeat)
+            print(f"{visit_count:>6} {name:<12} {encode_ms:>10.2f} {decode_ms:>10.2f} "
+                  f"{len(data) / 1024:>10.1f}")
@@ -0,0 +1,195 @@
+"""
+Disease Matrix Benchmark
+Per-patient pattern scan with the compiled matrix vs re-parsing the config,
+and candidate generation cost as the catalogue grows
+
+Run from the repository root:
+    python -m benchmarks.bench_disease_matrix
+"""
+
+import math
+import time
+import random
+import argparse
+from datetime import date, datetime, timedelta
+
+from core.clinical.disease_detector import DiseaseDetectionEngine
+from core.clinical.disease_matrix import DiseaseMatrix
+from core.clinical.symptom_timeline import SymptomTimeline
+
+CONFIGS = [
+    "data/config/rare_diseases_comprehensive.json",
+    "data/config/disease_watchlist.json",
+]
+SCORES = "data/config/symptom_severity_scores.json"
+
+COMMON = ["fever", "cough", "fatigue", "headache", "body ache", "nausea"]
+
+
+def synthetic_tracking(vocabulary: list, rng: random.Random, symptom_count: int) -> dict:
+    """symptom_tracking shaped like VisitManager output over ~6 months"""
+    start = date(2024, 1, 1)
+    symptoms = rng.sample(vocabulary, min(symptom_count, len(vocabulary))) + COMMON
+    return {
+        symptom: [
+            {'date': (start + timedelta(days=rng.randrange(180))).isoformat()}
+            for _ in range(rng.randint(1, 4))
+        ]
+        for symptom in symptoms
+    }
+
+
+def legacy_window(occurrences: list, visit_date: str, window_days: int) -> list:
+    """The pre-timeline window filter: parses every date on every call"""
+    current_date = datetime.fromisoformat(visit_date.split('T')[0])
+    recent = []
+    for occ in occurrences:
+        days_diff = (current_date - datetime.fromisoformat(occ['date'])).days
+        if 0 <= days_diff <= window_days:
+            recent.append(occ)
+    return recent
+
+
+def legacy_scan(engine: DiseaseDetectionEngine, tracking: dict, visit_date: str) -> list:
+    """The pre-matrix per-visit work: flatten and re-read every disease config"""
+    results = []
+    for disease_id, config in engine.diseases.items():
+        if isinstance(config.get('symptoms'), dict):
+            required = set()
+            for symptoms in config['symptoms'].values():
+                if isinstance(symptoms, list):
+                    required.update(s.lower() for s in symptoms)
+        elif isinstance(config.get('symptoms'), list):
+            required = set(s.lower() for s in config['symptoms'])
+        else:
+            required = set()
+
+        min_matches = config.get('min_matches', config.get('min_symptoms', 3))
+        time_window = config.get('time_window_days', 365)
+        min_visits = config.get('min_visits_required', 2)
+        min_timespan = config.get('min_timespan_days', 7)
+
+        matched, dates, timeline = [], set(), []
+        for symptom in required:
+            if symptom in tracking:
+                occurrences = legacy_window(tracking[symptom], visit_date, time_window)
+                if occurrences:
+                    matched.append(symptom)
+                    for occ in occurrences:
+                        dates.add(occ['date'])
+                        timeline.append({'symptom': symptom, 'date': occ['date']})
+
+        if len(matched) < min_matches or len(dates) < min_visits:
+            continue
+        ordered = sorted(dates)
+        days_span = (date.fromisoformat(ordered[-1]) - date.fromisoformat(ordered[0])).days
+        if days_span < min_timespan:
+            continue
+
+        boost = tuple(s.lower() for s in config.get('confidence_boost_symptoms') or [])
+        confidence = engine._calculate_confidence(
+            engine.symptom_scores, sorted(matched), len(required), len(dates), days_span, boost
+        )
+        # The alert fields the old code built alongside the score
+        sorted(timeline, key=lambda x: x['date'])
+        engine._determine_severity(engine.symptom_scores, confidence, matched)
+        engine._generate_alert_message(config['name'], matched, len(dates), days_span, confidence)
+        results.append((disease_id, confidence))
+    return sorted(results)
+
+
+def matrix_scan(engine: DiseaseDetectionEngine, tracking: dict, visit_date: str) -> list:
+    """The detection loop as it runs now, minus the intelligent filter"""
+    results = []
+    timeline = SymptomTimeline(tracking)
+    end_day = date.fromisoformat(visit_date).toordinal()
+    config = engine._refresh_config()
+    for disease in config.matrix.candidates(config.matrix.symptom_ids(timeline)):
+        alert = engine._check_disease_pattern(config, disease, timeline, end_day)
+        if alert:
+            results.append((alert['disease_id'], alert['confidence']))
+    return sorted(results)
+
+
+def synthetic_catalogue(size: int, vocabulary_size: int, rng: random.Random) -> dict:
+    """Orphanet-sized catalogue: ~8 symptoms per disease drawn from a shared vocabulary"""
+    return {
+        f"disease_{i}": {
+            'name': f"Disease {i}",
+            'symptoms': [f"symptom {rng.randrange(vocabulary_size)}" for _ in range(8)],
+            'min_symptoms': 3
+        }
+        for i in range(size)
+    }
+
+
+def linear_candidates(matrix: DiseaseMatrix, symptom_ids) -> list:
+    """Candidate generation by scanning every disease"""
+    return [
+        disease for disease in matrix.diseases
+        if len(disease.symptom_ids & symptom_ids) >= disease.min_matches
+    ]
+
+
+def measure_candidates(fn, matrix: DiseaseMatrix, patients: list) -> float:
+    """Mean microseconds per patient"""
+    start = time.perf_counter()
+    for symptom_ids in patients:
+        fn(matrix, symptom_ids)
+    return (time.perf_counter() - start) / len(patients) * 1e6
+
+
+def measure(fn, patients: list, visit_date: str, engine) -> float:
+    """Mean microseconds per patient"""
+    start = time.perf_counter()
+    for tracking in patients:
+        fn(engine, tracking, visit_date)
+    return (time.perf_counter() - start) / len(patients) * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--patients", type=int, default=2000)
+    parser.add_argument("--symptoms", type=int, default=12)
+    args = parser.parse_args()
+
+    visit_date = "2024-07-01"
+    print(f"{'config':<32} {'diseases':>8} {'legacy us':>10} {'matrix us':>10} {'speedup':>8}")
+
+    for config_path in CONFIGS:
+        engine = DiseaseDetectionEngine(config_path, SCORES)
+        rng = random.Random(11)
+        vocabulary = sorted(engine.matrix.vocabulary)
+        patients = [synthetic_tracking(vocabulary, rng, args.symptoms) for _ in range(args.patients)]
+
+        for tracking in patients:
+            expected = legacy_scan(engine, tracking, visit_date)
+            actual = matrix_scan(engine, tracking, visit_date)
+            assert [d for d, _ in expected] == [d for d, _ in actual]
+            assert all(math.isclose(a, b) for (_, a), (_, b) in zip(expected, actual))
+
+        legacy_us = measure(legacy_scan, patients, visit_date, engine)
+        matrix_us = measure(matrix_scan, patients, visit_date, engine)
+        name = config_path.rsplit('/', 1)[-1]
+        print(f"{name:<32} {len(engine.matrix):>8} {legacy_us:>10.1f} {matrix_us:>10.1f} "
+              f"{legacy_us / matrix_us:>7.1f}x")
+
+    print(f"\n{'catalogue':>9} {'scan us':>10} {'index us':>10} {'candidates':>10}")
+    rng = random.Random(5)
+    for size in (100, 1000, 10000):
+        matrix = DiseaseMatrix(synthetic_catalogue(size, 4000, rng))
+        # Each patient shares a few symptoms with one disease, plus noise
+        patients = [
+            matrix.symptom_ids(
+                list(rng.choice(matrix.diseases).symptoms[:4])
+                + [f"symptom {rng.randrange(4000)}" for _ in range(args.symptoms)]
+            )
+            for _ in range(500)
+        ]
+        for symptom_ids in patients:
+            assert linear_candidates(matrix, symptom_ids) == matrix.candidates(symptom_ids)
+
+        found = sum(len(matrix.candidates(ids)) for ids in patients) / len(patients)
+        scan_us = measure_candidates(linear_candidates, matrix, patients)
+        index_us = measure_candidates(DiseaseMatrix.candidates, matrix, patients)
+        print(f"{size:>9} {scan_us:>10.1f} {index_us:>10.1f} {found:>10.2f}")
@@ -0,0 +1,53 @@
+"""
+ID Generator Benchmark
+Measures IDs/second and checks for collisions across threads and processes
+
+Run from the repository root:
+    python -m benchmarks.bench_id_generator
+"""
+
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from core.id_generator import new_patient_id
+
+
+def generate_batch(count: int) -> list:
+    return [new_patient_id() for _ in range(count)]
+
+
+def check(ids_per_worker: list) -> dict:
+    """Collision count and per-worker monotonicity"""
+    all_ids = [i for batch in ids_per_worker for i in batch]
+    return {
+        'total': len(all_ids),
+        'collisions': len(all_ids) - len(set(all_ids)),
+        'monotonic': all(batch == sorted(batch) for batch in ids_per_worker)
+    }
+
+
+def run(executor_cls, workers: int, per_worker: int) -> dict:
+    start = time.perf_counter()
+    with executor_cls(max_workers=workers) as pool:
+        batches = list(pool.map(generate_batch, [per_worker] * workers))
+    elapsed = time.perf_counter() - start
+
+    result = check(batches)
+    result['ids_per_second'] = round(result['total'] / elapsed)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--per-worker", type=int, default=50_000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    single = check([generate_batch(args.per_worker)])
+    single['ids_per_second'] = round(args.per_worker / (time.perf_counter() - start))
+
+    print(f"single thread : {single}")
+    print(f"threads       : {run(ThreadPoolExecutor, args.workers, args.per_worker)}")
+    print(f"processes     : {run(ProcessPoolExecutor, args.workers, args.per_worker)}")
@@ -0,0 +1,91 @@
+"""
+Redundancy Pruning Benchmark
+Removing symptoms contained in longer ones: the word-span index in
+SymptomAnalyzer vs the pairwise scan it replaced, as the candidate list grows
+
+Run from the repository root:
+    python -m benchmarks.bench_redundancy_pruning
+"""
+
+import re
+import time
+import random
+import argparse
+
+from core.clinical.symptom_analyzer import SymptomAnalyzer
+
+# symptoms -> what must survive pruning
+CASES = [
+    (["pain", "chest pain"], ["chest pain"]),
+    (["pain", "painful swallowing"], ["pain", "painful swallowing"]),
+    (["loss", "weight loss", "memory loss"], ["weight loss", "memory loss"]),
+    (["headache", "band-like headache"], ["band-like headache"]),
+    (["ear pain", "near pain"], ["ear pain", "near pain"]),
+    (["feet", "burning pain in hands/feet"], ["burning pain in hands/feet"]),
+]
+
+
+def legacy_prune(symptoms: list) -> list:
+    """The pairwise substring check, including its 'pain' in 'painful' matches"""
+    return [
+        symptom for symptom in symptoms
+        if not any(symptom != other and symptom in other for other in symptoms)
+    ]
+
+
+def reference_prune(symptoms: list) -> list:
+    """Pairwise, with whole-word containment: the behaviour being kept"""
+    patterns = {symptom: re.compile(r'\b' + re.escape(symptom) + r'\b') for symptom in symptoms}
+    return [
+        symptom for symptom in symptoms
+        if not any(symptom != other and patterns[symptom].search(other) for other in symptoms)
+    ]
+
+
+def candidates(vocabulary: list, rng: random.Random, size: int) -> list:
+    """Distinct candidate phrases: vocabulary entries plus their sub-phrases"""
+    picked = set()
+    while len(picked) < size:
+        words = rng.choice(vocabulary).split()
+        start = rng.randrange(len(words))
+        end = rng.randint(start + 1, len(words))
+        picked.add(' '.join(words[start:end]) if rng.random() < 0.3 else ' '.join(words))
+        if len(picked) < size and rng.random() < 0.2:
+            picked.add(f"{rng.choice(vocabulary)} {rng.randrange(size)}x")
+    return list(picked)
+
+
+def measure(fn, symptoms: list, repeat: int) -> float:
+    """Mean microseconds per call"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(symptoms)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200, 1000, 3000])
+    args = parser.parse_args()
+
+    analyzer = SymptomAnalyzer()
+    prune = analyzer._remove_redundant_symptoms
+
+    for symptoms, expected in CASES:
+        assert prune(symptoms) == expected, (symptoms, prune(symptoms))
+    print(f"cases: {len(CASES)} word-boundary cases pruned as expected")
+
+    rng = random.Random(9)
+    vocabulary = sorted(analyzer.matcher.phrases)
+    for _ in range(200):
+        symptoms = candidates(vocabulary, rng, rng.randint(5, 60))
+        assert prune(symptoms) == reference_prune(symptoms), symptoms
+    print("parity: 200 random candidate lists match the pairwise whole-word check")
+
+    print(f"\n{'symptoms':>8} {'pairwise us':>12} {'index us':>10} {'speedup':>8}")
+    for size in args.sizes:
+        symptoms = candidates(vocabulary, rng, size)
+        repeat = max(1, 20000 // size)
+        pairwise_us = measure(legacy_prune, symptoms, max(1, repeat // size))
+        index_us = measure(prune, symptoms, repeat)
+        print(f"{size:>8} {pairwise_us:>12.1f} {index_us:>10.1f} {pairwise_us / index_us:>7.1f}x")
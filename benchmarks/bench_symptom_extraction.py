@@ -0,0 +1,124 @@
+"""
+Symptom Extraction Benchmark
+Trigger-phrase extraction with the compiled grammar vs the nine sequential
+regexes it replaced, in notes per second. Output parity is covered by
+tests/test_symptom_extraction.py.
+
+Run from the repository root:
+    python -m benchmarks.bench_symptom_extraction
+"""
+
+import re
+import time
+import random
+import argparse
+
+from core.clinical.extraction_grammar import DEFAULT_GRAMMAR
+from core.clinical.symptom_analyzer import SymptomAnalyzer
+
+LEGACY_PATTERNS = [
+    r'complains? of (.+?)(?:\.|,|and|with)',
+    r'presents? with (.+?)(?:\.|,|and)',
+    r'reports? (.+?)(?:\.|,|and)',
+    r'experiencing (.+?)(?:\.|,|and|for)',
+    r'has (?:been having|had) (.+?)(?:\.|,|and|for)',
+    r'suffering from (.+?)(?:\.|,|and)',
+    r'symptoms? (?:include|are|:) (.+?)(?:\.|,|and)',
+    r'chief complaint[s]?(?:\s+is|\s+are|:) (.+?)(?:\.|,|and)',
+    r'c/o (.+?)(?:\.|,|and)',
+]
+
+TRIGGERS = [
+    "complains of", "presents with", "reports", "experiencing",
+    "has been having", "has had", "suffering from", "symptoms include",
+    "chief complaint is", "c/o",
+]
+
+FILLER = [
+    "Vitals stable.", "No known allergies.", "Seen in clinic today.",
+    "Follow up in two weeks.", "Examination unremarkable.",
+]
+
+def legacy_items(analyzer: SymptomAnalyzer, text: str) -> set:
+    """Method 1 as it ran before the grammar"""
+    text_lower = text.lower()
+    symptoms = set()
+    for pattern in LEGACY_PATTERNS:
+        for match in re.findall(pattern, text_lower, re.IGNORECASE):
+            for part in re.split(r',|and', match):
+                symptom = analyzer._clean_symptom(part)
+                if analyzer._is_valid_symptom(symptom):
+                    symptoms.add(symptom)
+    return symptoms
+
+
+def grammar_items(analyzer: SymptomAnalyzer, text: str) -> set:
+    symptoms = set()
+    for item in DEFAULT_GRAMMAR.items(text.lower()):
+        symptom = analyzer._clean_symptom(item)
+        if analyzer._is_valid_symptom(symptom):
+            symptoms.add(symptom)
+    return symptoms
+
+
+def legacy_scan(analyzer: SymptomAnalyzer, text: str) -> list:
+    """Just the nine regex scans, without cleaning the items"""
+    text_lower = text.lower()
+    return [re.findall(pattern, text_lower, re.IGNORECASE) for pattern in LEGACY_PATTERNS]
+
+
+def grammar_scan(analyzer: SymptomAnalyzer, text: str) -> list:
+    return list(DEFAULT_GRAMMAR.clauses(text.lower()))
+
+
+def synthetic_note(vocabulary: list, rng: random.Random, sentences: int) -> str:
+    """Dictation-style note: trigger sentences with symptom lists between filler"""
+    parts = []
+    for _ in range(sentences):
+        if rng.random() < 0.4:
+            parts.append(rng.choice(FILLER))
+            continue
+        listed = rng.sample(vocabulary, rng.randint(1, 3))
+        if len(listed) > 1:
+            listed = [', '.join(listed[:-1]) + ' and ' + listed[-1]]
+        parts.append(f"{rng.choice(TRIGGERS).capitalize()} {listed[0]}.")
+    return ' '.join(parts)
+
+
+def measure(fn, analyzer: SymptomAnalyzer, notes: list) -> float:
+    """Notes per second"""
+    start = time.perf_counter()
+    for note in notes:
+        fn(analyzer, note)
+    return len(notes) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=5000)
+    parser.add_argument("--sentences", type=int, default=12)
+    args = parser.parse_args()
+
+    analyzer = SymptomAnalyzer()
+    rng = random.Random(3)
+    vocabulary = sorted(
+        phrase for phrase in analyzer.matcher.phrases
+        if analyzer._is_valid_symptom(phrase)
+    )
+    notes = [synthetic_note(vocabulary, rng, args.sentences) for _ in range(args.notes)]
+
+    legacy_items_per_note = sum(len(legacy_items(analyzer, n)) for n in notes) / len(notes)
+    grammar_items_per_note = sum(len(grammar_items(analyzer, n)) for n in notes) / len(notes)
+
+    print(f"\n{'stage':<20} {'legacy/s':>10} {'grammar/s':>10} {'speedup':>8}")
+    for stage, legacy_fn, grammar_fn in (
+        ("scan", legacy_scan, grammar_scan),
+        ("scan + clean", legacy_items, grammar_items),
+    ):
+        legacy_rate = measure(legacy_fn, analyzer, notes)
+        grammar_rate = measure(grammar_fn, analyzer, notes)
+        print(f"{stage:<20} {legacy_rate:>10.0f} {grammar_rate:>10.0f} "
+              f"{grammar_rate / legacy_rate:>7.1f}x")
+
+    print(f"\nitems per note: legacy {legacy_items_per_note:.1f}, grammar {grammar_items_per_note:.1f}")
+    print(f"extract_symptoms: {measure(SymptomAnalyzer.extract_symptoms, analyzer, notes):.0f} notes/s")
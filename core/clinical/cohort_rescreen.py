@@ -0,0 +1,373 @@
+"""
+Cohort Rescreening
+Re-runs rare-disease detection over every stored patient after a config change
+Chunks are scored in a process pool; progress is checkpointed so runs resume
+
+Run from the repository root:
+    python -m core.clinical.cohort_rescreen --workers 8
+"""
+
+import os
+import json
+import time
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterator, List, Optional
+import logging
+
+from core.clinical.disease_detector import DiseaseDetectionEngine
+from core.clinical.disease_catalogue import SOURCES as CATALOGUE_SOURCES
+
+logger = logging.getLogger(__name__)
+
+SYMPTOM_SCORES = "data/config/symptom_severity_scores.json"
+
+# Only what detection and the intelligent filter read is sent to workers
+SCREEN_FIELDS = ['age', 'sex', 'symptom_tracking', 'visits']
+
+# Confidence moves smaller than this are not reported as changes
+CONFIDENCE_TOLERANCE = 0.005
+
+# Detection engine of a worker process, built once by _init_worker
+_engine = None
+
+
+def _init_worker(disease_config: Optional[str], symptom_scores: str):
+    global _engine
+    logging.getLogger('core.clinical.disease_detector').setLevel(logging.WARNING)
+    _engine = DiseaseDetectionEngine(disease_config, symptom_scores)
+
+
+def _screen_chunk(payloads: List[Dict]) -> List[Dict]:
+    """Detect for one chunk of patients; runs in a worker process"""
+    return [_screen_patient(_engine, payload) for payload in payloads]
+
+
+def _screen_patient(engine: DiseaseDetectionEngine, payload: Dict) -> Dict:
+    patient_id = payload['id']
+    try:
+        # No id: per-patient incremental state is pointless in a one-shot pass
+        alerts = engine.detect_rare_diseases(
+            {key: payload[key] for key in ('age', 'sex', 'symptom_tracking') if key in payload},
+            visit_date=payload['visit_date']
+        )
+    except Exception as e:
+        return {'patient_id': patient_id, 'error': str(e)}
+
+    return {'patient_id': patient_id, **_diff_alerts(payload['previous'], alerts)}
+
+
+def _diff_alerts(previous: Dict[str, float], alerts: List[Dict]) -> Dict:
+    """New, changed and resolved alerts against the patient's latest stored ones"""
+    current = {alert['disease_id']: alert for alert in alerts}
+    new = [alert for disease_id, alert in current.items() if disease_id not in previous]
+    changed = [
+        {
+            'disease_id': disease_id,
+            'disease': alert['disease'],
+            'previous_confidence': previous[disease_id],
+            'confidence': alert['confidence']
+        }
+        for disease_id, alert in current.items()
+        if disease_id in previous
+        and abs(alert['confidence'] - previous[disease_id]) > CONFIDENCE_TOLERANCE
+    ]
+    resolved = [disease_id for disease_id in previous if disease_id not in current]
+
+    result = {'new': new, 'changed': changed, 'resolved': resolved}
+    if new or changed or resolved:
+        result['alerts'] = alerts
+    return result
+
+
+def _screen_payload(patient_data: Dict) -> Optional[Dict]:
+    """Compact worker input: tracking, filter fields, last visit date and alerts"""
+    if not patient_data.get('symptom_tracking'):
+        return None
+
+    visits = patient_data.get('visits') or []
+    latest = max(visits, key=lambda visit: visit.get('timestamp', ''), default={})
+    previous = {
+        alert['disease_id']: alert.get('confidence', 0)
+        for alert in latest.get('disease_alerts') or []
+        if isinstance(alert, dict) and 'disease_id' in alert
+    }
+
+    return {
+        'id': patient_data['id'],
+        'age': patient_data.get('age', 30),
+        'sex': patient_data.get('sex', 'unknown'),
+        'symptom_tracking': patient_data['symptom_tracking'],
+        'visit_date': latest.get('timestamp'),
+        'previous': previous
+    }
+
+
+def _config_fingerprint(*paths: str) -> str:
+    """Changes whenever one of the config files does"""
+    digest = hashlib.sha1()
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size};".encode())
+        except OSError:
+            digest.update(f"{path}:missing;".encode())
+    return digest.hexdigest()[:16]
+
+
+class RescreenRun:
+    """
+    One rescreening run on disk, under results_dir/{run_id}/:
+      run.json       run metadata (configs, fingerprint, status)
+      results.jsonl  one line per patient whose alerts changed
+      done.txt       patient ids screened successfully, appended per chunk
+      summary.json   report written when the run completes
+    Results are appended before their ids, so a crash can at worst
+    re-screen (and re-report) the last chunk. Patients that failed are not
+    marked done, so a resumed run screens them again.
+    """
+
+    def __init__(self, run_dir: Path):
+        self.run_dir = run_dir
+        self.meta_path = run_dir / "run.json"
+        self.results_path = run_dir / "results.jsonl"
+        self.done_path = run_dir / "done.txt"
+        self.summary_path = run_dir / "summary.json"
+
+    @classmethod
+    def open(cls, results_dir: str, fingerprint: str, resume: bool,
+             meta: Dict) -> 'RescreenRun':
+        """Latest unfinished run for this config if resuming, else a new one"""
+        root = Path(results_dir)
+        root.mkdir(parents=True, exist_ok=True)
+
+        if resume:
+            for run_dir in sorted(root.iterdir(), reverse=True):
+                run = cls(run_dir)
+                run_meta = run.load_meta()
+                if run_meta.get('status') == 'running' and run_meta.get('fingerprint') == fingerprint:
+                    logger.info(f"Resuming rescreen run {run_dir.name}")
+                    return run
+
+        run = cls(root / datetime.now().strftime("%Y%m%dT%H%M%S%f"))
+        run.run_dir.mkdir()
+        run.save_meta({
+            **meta,
+            'fingerprint': fingerprint,
+            'status': 'running',
+            'started_at': datetime.now().isoformat()
+        })
+        return run
+
+    def load_meta(self) -> Dict:
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_meta(self, meta: Dict):
+        tmp_path = self.meta_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, self.meta_path)
+
+    def done_ids(self) -> set:
+        if not self.done_path.exists():
+            return set()
+        with open(self.done_path, 'r', encoding='utf-8') as f:
+            return {line.strip() for line in f if line.strip()}
+
+    def record(self, results: List[Dict]):
+        """Append a finished chunk's successes: changed patients first, then the checkpoint"""
+        screened = [r for r in results if 'error' not in r]
+        changed = [r for r in screened if 'alerts' in r]
+        if changed:
+            with open(self.results_path, 'a', encoding='utf-8') as f:
+                for result in changed:
+                    f.write(json.dumps(result, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+        with open(self.done_path, 'a', encoding='utf-8') as f:
+            f.write("".join(f"{r['patient_id']}\n" for r in screened))
+
+    def results(self) -> Iterator[Dict]:
+        """Every result line recorded so far, including earlier sessions"""
+        if not self.results_path.exists():
+            return
+        with open(self.results_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping bad rescreen result line in {self.results_path}")
+
+
+def rescreen_cohort(data_adapter=None, disease_config: Optional[str] = None,
+                    symptom_scores: str = SYMPTOM_SCORES,
+                    results_dir: str = "data/rescreen",
+                    workers: Optional[int] = None, chunk_size: int = 250,
+                    resume: bool = True,
+                    progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Screen every stored patient against the current disease config
+    (the merged catalogue unless disease_config names one file).
+    Each patient is scored as of their latest visit and compared with that
+    visit's stored alerts; only differences go to the results store.
+    progress(stats) is called after each chunk. Returns the summary report.
+    """
+    if data_adapter is None:
+        from data.db.factory import create_adapter
+        data_adapter = create_adapter()
+
+    workers = workers or os.cpu_count() or 1
+    disease_sources = CATALOGUE_SOURCES if disease_config is None else (disease_config,)
+
+    run = RescreenRun.open(
+        results_dir, _config_fingerprint(*disease_sources, symptom_scores), resume,
+        {'disease_config': disease_config or 'catalogue', 'symptom_scores': symptom_scores}
+    )
+    done = run.done_ids()
+
+    stats = {'screened': 0, 'skipped': len(done), 'no_symptoms': 0, 'changed_patients': 0,
+             'new_alerts': 0, 'changed_alerts': 0, 'resolved_alerts': 0, 'failed': 0}
+    started = time.perf_counter()
+
+    def collect(futures):
+        for future in futures:
+            results = future.result()
+            run.record(results)
+            for result in results:
+                stats['screened'] += 1
+                if 'error' in result:
+                    stats['failed'] += 1
+                    logger.warning(f"Rescreen failed for {result['patient_id']}: {result['error']}")
+                    continue
+                stats['new_alerts'] += len(result['new'])
+                stats['changed_alerts'] += len(result['changed'])
+                stats['resolved_alerts'] += len(result['resolved'])
+                if 'alerts' in result:
+                    stats['changed_patients'] += 1
+
+        elapsed = time.perf_counter() - started
+        stats['elapsed_seconds'] = round(elapsed, 1)
+        stats['patients_per_second'] = round(stats['screened'] / elapsed, 1) if elapsed else 0
+        logger.info(f"Rescreened {stats['screened']} patients ({stats['patients_per_second']}/s)")
+        if progress:
+            progress(dict(stats))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(disease_config, symptom_scores)) as pool:
+        pending = set()
+        chunk = []
+
+        for patient_data in data_adapter.iter_patients(fields=SCREEN_FIELDS):
+            if patient_data['id'] in done:
+                continue
+
+            payload = _screen_payload(patient_data)
+            if payload is None:
+                stats['no_symptoms'] += 1
+                continue
+
+            chunk.append(payload)
+            if len(chunk) >= chunk_size:
+                pending.add(pool.submit(_screen_chunk, chunk))
+                chunk = []
+
+            # Keep memory flat: at most 2 * workers chunks in flight
+            if len(pending) >= workers * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+
+        if chunk:
+            pending.add(pool.submit(_screen_chunk, chunk))
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            collect(finished)
+
+    summary = _summarize(run, stats)
+    if stats['failed']:
+        # Left open so the next resumed run retries just the failed patients
+        logger.warning(f"Rescreen run {run.run_dir.name}: {stats['failed']} patients failed; "
+                       f"re-run to retry them")
+        return summary
+
+    run.save_meta({**run.load_meta(), 'status': 'complete',
+                   'completed_at': datetime.now().isoformat()})
+    logger.info(f"Rescreen run {run.run_dir.name} complete: "
+                f"{summary['changed_patients']} patients with changed alerts")
+    return summary
+
+
+def _summarize(run: RescreenRun, stats: Dict) -> Dict:
+    """Report over the whole run, including chunks from resumed sessions"""
+    by_disease = {}
+    totals = {'changed_patients': 0, 'new_alerts': 0, 'changed_alerts': 0,
+              'resolved_alerts': 0}
+
+    for result in run.results():
+        if 'error' in result:
+            continue  # written by older versions; failures are retried instead
+        totals['changed_patients'] += 1
+        totals['new_alerts'] += len(result['new'])
+        totals['changed_alerts'] += len(result['changed'])
+        totals['resolved_alerts'] += len(result['resolved'])
+        for alert in result['new']:
+            entry = by_disease.setdefault(alert['disease_id'], {'disease': alert['disease'], 'new': 0})
+            entry['new'] += 1
+
+    summary = {
+        'run_id': run.run_dir.name,
+        'results_path': str(run.results_path),
+        **run.load_meta(),
+        'patients_screened': len(run.done_ids()),
+        'screened_this_session': stats['screened'],
+        'skipped_already_screened': stats['skipped'],
+        'skipped_no_symptoms': stats['no_symptoms'],
+        # Still failing after this session; a resumed run retries them
+        'failed': stats['failed'],
+        'elapsed_seconds': stats.get('elapsed_seconds', 0),
+        'patients_per_second': stats.get('patients_per_second', 0),
+        **totals,
+        'new_alerts_by_disease': dict(
+            sorted(by_disease.items(), key=lambda item: item[1]['new'], reverse=True)
+        )
+    }
+    summary.pop('status', None)
+
+    with open(run.summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rescreen all patients for rare diseases")
+    parser.add_argument("--disease-config", default=None)
+    parser.add_argument("--symptom-scores", default=SYMPTOM_SCORES)
+    parser.add_argument("--results-dir", default="data/rescreen")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=250)
+    parser.add_argument("--restart", action="store_true", help="ignore unfinished runs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    def show(stats: Dict):
+        print(f"\r⏳ {stats['screened']} screened, {stats['changed_patients']} changed "
+              f"({stats['patients_per_second']}/s)", end="", flush=True)
+
+    result = rescreen_cohort(
+        disease_config=args.disease_config, symptom_scores=args.symptom_scores,
+        results_dir=args.results_dir, workers=args.workers, chunk_size=args.chunk_size,
+        resume=not args.restart, progress=show
+    )
+    print(f"\n✅ Screened {result['patients_screened']} patients: {result['new_alerts']} new, "
+          f"{result['changed_alerts']} changed, {result['resolved_alerts']} resolved alerts "
+          f"({result['failed']} failed, {result['skipped_already_screened']} already screened). "
+          f"Report: {Path(result['results_path']).parent / 'summary.json'}")
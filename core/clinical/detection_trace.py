@@ -0,0 +1,107 @@
+"""
+Detection Trace
+Opt-in record of one detection run: per-stage timings, counts and the
+reason each candidate disease was rejected
+"""
+
+import json
+import time
+from typing import Dict
+
+
+class _Stage:
+    """Context manager adding its elapsed time to a trace stage"""
+
+    __slots__ = ('trace', 'name', 'started')
+
+    def __init__(self, trace: 'DetectionTrace', name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.add_time(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class DetectionTrace:
+    """
+    Collected by DiseaseDetectionEngine.detect_with_trace.
+    Stage times accumulate in milliseconds; rejections map disease id to
+    the first check it failed, covering every catalogue disease that did
+    not match, including those the inverted-index prefilter never scored.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.timings_ms: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.rejections: Dict[str, str] = {}
+        self.notes: Dict[str, object] = {}
+        self._started = time.perf_counter()
+
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+
+    def add_time(self, name: str, seconds: float):
+        self.timings_ms[name] = self.timings_ms.get(name, 0.0) + seconds * 1000
+
+    def count(self, name: str, n: int = 1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def reject(self, disease_id: str, reason: str):
+        self.rejections[disease_id] = reason
+
+    def note(self, key: str, value):
+        self.notes[key] = value
+
+    def to_dict(self) -> Dict:
+        return {
+            'total_ms': round((time.perf_counter() - self._started) * 1000, 3),
+            'timings_ms': {name: round(ms, 3) for name, ms in self.timings_ms.items()},
+            'counts': dict(self.counts),
+            'rejections': dict(self.rejections),
+            'notes': dict(self.notes)
+        }
+
+    def to_json(self, indent: int = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False, default=str)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _NullTrace:
+    """Stand-in when tracing is off; hot loops check .enabled and skip it"""
+
+    enabled = False
+    _stage = _NullStage()
+
+    def stage(self, name: str) -> _NullStage:
+        return self._stage
+
+    def add_time(self, name: str, seconds: float):
+        pass
+
+    def count(self, name: str, n: int = 1):
+        pass
+
+    def reject(self, disease_id: str, reason: str):
+        pass
+
+    def note(self, key: str, value):
+        pass
+
+
+NULL_TRACE = _NullTrace()
@@ -0,0 +1,272 @@
+"""
+Disease Catalogue
+Merges every disease config file into one normalized catalogue and writes
+it to a versioned JSON artifact, so a cold start loads the merged result
+instead of re-normalizing every source
+
+Run from the repository root:
+    python -m core.clinical.disease_catalogue build
+"""
+
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from data.db.config_registry import config_registry, thaw
+from core.clinical.disease_matrix import DiseaseMatrix, flatten_symptoms, disease_key
+
+logger = logging.getLogger(__name__)
+
+# Highest precedence first. A disease takes its record from the first
+# source that lists it; later sources only fill fields it leaves empty.
+SOURCES = (
+    "data/config/rare_diseases_comprehensive.json",
+    "data/config/disease_watchlist.json",
+    "data/config/rare_disease_matrix.json",
+)
+ARTIFACT = "data/config/compiled/disease_catalogue.json"
+
+# Bump when the normalized schema or the artifact layout changes
+CATALOGUE_FORMAT = 2
+
+# Normalized field -> spellings accepted from source files, preferred first
+FIELD_ALIASES = {
+    'min_matches': ('min_matches', 'min_symptoms'),
+    'suggested_tests': ('suggested_tests', 'diagnostic_tests', 'tests'),
+    'icd_code': ('icd_code', 'icd10'),
+}
+
+# Source-wide 'detection_rules' keys that act as per-disease defaults
+RULE_FIELDS = ('min_visits_required', 'min_timespan_days')
+
+
+def normalize_entry(disease_id: str, config: Dict, source: str,
+                    rules: Optional[Dict] = None) -> Dict:
+    """One disease in the catalogue schema; unknown fields are kept as-is"""
+    aliases = {alias for names in FIELD_ALIASES.values() for alias in names}
+    entry = {
+        key: value for key, value in config.items()
+        if key not in aliases and key not in ('symptoms', 'specialist')
+    }
+    entry['name'] = config.get('name', disease_id)
+
+    symptoms = config.get('symptoms')
+    entry['symptoms'] = list(flatten_symptoms(symptoms))
+    if isinstance(symptoms, dict):
+        # Keep the categories for display; detection uses the flat list
+        entry['symptom_groups'] = {
+            group: [s.lower() for s in items if isinstance(s, str)]
+            for group, items in symptoms.items() if isinstance(items, list)
+        }
+
+    for field, names in FIELD_ALIASES.items():
+        for name in names:
+            if name in config:
+                entry[field] = config[name]
+                break
+
+    if 'specialists' not in entry and config.get('specialist'):
+        entry['specialists'] = [config['specialist']]
+    if 'confidence_boost_symptoms' in entry:
+        entry['confidence_boost_symptoms'] = [
+            s.lower() for s in entry['confidence_boost_symptoms'] or []
+        ]
+
+    for field in RULE_FIELDS:
+        if field not in entry and rules and field in rules:
+            entry[field] = rules[field]
+
+    entry['sources'] = [source]
+    return entry
+
+
+def read_sources(sources: Tuple[str, ...] = SOURCES) -> Tuple[Tuple, Tuple]:
+    """
+    (contents, fingerprint) of the sources as the registry serves them.
+    The fingerprint is the mtime/size of the file each content was parsed
+    from, so it never describes a newer file than the one that was read.
+    """
+    contents = []
+    fingerprint = []
+    for path in sources:
+        data, stamp = config_registry.get_file_stamped(path)
+        contents.append(data)
+        fingerprint.append((path, *stamp) if stamp is not None else (path, None, None))
+    return tuple(contents), tuple(fingerprint)
+
+
+def merge_sources(sources: Tuple[str, ...] = SOURCES,
+                  contents: Optional[Tuple] = None) -> Dict:
+    """Normalized catalogue from all readable sources, in precedence order"""
+    if contents is None:
+        contents, _ = read_sources(sources)
+    catalogue: Dict[str, Dict] = {}
+
+    for path, data in zip(sources, contents):
+        # Missing or unparseable sources (logged by the registry) are skipped
+        data = thaw(data)
+        if data is None:
+            continue
+
+        source = Path(path).stem
+        rules = data.get('detection_rules') if isinstance(data, dict) else None
+        diseases = data.get('diseases', {}) if isinstance(data, dict) else data
+
+        if isinstance(diseases, list):
+            items = [(disease.get('name'), disease) for disease in diseases
+                     if isinstance(disease, dict) and 'name' in disease]
+        elif isinstance(diseases, dict):
+            items = list(diseases.items())
+        else:
+            logger.warning(f"No diseases found in {path}")
+            continue
+
+        for raw_id, config in items:
+            if not isinstance(config, dict):
+                logger.warning(f"Skipping malformed disease {raw_id} in {path}")
+                continue
+            # Name-keyed files ("Wilson's Disease") share ids with id-keyed ones
+            disease_id = disease_key(raw_id)
+            entry = normalize_entry(raw_id, config, source, rules)
+
+            merged = catalogue.get(disease_id)
+            if merged is None:
+                catalogue[disease_id] = entry
+                continue
+
+            for key, value in entry.items():
+                if key == 'sources':
+                    merged['sources'].append(source)
+                elif merged.get(key) in (None, '', [], {}):
+                    merged[key] = value
+
+    return catalogue
+
+
+class Catalogue:
+    """
+    Merged diseases plus their compiled matrix; the artifact stores the diseases.
+    contents holds the registry objects it was merged from, when known.
+    """
+
+    def __init__(self, diseases: Dict, fingerprint: Tuple, contents: Optional[Tuple] = None):
+        self.diseases = diseases
+        self.contents = contents
+        self.matrix = DiseaseMatrix(diseases)
+        self.fingerprint = fingerprint
+        self.version = hashlib.sha1(
+            json.dumps([CATALOGUE_FORMAT, diseases], sort_keys=True, default=str).encode()
+        ).hexdigest()[:12]
+        self.format = CATALOGUE_FORMAT
+
+    @property
+    def source_names(self) -> List[str]:
+        return [Path(path).stem for path, mtime_ns, _ in self.fingerprint if mtime_ns is not None]
+
+    def to_artifact(self) -> Dict:
+        return {
+            'format': self.format,
+            'version': self.version,
+            'fingerprint': [list(item) for item in self.fingerprint],
+            'diseases': self.diseases
+        }
+
+    @classmethod
+    def from_artifact(cls, data: Dict) -> Optional['Catalogue']:
+        """Catalogue from artifact contents, None if the format or checksum is off"""
+        if not isinstance(data, dict) or data.get('format') != CATALOGUE_FORMAT:
+            return None
+        catalogue = cls(data['diseases'], tuple(tuple(item) for item in data['fingerprint']))
+        return catalogue if catalogue.version == data.get('version') else None
+
+
+def build_catalogue(sources: Tuple[str, ...] = SOURCES,
+                    artifact_path: Optional[str] = ARTIFACT,
+                    read: Optional[Tuple[Tuple, Tuple]] = None) -> Catalogue:
+    """
+    Merge the sources and (if artifact_path) write the compiled artifact.
+    read is a read_sources() result to build from instead of reading again.
+    """
+    contents, fingerprint = read if read is not None else read_sources(sources)
+    catalogue = Catalogue(merge_sources(sources, contents), fingerprint, contents)
+
+    if artifact_path:
+        path = Path(artifact_path)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(catalogue.to_artifact(), f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, path)
+            logger.info(f"Compiled {len(catalogue.diseases)} diseases to {path} "
+                        f"(version {catalogue.version})")
+        except OSError as e:
+            logger.error(f"Could not write disease catalogue artifact: {e}")
+
+    return catalogue
+
+
+def load_catalogue(sources: Tuple[str, ...] = SOURCES,
+                   artifact_path: str = ARTIFACT) -> Catalogue:
+    """The compiled artifact if it matches the sources, else a fresh build"""
+    read = read_sources(sources)
+    contents, fingerprint = read
+
+    try:
+        # Plain JSON: nothing in the writable data directory gets executed
+        with open(artifact_path, 'r', encoding='utf-8') as f:
+            catalogue = Catalogue.from_artifact(json.load(f))
+        if catalogue is not None and catalogue.fingerprint == fingerprint:
+            catalogue.contents = contents
+            return catalogue
+        logger.info("Disease catalogue artifact is stale, rebuilding")
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Unreadable disease catalogue artifact, rebuilding: {e}")
+
+    return build_catalogue(sources, artifact_path, read)
+
+
+_current: Optional[Catalogue] = None
+_lock = threading.Lock()
+
+
+def current_catalogue() -> Catalogue:
+    """
+    Process-wide catalogue shared by all engines.
+    The same object is returned until the registry hands out a reloaded
+    source, so it is exactly as fresh as the registry.
+    """
+    global _current
+
+    with _lock:
+        if _current is not None and all(
+            config_registry.get_file(path) is old
+            for path, old in zip(SOURCES, _current.contents)
+        ):
+            return _current
+
+        _current = load_catalogue(SOURCES, ARTIFACT)
+        return _current
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the merged disease catalogue")
+    parser.add_argument("command", choices=["build", "show"])
+    parser.add_argument("--artifact", default=ARTIFACT)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        result = build_catalogue(artifact_path=args.artifact)
+    else:
+        result = load_catalogue(artifact_path=args.artifact)
+
+    print(f"✅ {len(result.diseases)} diseases from {', '.join(result.source_names)} "
+          f"(version {result.version}) -> {args.artifact}")
@@ -4,17 +4,83 @@ Implements longitudinal pattern recognition with false positive prevention
 FIXED VERSION - Handles both list and dict formats
 """
 
-import json
+import time
+import heapq
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Set, Optional
 import logging
 
+from data.db.config_registry import config_registry, freeze, thaw
+from core.clinical.disease_matrix import DiseaseMatrix, CompiledDisease, normalize_diseases
+from core.clinical.disease_catalogue import current_catalogue
+from core.clinical.detection_trace import DetectionTrace, NULL_TRACE
+from core.clinical.memo import BoundedMemo
+from core.clinical.symptom_timeline import SymptomTimeline, day_ordinal, day_string
 from core.clinical.intelligent_filter import IntelligentFilter
 from core.clinical.symptom_analyzer import SymptomAnalyzer
 
 logger = logging.getLogger(__name__)
 
 
+class _DetectionState:
+    """Per-patient pattern results from the last run; replaced, never mutated"""
+    
+    __slots__ = ('matrix', 'end_day', 'fingerprint', 'alerts')
+    
+    def __init__(self, matrix: DiseaseMatrix, end_day: Optional[int],
+                 fingerprint: Dict[str, Tuple], alerts: Dict[int, Dict]):
+        self.matrix = matrix
+        self.end_day = end_day
+        self.fingerprint = fingerprint
+        self.alerts = alerts
+
+
+class _EngineConfig:
+    """
+    Disease tables one detection run scores against; replaced, never mutated.
+    Swapped with a single assignment so a run never pairs a new matrix with
+    old symptom scores.
+    """
+    
+    __slots__ = ('raw_configs', 'symptom_scores', 'diseases', 'matrix', 'version')
+    
+    def __init__(self, raw_configs: Tuple, symptom_scores: Dict, diseases: Dict,
+                 matrix: DiseaseMatrix, version):
+        self.raw_configs = raw_configs
+        self.symptom_scores = symptom_scores
+        self.diseases = diseases
+        self.matrix = matrix
+        self.version = version
+
+
+def _tracking_fingerprint(symptom_tracking: Dict) -> Dict[str, Tuple]:
+    """Recorded dates per symptom; a changed tuple means the symptom changed"""
+    return {
+        symptom: tuple(occ.get('date') if isinstance(occ, dict) else None
+                       for occ in occurrences or [])
+        for symptom, occurrences in symptom_tracking.items()
+    }
+
+
+def _relative_alert(alert: Dict, anchor: int) -> Tuple[Dict, Tuple]:
+    """Alert split into its date-free part and (symptom, days before anchor) pairs"""
+    template = {key: value for key, value in alert.items() if key != 'timeline'}
+    offsets = tuple(
+        (entry['symptom'], anchor - day_ordinal(entry['date'])) for entry in alert['timeline']
+    )
+    return freeze(template), offsets
+
+
+def _placed_alert(stored: Tuple[Dict, Tuple], anchor: int) -> Dict:
+    """Inverse of _relative_alert for another patient's anchor day"""
+    template, offsets = stored
+    alert = thaw(template)
+    alert['timeline'] = [
+        {'symptom': symptom, 'date': day_string(anchor - offset)} for symptom, offset in offsets
+    ]
+    return alert
+
+
 class DiseaseDetectionEngine:
     """
     Detects rare diseases based on longitudinal symptom patterns.
@@ -23,42 +89,215 @@ class DiseaseDetectionEngine:
     - Symptom deduplication per visit
     - Intelligent filtering of common conditions
     - Confidence-based alerting
+    
+    disease_config_path=None uses the merged catalogue of every disease
+    config (see disease_catalogue); a path uses that one file.
+    
+    The engine keeps per-patient state (keyed by patient id) so a
+    re-run only re-scores diseases whose symptoms' in-window days changed.
+    Final alerts are also memoized per presentation: the catalogue symptoms'
+    days relative to the visit, the filter's age bucket and the config
+    version. Patients with the same shape skip scoring and filtering.
     """
     
-    def __init__(self, disease_config_path: str, symptom_scores_path: str):
-        self.diseases = self._load_disease_config(disease_config_path)
-        self.symptom_scores = self._load_symptom_scores(symptom_scores_path)
+    def __init__(self, disease_config_path: Optional[str], symptom_scores_path: str):
+        self.disease_config_path = disease_config_path
+        self.symptom_scores_path = symptom_scores_path
+        self._config = None
+        self._presentations = BoundedMemo(maxsize=4096)
+        self._refresh_config()
         self.intelligent_filter = IntelligentFilter()
         self.symptom_analyzer = SymptomAnalyzer()
+        self._states = BoundedMemo(maxsize=1024)
+    
+    def invalidate(self, patient_id: Optional[str] = None):
+        """Forget cached detection state for one patient (or everyone, memos included)"""
+        if patient_id is None:
+            self._states.clear()
+            self._presentations.clear()
+        else:
+            self._states.pop(patient_id)
+    
+    @property
+    def diseases(self) -> Dict:
+        return self._config.diseases
+    
+    @property
+    def matrix(self) -> DiseaseMatrix:
+        return self._config.matrix
+    
+    @property
+    def symptom_scores(self) -> Dict:
+        return self._config.symptom_scores
+    
+    @property
+    def config_version(self):
+        return self._config.version
+    
+    def _refresh_config(self) -> _EngineConfig:
+        """
+        Current disease tables, re-derived when the registry hands out a
+        reloaded file. Callers keep the returned snapshot for the whole run.
+        """
+        current = self._config
+        catalogue = current_catalogue() if self.disease_config_path is None else None
+        raw_configs = (
+            catalogue or config_registry.get_file(self.disease_config_path),
+            config_registry.get_file(self.symptom_scores_path)
+        )
+        if current is not None and all(
+            new is old for new, old in zip(raw_configs, current.raw_configs)
+        ):
+            return current
+        
+        symptom_scores = self._load_symptom_scores(self.symptom_scores_path)
+        if catalogue is not None:
+            # Already merged and compiled; shared by every engine in the process
+            diseases = catalogue.diseases
+            matrix = catalogue.matrix
+        else:
+            diseases = self._load_disease_config(self.disease_config_path)
+            matrix = DiseaseMatrix(diseases)
+        
+        # Downstream caches key on the version, so memoized alerts from the
+        # old tables can't be served for the new ones
+        config = _EngineConfig(raw_configs, symptom_scores, diseases, matrix,
+                               config_registry.version)
+        self._config = config
+        self._presentations.clear()
+        return config
         
     def detect_rare_diseases(self, patient_data: Dict, 
                            current_symptoms: List[str] = None,
-                           visit_date: str = None) -> List[Dict]:
+                           visit_date: str = None,
+                           top_k: Optional[int] = None) -> List[Dict]:
         """
-        Main detection method with all safety checks
+        Main detection method with all safety checks.
+        Only diseases sharing at least min_matches symptoms with the
+        patient's tracking are scored; top_k keeps the k most confident.
         """
-        disease_alerts = []
-        symptom_tracking = patient_data.get('symptom_tracking', {})
-        
-        # FIX: Handle both list and dict formats
-        if isinstance(self.diseases, list):
-            # Convert list to dict on the fly
-            diseases_dict = {}
-            for disease in self.diseases:
-                if isinstance(disease, dict) and 'name' in disease:
-                    key = disease['name'].lower().replace(' ', '_').replace("'", "")
-                    diseases_dict[key] = disease
-            diseases_to_check = diseases_dict
+        return self._detect(patient_data, visit_date, top_k, NULL_TRACE)
+    
+    def detect_with_trace(self, patient_data: Dict,
+                          current_symptoms: List[str] = None,
+                          visit_date: str = None,
+                          top_k: Optional[int] = None) -> Tuple[List[Dict], DetectionTrace]:
+        """
+        detect_rare_diseases plus a DetectionTrace of the run.
+        Cached results are bypassed so every candidate's outcome is recorded;
+        the alerts are the same ones the cached path returns.
+        """
+        trace = DetectionTrace()
+        alerts = self._detect(patient_data, visit_date, top_k, trace)
+        return alerts, trace
+    
+    def _detect(self, patient_data: Dict, visit_date: Optional[str],
+                top_k: Optional[int], trace) -> List[Dict]:
+        with trace.stage('config'):
+            config = self._refresh_config()
+        
+        # Parse every tracked date once; windows become bisect lookups
+        timeline = SymptomTimeline(patient_data.get('symptom_tracking', {}))
+        end_day = (
+            datetime.fromisoformat(visit_date.split('T')[0]).toordinal()
+            if visit_date else None
+        )
+        
+        if trace.enabled:
+            with trace.stage('timeline'):
+                for symptom in timeline:
+                    timeline.days(symptom)
+            trace.count('tracked_symptoms', len(timeline.tracking))
+            trace.count('catalogue', len(config.matrix))
+            trace.note('config_version', config.version)
+            disease_alerts = self._filtered_alerts(config, patient_data, timeline, end_day, trace)
         else:
-            diseases_to_check = self.diseases
+            disease_alerts = self._memoized_alerts(config, patient_data, timeline, end_day)
         
-        # Analyze each disease
-        for disease_id, config in diseases_to_check.items():
-            alert = self._check_disease_pattern(
-                disease_id, config, symptom_tracking, visit_date
+        # Sort by confidence
+        with trace.stage('sort'):
+            if top_k is not None:
+                disease_alerts = heapq.nlargest(
+                    top_k, disease_alerts, key=lambda x: x['confidence']
+                )
+            else:
+                disease_alerts.sort(key=lambda x: x['confidence'], reverse=True)
+        
+        trace.count('alerts', len(disease_alerts))
+        return disease_alerts
+    
+    def _memoized_alerts(self, config: _EngineConfig, patient_data: Dict,
+                         timeline: SymptomTimeline, end_day: Optional[int]) -> List[Dict]:
+        """Filtered alerts, served from the presentation memo when possible"""
+        presentation = self._presentation_key(config, timeline, end_day, patient_data)
+        stored = self._presentations.get(presentation[1]) if presentation else None
+        
+        if stored is not None:
+            return [_placed_alert(entry, presentation[0]) for entry in stored]
+        
+        disease_alerts = self._filtered_alerts(config, patient_data, timeline, end_day)
+        if presentation:
+            anchor, key = presentation
+            self._presentations.put(
+                key, tuple(_relative_alert(alert, anchor) for alert in disease_alerts)
             )
-            
-            if alert:
+        return disease_alerts
+    
+    def memo_stats(self) -> Dict:
+        """Hit rates of the presentation, filter-decision and per-patient caches"""
+        return {
+            'presentations': self._presentations.stats(),
+            'filter_decisions': self.intelligent_filter.stats(),
+            'patient_states': self._states.stats()
+        }
+    
+    def _presentation_key(self, config: _EngineConfig, timeline: SymptomTimeline,
+                          end_day: Optional[int], patient_data: Dict) -> Optional[Tuple[int, Tuple]]:
+        """
+        (anchor day, memo key) for the patient's presentation, or None if it
+        can't be shared. Only catalogue symptoms' days that some window can
+        reach matter, and only as offsets from the anchor (the visit day, or
+        the latest tracked day when there is no visit date).
+        """
+        age_bucket = self.intelligent_filter.age_bucket(patient_data)
+        if age_bucket is None:
+            return None
+        
+        vocabulary = config.matrix.vocabulary
+        symptoms = sorted(symptom for symptom in timeline if symptom in vocabulary)
+        
+        if end_day is None:
+            anchor = max((timeline.days(s)[-1] for s in symptoms if timeline.days(s)), default=0)
+            in_reach = timeline.days
+        else:
+            anchor = end_day
+            in_reach = lambda symptom: timeline.window(symptom, end_day, config.matrix.max_window)
+        
+        signature = []
+        for symptom in symptoms:
+            days = in_reach(symptom)
+            if days:
+                signature.append((symptom, tuple(anchor - day for day in days)))
+        
+        key = (config.version, end_day is None, age_bucket, tuple(signature))
+        return anchor, key
+    
+    def _filtered_alerts(self, config: _EngineConfig, patient_data: Dict,
+                         timeline: SymptomTimeline, end_day: Optional[int],
+                         trace=NULL_TRACE) -> List[Dict]:
+        """Pattern alerts that pass the intelligent filter, in config order"""
+        disease_alerts = []
+        
+        # A traced run is always a full one
+        patient_id = None if trace.enabled else patient_data.get('id')
+        raw_alerts = self._raw_alerts(config, patient_id, timeline, end_day, trace)
+        
+        # Analyze each disease
+        with trace.stage('filter'):
+            for raw_alert in raw_alerts:
+                # Cached results are shared; filtering below edits the copy
+                alert = thaw(raw_alert)
+                
                 # Apply intelligent filtering
                 should_alert, adjusted_confidence, ruled_out = \
                     self.intelligent_filter.should_alert(
@@ -72,139 +311,240 @@ class DiseaseDetectionEngine:
                     alert['ruled_out_conditions'] = ruled_out
                     disease_alerts.append(alert)
                 else:
-                    logger.info(f"Filtered out {config['name']}: {ruled_out}")
+                    logger.info("Filtered out %s: %s", alert['disease'], ruled_out)
+                    if trace.enabled:
+                        trace.reject(
+                            alert['disease_id'],
+                            f"filtered: confidence {alert['confidence']:.2f} -> "
+                            f"{adjusted_confidence:.2f}, explained by "
+                            f"{', '.join(ruled_out) or 'a common pattern'}"
+                        )
         
-        # Sort by confidence
-        disease_alerts.sort(key=lambda x: x['confidence'], reverse=True)
         return disease_alerts
     
-    def _check_disease_pattern(self, disease_id: str, config: Dict,
-                              symptom_tracking: Dict, visit_date: str) -> Optional[Dict]:
+    def _raw_alerts(self, config: _EngineConfig, patient_id: Optional[str],
+                    timeline: SymptomTimeline, end_day: Optional[int], trace=NULL_TRACE) -> List[Dict]:
         """
-        Check if patient matches disease pattern
+        Pattern alerts before filtering, in config order.
+        Reuses the patient's previous results for diseases none of whose
+        symptoms changed (in tracking or in their time window).
         """
-        # Extract parameters - handle both old and new config formats
-        if 'symptoms' in config:
-            # Handle both nested symptoms (dict with categories) and flat list
-            if isinstance(config['symptoms'], dict):
-                # Flatten categorized symptoms
-                required_symptoms = set()
-                for category, symptoms in config['symptoms'].items():
-                    if isinstance(symptoms, list):
-                        required_symptoms.update(s.lower() for s in symptoms)
-            elif isinstance(config['symptoms'], list):
-                required_symptoms = set(s.lower() for s in config['symptoms'])
-            else:
-                required_symptoms = set()
+        if patient_id is None:
+            alerts = [
+                alert for alert in self._pattern_alerts(config, timeline, end_day, trace) if alert
+            ]
+            trace.count('matched', len(alerts))
+            return alerts
+        
+        fingerprint = _tracking_fingerprint(timeline.tracking)
+        state = self._states.get(patient_id)
+        
+        matrix = config.matrix
+        if (state is None or state.matrix is not matrix
+                or (state.end_day is None) != (end_day is None)):
+            positions = matrix.candidate_positions(matrix.symptom_ids(timeline))
+            alerts = {}
         else:
-            required_symptoms = set()
-            
-        min_matches = config.get('min_matches', config.get('min_symptoms', 3))
-        time_window = config.get('time_window_days', 365)
-        min_visits = config.get('min_visits_required', 2)
-        min_timespan = config.get('min_timespan_days', 7)
+            affected = self._affected_positions(matrix, state, fingerprint, timeline, end_day)
+            positions = sorted(affected)
+            alerts = {
+                position: alert for position, alert in state.alerts.items()
+                if position not in affected
+            }
+        
+        for position in positions:
+            alert = self._check_disease_pattern(config, matrix.diseases[position], timeline, end_day)
+            if alert:
+                alerts[position] = alert
+        
+        self._states.put(patient_id, _DetectionState(matrix, end_day, fingerprint, alerts))
+        return [alerts[position] for position in sorted(alerts)]
+    
+    def _affected_positions(self, matrix: DiseaseMatrix, state: _DetectionState,
+                            fingerprint: Dict[str, Tuple], timeline: SymptomTimeline,
+                            end_day: Optional[int]) -> set:
+        """Diseases whose result may differ from the cached state"""
+        vocabulary = matrix.vocabulary
+        postings = matrix.postings
+        
+        changed = {
+            symptom for symptom in fingerprint.keys() | state.fingerprint.keys()
+            if fingerprint.get(symptom) != state.fingerprint.get(symptom)
+        }
+        
+        affected = set()
+        for symptom in changed:
+            if symptom in vocabulary:
+                affected.update(postings.get(vocabulary[symptom], ()))
+        
+        if end_day == state.end_day:
+            return affected
+        
+        # A new visit date slides every window; compare what each one holds
+        diseases = matrix.diseases
+        for symptom in timeline:
+            if symptom in changed or symptom not in vocabulary:
+                continue
+            shifted = {}
+            for position in postings.get(vocabulary[symptom], ()):
+                window = diseases[position].time_window
+                if window not in shifted:
+                    shifted[window] = (
+                        timeline.window(symptom, state.end_day, window)
+                        != timeline.window(symptom, end_day, window)
+                    )
+                if shifted[window]:
+                    affected.add(position)
+        
+        return affected
+    
+    def _pattern_alerts(self, config: _EngineConfig, timeline: SymptomTimeline,
+                        end_day: Optional[int], trace=NULL_TRACE):
+        """Unfiltered alerts for every disease whose pattern matches"""
+        # Inverted-index lookup: diseases whose overlap can reach min_matches
+        with trace.stage('candidates'):
+            tracked_ids = config.matrix.symptom_ids(timeline)
+            candidates = config.matrix.candidates(tracked_ids)
+        trace.count('candidates', len(candidates))
         
-        # Track matched symptoms
-        matched_symptoms = []
-        visit_dates = set()
-        symptom_timeline = []
+        if trace.enabled:
+            self._trace_prefiltered(config.matrix, tracked_ids, candidates, trace)
+        
+        for disease in candidates:
+            yield self._check_disease_pattern(config, disease, timeline, end_day, trace)
+    
+    def _trace_prefiltered(self, matrix: DiseaseMatrix, tracked_ids, candidates, trace):
+        """Rejection reasons for the diseases the inverted index never scored"""
+        overlap = matrix.overlap(tracked_ids)
+        scored = {disease.disease_id for disease in candidates}
+        prefiltered = 0
+        for position, disease in enumerate(matrix.diseases):
+            if disease.disease_id in scored:
+                continue
+            prefiltered += 1
+            trace.reject(disease.disease_id,
+                         f"prefilter: {overlap.get(position, 0)} of {disease.min_matches} "
+                         f"required symptoms ever tracked")
+        trace.count('prefiltered', prefiltered)
+    
+    def _check_disease_pattern(self, config: _EngineConfig, disease: CompiledDisease,
+                              timeline: SymptomTimeline,
+                              end_day: Optional[int],
+                              trace=NULL_TRACE) -> Optional[Dict]:
+        """
+        Check if patient matches disease pattern.
+        end_day is the visit's day ordinal (None = no time window).
+        """
+        started = time.perf_counter() if trace.enabled else 0
+        
+        # Matched symptom -> its days inside the disease's time window
+        matched_days = {}
+        visit_days = set()
         
         # Check each symptom
-        for symptom in required_symptoms:
-            if symptom in symptom_tracking:
-                occurrences = self._filter_by_time_window(
-                    symptom_tracking[symptom], visit_date, time_window
-                )
-                
-                if occurrences:
-                    matched_symptoms.append(symptom)
-                    for occ in occurrences:
-                        visit_dates.add(occ['date'])
-                        symptom_timeline.append({
-                            'symptom': symptom,
-                            'date': occ['date']
-                        })
+        for symptom in disease.symptoms:
+            days = timeline.window(symptom, end_day, disease.time_window)
+            if days:
+                matched_days[symptom] = days
+                visit_days.update(days)
+        
+        matched_symptoms = list(matched_days)
+        
+        if trace.enabled:
+            windowed = time.perf_counter()
+            trace.add_time('windows', windowed - started)
+            started = windowed
         
         # Check minimum requirements
-        if len(matched_symptoms) < min_matches:
+        if len(matched_symptoms) < disease.min_matches:
+            if trace.enabled:
+                trace.reject(disease.disease_id,
+                             f"{len(matched_symptoms)} of {disease.min_matches} required "
+                             f"symptoms in the {disease.time_window}-day window")
             return None
         
-        visit_count = len(visit_dates)
-        if visit_count < min_visits:
-            logger.debug(f"{config['name']}: Only {visit_count} visits, need {min_visits}")
+        visit_count = len(visit_days)
+        if visit_count < disease.min_visits:
+            logger.debug("%s: Only %s visits, need %s",
+                         disease.name, visit_count, disease.min_visits)
+            if trace.enabled:
+                trace.reject(disease.disease_id,
+                             f"{visit_count} visit day(s), needs {disease.min_visits}")
             return None
         
         # Calculate timespan
-        if visit_dates:
-            sorted_dates = sorted(visit_dates)
-            first_date = datetime.fromisoformat(sorted_dates[0])
-            last_date = datetime.fromisoformat(sorted_dates[-1])
-            days_span = (last_date - first_date).days
-            
-            if days_span < min_timespan:
-                logger.debug(f"{config['name']}: Span {days_span} days, need {min_timespan}")
-                return None
-        else:
+        if not visit_days:
+            trace.reject(disease.disease_id, "no visit days in window")
+            return None
+        
+        days_span = max(visit_days) - min(visit_days)
+        if days_span < disease.min_timespan:
+            logger.debug("%s: Span %s days, need %s",
+                         disease.name, days_span, disease.min_timespan)
+            if trace.enabled:
+                trace.reject(disease.disease_id,
+                             f"span {days_span} day(s), needs {disease.min_timespan}")
             return None
         
         # Calculate confidence
         confidence = self._calculate_confidence(
-            matched_symptoms, list(required_symptoms),
-            visit_count, days_span, config
+            config.symptom_scores, matched_symptoms, disease.symptom_count,
+            visit_count, days_span, disease.boost_symptoms
+        )
+        
+        alert = self._build_alert(config, disease, matched_days, visit_count, days_span,
+                                  confidence)
+        if trace.enabled:
+            trace.add_time('scoring', time.perf_counter() - started)
+        return alert
+    
+    def _build_alert(self, config: _EngineConfig, disease: CompiledDisease,
+                     matched_days: Dict[str, List[int]],
+                     visit_count: int, days_span: int, confidence: float) -> Dict:
+        """Alert dict for a matched pattern; matched_days keeps config symptom order"""
+        matched_symptoms = list(matched_days)
+        
+        # Stable sort by day keeps symptom order within a day
+        symptom_timeline = sorted(
+            ((day, symptom) for symptom, days in matched_days.items() for day in days),
+            key=lambda entry: entry[0]
         )
         
         # Determine severity
-        severity = self._determine_severity(confidence, matched_symptoms)
+        severity = self._determine_severity(config.symptom_scores, confidence, matched_symptoms)
         
         # Create alert
         return {
-            'disease_id': disease_id,
-            'disease': config['name'],
+            'disease_id': disease.disease_id,
+            'disease': disease.name,
             'confidence': confidence,
             'matched_symptoms': matched_symptoms,
             'matched_count': len(matched_symptoms),
-            'required_count': min_matches,
+            'required_count': disease.min_matches,
             'visit_count': visit_count,
             'days_span': days_span,
             'severity': severity,
-            'timeline': sorted(symptom_timeline, key=lambda x: x['date']),
-            'suggested_tests': config.get('suggested_tests', config.get('diagnostic_tests', [])),
-            'specialists': config.get('specialists', [config.get('specialist', 'Specialist')]),
-            'icd_code': config.get('icd_code', config.get('icd10', '')),
+            'timeline': [
+                {'symptom': symptom, 'date': day_string(day)}
+                for day, symptom in symptom_timeline
+            ],
+            'suggested_tests': thaw(disease.suggested_tests),
+            'specialists': thaw(disease.specialists),
+            'icd_code': disease.icd_code,
             'message': self._generate_alert_message(
-                config['name'], matched_symptoms, visit_count, days_span, confidence
+                disease.name, matched_symptoms, visit_count, days_span, confidence
             )
         }
     
-    def _filter_by_time_window(self, occurrences: List[Dict], 
-                              visit_date: str, window_days: int) -> List[Dict]:
-        """Filter symptom occurrences by time window"""
-        if not visit_date:
-            return occurrences
-        
-        recent = []
-        current_date = datetime.fromisoformat(visit_date.split('T')[0])
-        
-        for occ in occurrences:
-            try:
-                symptom_date = datetime.fromisoformat(occ['date'])
-                days_diff = (current_date - symptom_date).days
-                if 0 <= days_diff <= window_days:
-                    recent.append(occ)
-            except:
-                continue
-        
-        return recent
-    
-    def _calculate_confidence(self, matched_symptoms: List[str],
-                            required_symptoms: List[str],
+    def _calculate_confidence(self, symptom_scores: Dict, matched_symptoms: List[str],
+                            required_count: int,
                             visit_count: int, days_span: int,
-                            config: Dict) -> float:
+                            boost_symptoms: Tuple[str, ...] = ()) -> float:
         """
         Multi-factor confidence calculation
         """
         # Base: symptom match ratio (max 0.5)
-        match_ratio = len(matched_symptoms) / len(required_symptoms) if required_symptoms else 0
+        match_ratio = len(matched_symptoms) / required_count if required_count else 0
         base_confidence = match_ratio * 0.5
         
         # Visit spread bonus (max 0.2)
@@ -215,7 +555,7 @@ class DiseaseDetectionEngine:
         
         # Symptom rarity bonus (max 0.1)
         rarity_scores = [
-            self.symptom_scores.get(s, {}).get('rarity_score', 0.3)
+            symptom_scores.get(s, {}).get('rarity_score', 0.3)
             for s in matched_symptoms
         ]
         avg_rarity = sum(rarity_scores) / len(rarity_scores) if rarity_scores else 0.3
@@ -223,10 +563,9 @@ class DiseaseDetectionEngine:
         
         # High-confidence symptom bonus
         high_conf_bonus = 0
-        if config.get('confidence_boost_symptoms'):
-            for symptom in config['confidence_boost_symptoms']:
-                if symptom.lower() in matched_symptoms:
-                    high_conf_bonus += 0.05
+        for symptom in boost_symptoms:
+            if symptom in matched_symptoms:
+                high_conf_bonus += 0.05
         
         # Total confidence
         confidence = (base_confidence + visit_bonus + time_bonus + 
@@ -234,12 +573,12 @@ class DiseaseDetectionEngine:
         
         return min(confidence, 0.95)
     
-    def _determine_severity(self, confidence: float, 
+    def _determine_severity(self, symptom_scores: Dict, confidence: float,
                            matched_symptoms: List[str]) -> str:
         """Determine alert severity level"""
         # Get average symptom severity
         severity_scores = [
-            self.symptom_scores.get(s, {}).get('rarity_score', 0.3)
+            symptom_scores.get(s, {}).get('rarity_score', 0.3)
             for s in matched_symptoms
         ]
         avg_severity = sum(severity_scores) / len(severity_scores) if severity_scores else 0.3
@@ -268,46 +607,21 @@ class DiseaseDetectionEngine:
     def _load_disease_config(self, path: str) -> Dict:
         """Load disease configuration - FIXED to handle both formats"""
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-                # Handle different possible formats
-                if isinstance(data, dict):
-                    if 'diseases' in data:
-                        diseases = data['diseases']
-                        # If diseases is a list, convert to dict
-                        if isinstance(diseases, list):
-                            diseases_dict = {}
-                            for disease in diseases:
-                                if isinstance(disease, dict) and 'name' in disease:
-                                    key = disease['name'].lower().replace(' ', '_').replace("'", "")
-                                    diseases_dict[key] = disease
-                            return diseases_dict
-                        else:
-                            return diseases
-                    else:
-                        # Direct dict format
-                        return data
-                elif isinstance(data, list):
-                    # Direct list format - convert to dict
-                    diseases_dict = {}
-                    for disease in data:
-                        if isinstance(disease, dict) and 'name' in disease:
-                            key = disease['name'].lower().replace(' ', '_').replace("'", "")
-                            diseases_dict[key] = disease
-                    return diseases_dict
-                else:
-                    return {}
-                    
+            data = config_registry.get_file(path)
+            if data is None:
+                raise FileNotFoundError(path)
+            
+            # Handles {'diseases': {...}}, {'diseases': [...]}, bare dict or list
+            return normalize_diseases(data)
+            
         except Exception as e:
             logger.error(f"Failed to load disease config: {e}")
             return {}
     
     def _load_symptom_scores(self, path: str) -> Dict:
         """Load symptom severity scores"""
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            logger.error(f"Failed to load symptom scores: {e}")
-            return {}
\ No newline at end of file
+        scores = config_registry.get_file(path)
+        if scores is None:
+            logger.error(f"Failed to load symptom scores: {path}")
+            return {}
+        return scores
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""
+Compiled Disease Matrix
+Turns the disease config into an immutable table that detection can scan
+with set intersections instead of re-parsing each disease per visit
+"""
+
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def disease_key(name: str) -> str:
+    """Key used when a config lists diseases instead of mapping them"""
+    return name.lower().replace(' ', '_').replace("'", "")
+
+
+def normalize_diseases(data) -> Dict:
+    """
+    Disease mapping from any supported config shape:
+    {'diseases': {...}}, {'diseases': [...]}, a bare mapping or a bare list
+    """
+    if isinstance(data, dict) and 'diseases' in data:
+        data = data['diseases']
+
+    if isinstance(data, list):
+        return {
+            disease_key(disease['name']): disease
+            for disease in data
+            if isinstance(disease, dict) and 'name' in disease
+        }
+
+    return data if isinstance(data, dict) else {}
+
+
+def flatten_symptoms(symptoms) -> Tuple[str, ...]:
+    """Lowercase, de-duplicated symptoms in config order (categories flattened)"""
+    if isinstance(symptoms, dict):
+        groups = [group for group in symptoms.values() if isinstance(group, list)]
+    elif isinstance(symptoms, list):
+        groups = [symptoms]
+    else:
+        groups = []
+
+    return tuple(dict.fromkeys(
+        symptom.lower() for group in groups for symptom in group if isinstance(symptom, str)
+    ))
+
+
+class CompiledDisease:
+    """One disease with its symptoms and thresholds resolved up front"""
+
+    __slots__ = (
+        'disease_id', 'name', 'symptoms', 'symptom_ids', 'symptom_count',
+        'min_matches', 'time_window', 'min_visits', 'min_timespan',
+        'boost_symptoms', 'suggested_tests', 'specialists', 'icd_code'
+    )
+
+    def __init__(self, disease_id: str, config: Dict, vocabulary: Dict[str, int]):
+        self.disease_id = disease_id
+        self.name = config.get('name', disease_id)
+        self.symptoms = flatten_symptoms(config.get('symptoms'))
+        self.symptom_ids: FrozenSet[int] = frozenset(
+            vocabulary.setdefault(symptom, len(vocabulary)) for symptom in self.symptoms
+        )
+        self.symptom_count = len(self.symptoms)
+
+        self.min_matches = config.get('min_matches', config.get('min_symptoms', 3))
+        self.time_window = config.get('time_window_days', 365)
+        self.min_visits = config.get('min_visits_required', 2)
+        self.min_timespan = config.get('min_timespan_days', 7)
+
+        # Kept as a tuple: a symptom listed twice boosts twice, as before
+        self.boost_symptoms = tuple(
+            symptom.lower() for symptom in config.get('confidence_boost_symptoms') or []
+        )
+        self.suggested_tests = config.get('suggested_tests', config.get('diagnostic_tests', []))
+        self.specialists = config.get('specialists', [config.get('specialist', 'Specialist')])
+        self.icd_code = config.get('icd_code', config.get('icd10', ''))
+
+
+class DiseaseMatrix:
+    """
+    Immutable table of compiled diseases sharing one symptom vocabulary.
+    Build once per config version; per-visit detection only maps the
+    patient's tracked symptoms to IDs and walks their postings, so the
+    cost scales with the patient's symptoms rather than the catalogue.
+    """
+
+    def __init__(self, diseases: Dict):
+        vocabulary: Dict[str, int] = {}
+        compiled = []
+
+        for disease_id, config in normalize_diseases(diseases).items():
+            if not isinstance(config, dict):
+                logger.warning(f"Skipping malformed disease config: {disease_id}")
+                continue
+            compiled.append(CompiledDisease(disease_id, config, vocabulary))
+
+        self.diseases: Tuple[CompiledDisease, ...] = tuple(compiled)
+        self.vocabulary: Dict[str, int] = vocabulary
+
+        # Inverted index: symptom ID -> positions of diseases listing it
+        postings: Dict[int, List[int]] = {}
+        for position, disease in enumerate(compiled):
+            for symptom_id in disease.symptom_ids:
+                postings.setdefault(symptom_id, []).append(position)
+        self.postings: Dict[int, Tuple[int, ...]] = {
+            symptom_id: tuple(positions) for symptom_id, positions in postings.items()
+        }
+
+        # Days further back than this from the visit fall outside every window
+        self.max_window = max((disease.time_window for disease in compiled), default=0)
+
+        # min_matches <= 0 needs no overlap, so these are always candidates
+        self._unconditional = tuple(
+            position for position, disease in enumerate(compiled) if disease.min_matches <= 0
+        )
+
+    def __len__(self) -> int:
+        return len(self.diseases)
+
+    def symptom_ids(self, symptoms: Iterable[str]) -> FrozenSet[int]:
+        """IDs of the given symptoms that appear in any disease"""
+        vocabulary = self.vocabulary
+        return frozenset(vocabulary[s] for s in symptoms if s in vocabulary)
+
+    def overlap(self, symptom_ids: FrozenSet[int]) -> Counter:
+        """Position -> how many of the given symptoms that disease lists"""
+        overlap = Counter(self._unconditional)
+        for symptom_id in symptom_ids:
+            overlap.update(self.postings.get(symptom_id, ()))
+        return overlap
+
+    def candidates(self, symptom_ids: FrozenSet[int]) -> List[CompiledDisease]:
+        """Diseases whose symptom overlap could still reach min_matches, in config order"""
+        return [self.diseases[position] for position in self.candidate_positions(symptom_ids)]
+
+    def candidate_positions(self, symptom_ids: FrozenSet[int]) -> List[int]:
+        """Positions of the diseases candidates() returns"""
+        overlap = self.overlap(symptom_ids)
+        diseases = self.diseases
+        return [
+            position for position in sorted(overlap)
+            if overlap[position] >= diseases[position].min_matches
+        ]
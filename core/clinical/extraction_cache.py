@@ -0,0 +1,146 @@
+"""
+Extraction Cache
+Content-addressed cache of symptom extraction results, keyed on a hash of
+the text and the analyzer's vocabulary version, optionally backed by SQLite
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import logging
+
+from core.clinical.memo import BoundedMemo
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS extraction_cache (
+    key BLOB PRIMARY KEY,
+    symptoms TEXT NOT NULL
+);
+"""
+
+
+class ExtractionCache:
+    """
+    Extraction results by content.
+    Entries are keyed on (kind, version, blake2b of the text), so a text is
+    never stored, only its digest, and a vocabulary change simply stops
+    matching the old entries. Values are tuples of symptoms. The memory tier
+    is an LRU of maxsize entries; with a path, misses fall through to a
+    SQLite file that outlives the process and is shared between processes.
+    """
+
+    def __init__(self, maxsize: int = 8192, path: Optional[str] = None):
+        self._memory = BoundedMemo(maxsize)
+        self.path = Path(path) if path else None
+        self._local = threading.local()
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self.disk_errors = 0
+
+        if self.path is not None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                conn = self._connect()
+                conn.executescript(_SCHEMA)
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Symptom cache at {self.path} unavailable, memory only: {e}")
+                self.path = None
+
+    @staticmethod
+    def key(kind: str, version: str, text: str) -> bytes:
+        """Digest identifying one text's result under one vocabulary version"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{kind}:{version}:".encode())
+        digest.update(text.encode('utf-8', 'surrogatepass'))
+        return digest.digest()
+
+    def get(self, key: bytes) -> Optional[Tuple[str, ...]]:
+        """Cached symptoms, or None on a miss in every tier"""
+        value = self._memory.get(key)
+        if value is not None or self.path is None:
+            return value
+
+        try:
+            row = self._connect().execute(
+                "SELECT symptoms FROM extraction_cache WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self.disk_errors += 1
+            logger.warning(f"Symptom cache read failed: {e}")
+            return None
+
+        if row is None:
+            self.disk_misses += 1
+            return None
+
+        self.disk_hits += 1
+        value = tuple(json.loads(row[0]))
+        self._memory.put(key, value)
+        return value
+
+    def put(self, key: bytes, symptoms):
+        """Store a result in memory and, if persistent, on disk"""
+        value = tuple(symptoms)
+        self._memory.put(key, value)
+        if self.path is None:
+            return
+
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO extraction_cache (key, symptoms) VALUES (?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False))
+                )
+        except sqlite3.Error as e:
+            self.disk_errors += 1
+            logger.warning(f"Symptom cache write failed: {e}")
+
+    def clear(self):
+        """Drop every entry, on disk too, and reset counters"""
+        self._memory.clear()
+        self.disk_hits = self.disk_misses = self.disk_errors = 0
+        if self.path is not None:
+            try:
+                conn = self._connect()
+                with conn:
+                    conn.execute("DELETE FROM extraction_cache")
+            except sqlite3.Error as e:
+                logger.warning(f"Could not clear symptom cache: {e}")
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for monitoring"""
+        stats = self._memory.stats()
+        if self.path is not None:
+            stats.update({
+                'path': str(self.path),
+                'disk_hits': self.disk_hits,
+                'disk_misses': self.disk_misses,
+                'disk_errors': self.disk_errors
+            })
+        return stats
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the connection for the current thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+# Shared by every SymptomAnalyzer in the process. EMR_SYMPTOM_CACHE_PATH
+# (e.g. data/cache/symptoms.db) adds the persistent tier.
+symptom_cache = ExtractionCache(
+    maxsize=int(os.getenv("EMR_SYMPTOM_CACHE_SIZE", "8192")),
+    path=os.getenv("EMR_SYMPTOM_CACHE_PATH") or None
+)
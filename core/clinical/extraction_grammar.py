@@ -0,0 +1,79 @@
+"""
+Extraction Grammar
+Finds the symptom lists that follow trigger phrases ("c/o", "presents with",
+"complains of", ...) in one scan of a clinical note
+"""
+
+import re
+from typing import Iterator, List, Tuple
+
+# (trigger, words that end its list besides the end of the sentence)
+EXTRACTION_RULES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    (r'complains? of', ('with',)),
+    (r'presents? with', ()),
+    (r'reports?', ()),
+    (r'experiencing', ('for',)),
+    (r'has (?:been having|had)', ('for',)),
+    (r'suffering from', ()),
+    (r'symptoms? (?:include|are|:)', ()),
+    (r'chief complaints?(?:\s+is|\s+are|:)', ()),
+    (r'c/o', ()),  # Common medical abbreviation
+)
+
+# Where every list ends
+_SENTENCE_END = r'[.;\n]'
+
+# Between list items
+_SEPARATOR = re.compile(r',|\band\b')
+
+# Where an item's symptom ends and its timing or context begins:
+# "vomiting since morning", "fever x 3 days", "pain without fever"
+_QUALIFIER = re.compile(
+    r'\b(?:since|for|ago|x|until|till|before|after|during|over|lasting|'
+    r'starting|started|began|today|yesterday|tonight|this|last|past|'
+    r'with|without)\b|\d'
+)
+
+
+class ExtractionGrammar:
+    """
+    All triggers are alternatives of one compiled pattern, so the note is
+    scanned once however many rules there are; each rule then has its own
+    compiled pattern for where its list stops. Stop words and separators
+    only match whole words, so "hand pain" stays intact. Each item is cut
+    at its first qualifier, so "vomiting since morning" is tracked as
+    "vomiting" and lines up with the vocabulary.
+    """
+
+    def __init__(self, rules=EXTRACTION_RULES):
+        self.rules = tuple(rules)
+        self._triggers = re.compile(
+            # One group per rule: lastindex says which trigger matched.
+            # (?<!\w) rather than \b keeps sre's first-character prefilter
+            r'(?<!\w)(?:' + '|'.join(f'({trigger})' for trigger, _ in self.rules) + r')'
+            r'[^\S\n]+'
+        )
+        self._ends = [
+            re.compile(_SENTENCE_END + ''.join(f'|\\b{re.escape(word)}\\b' for word in stops))
+            for _, stops in self.rules
+        ]
+
+    def clauses(self, text: str) -> Iterator[str]:
+        """Text after each trigger up to its list's end, lowercased input expected"""
+        for match in self._triggers.finditer(text):
+            start = match.end()
+            end = self._ends[match.lastindex - 1].search(text, start)
+            yield text[start:end.start() if end else len(text)]
+
+    def items(self, text: str) -> List[str]:
+        """Every list item found in text, cut at qualifiers, empty ones dropped"""
+        items = []
+        for clause in self.clauses(text):
+            for part in _SEPARATOR.split(clause):
+                part = _QUALIFIER.split(part, 1)[0].strip()
+                if part:
+                    items.append(part)
+        return items
+
+
+DEFAULT_GRAMMAR = ExtractionGrammar()
@@ -3,9 +3,11 @@ Intelligent Filter for Disease Detection
 Filters out common conditions before flagging rare diseases
 """
 
-from typing import List, Dict, Tuple, Set
+from typing import List, Dict, Tuple, Set, Optional
 import logging
 
+from core.clinical.memo import BoundedMemo
+
 logger = logging.getLogger(__name__)
 
 
@@ -13,9 +15,14 @@ class IntelligentFilter:
     """
     Filters rare disease alerts by ruling out common conditions first.
     Prevents false positives from everyday illnesses.
+    
+    Decisions depend only on the symptom set, age_bucket() and the base
+    confidence, so they are memoized on exactly that.
     """
     
     def __init__(self):
+        self._decisions = BoundedMemo(maxsize=4096)
+        
         # Common conditions that can mimic rare diseases
         self.common_conditions = {
             "viral_fever": {
@@ -105,6 +112,14 @@ class IntelligentFilter:
         symptoms_lower = [s.lower().strip() for s in symptoms if s]
         symptoms_set = set(symptoms_lower)
         
+        age_bucket = self.age_bucket(patient_data)
+        key = (frozenset(symptoms_set), age_bucket, base_confidence)
+        if age_bucket is not None:
+            decision = self._decisions.get(key)
+            if decision is not None:
+                should_alert, adjusted_confidence, ruled_out = decision
+                return should_alert, adjusted_confidence, list(ruled_out)
+        
         # Find common conditions that could explain symptoms
         possible_conditions = self._find_matching_conditions(symptoms_set)
         
@@ -152,13 +167,25 @@ class IntelligentFilter:
         # Get condition names
         ruled_out = [c['name'] for c in possible_conditions[:3]]
         
-        logger.info(f"Filter decision: symptoms={symptoms}, "
-                   f"ruled_out={ruled_out}, "
-                   f"confidence={base_confidence:.2f}->{adjusted_confidence:.2f}, "
-                   f"alert={should_alert}")
+        logger.info("Filter decision: symptoms=%s, ruled_out=%s, confidence=%.2f->%.2f, alert=%s",
+                    symptoms, ruled_out, base_confidence, adjusted_confidence, should_alert)
         
+        if age_bucket is not None:
+            self._decisions.put(key, (should_alert, adjusted_confidence, tuple(ruled_out)))
         return should_alert, adjusted_confidence, ruled_out
     
+    @staticmethod
+    def age_bucket(patient_data: Dict) -> Optional[bool]:
+        """The only age distinction should_alert makes (under 5); None if age isn't numeric"""
+        age = patient_data.get('age', 30)
+        if isinstance(age, bool) or not isinstance(age, (int, float)):
+            return None
+        return age < 5
+    
+    def stats(self) -> Dict:
+        """Decision memo hit/miss counters"""
+        return self._decisions.stats()
+    
     def _find_matching_conditions(self, symptoms_set: Set[str]) -> List[Dict]:
         """Find common conditions that match the symptoms"""
         matches = []
@@ -4,16 +4,60 @@ Extracts and normalizes symptoms from clinical text
 """
 
 import re
-from typing import List, Set, Dict
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Set, Dict, Tuple
 import logging
 
+from data.db.config_registry import config_registry
+from core.clinical.disease_catalogue import current_catalogue
+from core.clinical.extraction_cache import ExtractionCache, symptom_cache
+from core.clinical.extraction_grammar import DEFAULT_GRAMMAR
+from core.clinical.symptom_matcher import SymptomMatcher
+
 logger = logging.getLogger(__name__)
 
+# Bump when extraction logic changes so cached results stop matching
+EXTRACTION_VERSION = 4
+
+# Sentences are extracted on their own: no grammar clause or vocabulary
+# phrase runs past a '.' or ';'
+SENTENCE_END = re.compile(r'(?<=[.;])')
+
+# Words for redundancy checks: 'pain' is inside 'chest pain', not 'painful'
+WORD = re.compile(r"\w+")
+
+# Qualifiers stripped from extracted symptoms
+REMOVE_WORDS = frozenset({
+    'symptoms', 'symptom', 'complains', 'complaint',
+    'presents', 'reports', 'states', 'denies',
+    'bilateral', 'left', 'right', 'mild', 'moderate', 'severe',
+    'acute', 'chronic', 'intermittent', 'persistent'
+})
+
+# Extracted text containing these is not a symptom
+EXCLUDE_TERMS = (
+    'patient', 'history', 'examination', 'treatment',
+    'medication', 'allergy', 'surgery', 'procedure'
+)
+
+# List items made only of these are the tail of a location, not a symptom:
+# 'feet' in "tingling in hands and feet"
+BODY_PARTS = frozenset({
+    'both', 'the', 'head', 'face', 'eye', 'eyes', 'ear', 'ears', 'nose',
+    'mouth', 'lips', 'tongue', 'throat', 'neck', 'shoulder', 'shoulders',
+    'arm', 'arms', 'elbow', 'elbows', 'wrist', 'wrists', 'hand', 'hands',
+    'finger', 'fingers', 'chest', 'back', 'abdomen', 'hip', 'hips',
+    'leg', 'legs', 'knee', 'knees', 'ankle', 'ankles', 'foot', 'feet',
+    'toe', 'toes', 'limb', 'limbs', 'joints', 'skin'
+})
+
 
 class SymptomAnalyzer:
     """Analyzes clinical text to extract symptoms"""
     
-    def __init__(self):
+    def __init__(self, cache: Optional[ExtractionCache] = None):
         # Common symptom keywords
         self.symptom_keywords = {
             # General
@@ -57,18 +101,26 @@ class SymptomAnalyzer:
             'ear pain', 'eye pain', 'photophobia'
         }
         
-        # Symptom patterns for extraction
-        self.extraction_patterns = [
-            r'complains? of (.+?)(?:\.|,|and|with)',
-            r'presents? with (.+?)(?:\.|,|and)',
-            r'reports? (.+?)(?:\.|,|and)',
-            r'experiencing (.+?)(?:\.|,|and|for)',
-            r'has (?:been having|had) (.+?)(?:\.|,|and|for)',
-            r'suffering from (.+?)(?:\.|,|and)',
-            r'symptoms? (?:include|are|:) (.+?)(?:\.|,|and)',
-            r'chief complaint[s]?(?:\s+is|\s+are|:) (.+?)(?:\.|,|and)',
-            r'c/o (.+?)(?:\.|,|and)',  # Common medical abbreviation
+        # Multi-word phrases; their component words are not reported on their own
+        self.multi_word_symptoms = [
+            'shortness of breath', 'chest pain', 'abdominal pain',
+            'difficulty speaking', 'difficulty swallowing', 'loss of appetite',
+            'weight loss', 'weight gain', 'night sweats', 'memory loss',
+            'irregular heartbeat', 'blurred vision', 'vision loss',
+            'hearing loss', 'joint pain', 'muscle pain', 'back pain'
         ]
+        
+        # Built on first use, rebuilt when the catalogue or scores change
+        self._matcher = None
+        self._matcher_sources = None
+        self._vocabulary_version = None
+        self._added_phrases = frozenset()
+        
+        # Trigger phrases and the symptom lists after them
+        self.extraction_grammar = DEFAULT_GRAMMAR
+        
+        # Results by text content; shared process-wide unless given one
+        self.cache = cache if cache is not None else symptom_cache
     
     def extract_symptoms(self, text: str) -> List[str]:
         """
@@ -78,50 +130,125 @@ class SymptomAnalyzer:
             return []
         
         text_lower = text.lower()
+        matcher = self.matcher
+        version = self._vocabulary_version
+        added_phrases = self._added_phrases
+        
+        # Identical text skips extraction entirely
+        text_key = self.cache.key('text', version, text_lower)
+        cached = self.cache.get(text_key)
+        if cached is not None:
+            return list(cached)
+        
+        # Restated text (a summary repeating the complaint) reuses the
+        # cached results of the sentences it shares
         symptoms = set()
+        for sentence in SENTENCE_END.split(text_lower):
+            sentence = sentence.strip()
+            if sentence:
+                symptoms.update(self._sentence_symptoms(sentence, matcher, version))
         
-        # Method 1: Pattern-based extraction
-        for pattern in self.extraction_patterns:
-            matches = re.findall(pattern, text_lower, re.IGNORECASE)
-            for match in matches:
-                # Split by commas and 'and'
-                parts = re.split(r',|and', match)
-                for part in parts:
-                    symptom = self._clean_symptom(part)
-                    if self._is_valid_symptom(symptom):
-                        symptoms.add(symptom)
-        
-        # Method 2: Keyword matching
-        for keyword in self.symptom_keywords:
-            # Look for the keyword with word boundaries
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            if re.search(pattern, text_lower):
-                symptoms.add(keyword)
-        
-        # Method 3: Multi-word symptom phrases
-        multi_word_symptoms = [
-            'shortness of breath', 'chest pain', 'abdominal pain',
-            'difficulty speaking', 'difficulty swallowing', 'loss of appetite',
-            'weight loss', 'weight gain', 'night sweats', 'memory loss',
-            'irregular heartbeat', 'blurred vision', 'vision loss',
-            'hearing loss', 'joint pain', 'muscle pain', 'back pain'
-        ]
+        # Remove redundant symptoms
+        symptom_list = self._remove_redundant_symptoms(list(symptoms), added_phrases)
+        self.cache.put(text_key, symptom_list)
+        
+        logger.debug("Extracted %d symptoms from text", len(symptom_list))
+        return symptom_list
+    
+    def _sentence_symptoms(self, sentence: str, matcher: SymptomMatcher,
+                           version: str) -> Tuple[str, ...]:
+        """Symptoms in one lowercased sentence, before redundancy pruning"""
+        key = self.cache.key('sentence', version, sentence)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        symptoms = set()
         
-        for symptom in multi_word_symptoms:
-            if symptom in text_lower:
+        # Method 1: Vocabulary matching, one pass for all known phrases.
+        # Nested phrases count too: "severe abdominal pain" must still give
+        # 'abdominal pain' to diseases that list only that.
+        symptoms.update(matcher.find(sentence, nested=True))
+        
+        # Method 2: Lists after trigger phrases ("c/o", "presents with", ...).
+        # Items are free text and kept whole: "pain in abdomen" says more
+        # than the 'pain' inside it.
+        for item in self.extraction_grammar.items(sentence):
+            symptom = self._clean_symptom(item)
+            if self._is_valid_symptom(symptom):
                 symptoms.add(symptom)
-                # Remove individual words if multi-word symptom found
-                for word in symptom.split():
-                    symptoms.discard(word)
         
-        # Convert to list and remove duplicates
-        symptom_list = list(symptoms)
+        result = tuple(sorted(symptoms))
+        self.cache.put(key, result)
+        return result
+    
+    def extract_symptoms_batch(self, texts: Iterable[str], workers: int = 1,
+                               chunk_size: int = 200) -> List[List[str]]:
+        """
+        extract_symptoms for many texts, results in input order.
+        With workers > 1 chunks are spread over a process pool; each worker
+        builds its own default SymptomAnalyzer once.
+        """
+        texts = list(texts)
+        if workers <= 1 or len(texts) <= chunk_size:
+            return [self.extract_symptoms(text) for text in texts]
         
-        # Remove redundant symptoms
-        symptom_list = self._remove_redundant_symptoms(symptom_list)
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        results = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            for chunk_results in pool.map(_extract_chunk, chunks):
+                results.extend(chunk_results)
+        return results
+    
+    @property
+    def matcher(self) -> SymptomMatcher:
+        """Matcher over the keywords, catalogue symptoms and scored symptoms"""
+        catalogue = current_catalogue()
+        scores = config_registry.get('symptom_severity_scores')
+        sources = (catalogue, scores)
         
-        logger.debug(f"Extracted {len(symptom_list)} symptoms from text")
-        return symptom_list
+        if self._matcher is None or any(
+            a is not b for a, b in zip(sources, self._matcher_sources)
+        ):
+            vocabulary = set(self.symptom_keywords)
+            vocabulary.update(self.multi_word_symptoms)
+            own_phrases = {' '.join(phrase.lower().split()) for phrase in vocabulary}
+            vocabulary.update(catalogue.matrix.vocabulary)
+            if isinstance(scores, dict):
+                # Skip metadata keys such as 'description' and 'scoring_guide'
+                vocabulary.update(
+                    name for name, entry in scores.items()
+                    if isinstance(entry, dict) and 'rarity_score' in entry
+                )
+            self._matcher = SymptomMatcher(vocabulary)
+            self._added_phrases = frozenset(self._matcher.phrases - own_phrases)
+            self._matcher_sources = sources
+            self._vocabulary_version = self._version_of(self._matcher)
+            logger.debug("Built symptom matcher with %d phrases", len(self._matcher))
+        
+        return self._matcher
+    
+    @property
+    def vocabulary_version(self) -> str:
+        """Changes whenever extraction could give a different result"""
+        self.matcher  # rebuilds, with a new version, if the sources changed
+        return self._vocabulary_version
+    
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters of the extraction cache"""
+        return self.cache.stats()
+    
+    def _version_of(self, matcher: SymptomMatcher) -> str:
+        digest = hashlib.sha1()
+        digest.update(json.dumps([
+            EXTRACTION_VERSION,
+            sorted(matcher.phrases),
+            self.extraction_grammar.rules,
+            sorted(REMOVE_WORDS),
+            EXCLUDE_TERMS,
+            sorted(BODY_PARTS)
+        ]).encode())
+        return digest.hexdigest()[:16]
     
     def _clean_symptom(self, symptom: str) -> str:
         """Clean and normalize a symptom string"""
@@ -129,15 +256,8 @@ class SymptomAnalyzer:
         symptom = ' '.join(symptom.split())
         
         # Remove common medical words
-        remove_words = [
-            'symptoms', 'symptom', 'complains', 'complaint',
-            'presents', 'reports', 'states', 'denies',
-            'bilateral', 'left', 'right', 'mild', 'moderate', 'severe',
-            'acute', 'chronic', 'intermittent', 'persistent'
-        ]
-        
         words = symptom.split()
-        words = [w for w in words if w not in remove_words]
+        words = [w for w in words if w not in REMOVE_WORDS]
         
         return ' '.join(words).strip()
     
@@ -155,33 +275,38 @@ class SymptomAnalyzer:
             return False
         
         # Exclude common non-symptoms
-        exclude_terms = [
-            'patient', 'history', 'examination', 'treatment',
-            'medication', 'allergy', 'surgery', 'procedure'
-        ]
+        if any(term in symptom for term in EXCLUDE_TERMS):
+            return False
         
-        if any(term in symptom for term in exclude_terms):
+        # Exclude a bare body part split off a location ("... and feet")
+        if all(word in BODY_PARTS for word in symptom.split()):
             return False
         
         return True
     
-    def _remove_redundant_symptoms(self, symptoms: List[str]) -> List[str]:
-        """Remove redundant symptoms (e.g., 'pain' when 'chest pain' exists)"""
-        filtered = []
-        
-        for symptom in symptoms:
-            is_redundant = False
-            
-            # Check if this symptom is part of another symptom
-            for other in symptoms:
-                if symptom != other and symptom in other:
-                    is_redundant = True
-                    break
-            
-            if not is_redundant:
-                filtered.append(symptom)
+    def _remove_redundant_symptoms(self, symptoms: List[str],
+                                   keep_nested: Iterable[str] = ()) -> List[str]:
+        """
+        Remove redundant symptoms (e.g., 'pain' when 'chest pain' exists).
+        Symptoms in keep_nested (catalogue and scored phrases beyond the
+        analyzer's own keywords) make nothing redundant: 'recurrent fever'
+        is reported alongside 'fever', not instead of it.
+        """
+        # Every run of whole words inside each symptom, short of the symptom
+        # itself. A symptom is redundant if another one contains it this way,
+        # which only takes one hash lookup per symptom.
+        keep_nested = frozenset(keep_nested)
+        contained = set()
+        for symptom in set(symptoms):
+            if symptom.isalnum() or symptom in keep_nested:
+                continue  # A single word contains no shorter run of words
+            spans = [match.span() for match in WORD.finditer(symptom)]
+            for i, (start, _) in enumerate(spans):
+                for _, end in spans[i:]:
+                    if end - start < len(symptom):
+                        contained.add(symptom[start:end])
         
-        return filtered
+        return [symptom for symptom in symptoms if symptom not in contained]
     
     def categorize_symptoms(self, symptoms: List[str]) -> Dict[str, List[str]]:
         """Categorize symptoms by body system"""
@@ -226,4 +351,18 @@ class SymptomAnalyzer:
                 categories['general'].append(symptom)
         
         # Remove empty categories
-        return {k: v for k, v in categories.items() if v}
\ No newline at end of file
+        return {k: v for k, v in categories.items() if v}
+
+
+# Analyzer of a worker process, built once by _init_worker
+_worker_analyzer = None
+
+
+def _init_worker():
+    global _worker_analyzer
+    _worker_analyzer = SymptomAnalyzer()
+
+
+def _extract_chunk(texts: List[str]) -> List[List[str]]:
+    """extract_symptoms over one chunk; runs in a worker process"""
+    return [_worker_analyzer.extract_symptoms(text) for text in texts]
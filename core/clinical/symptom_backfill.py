@@ -0,0 +1,265 @@
+"""
+Symptom Backfill
+Re-extracts symptoms from every stored visit's chief complaint and summary,
+e.g. after the symptom vocabulary grows, and rebuilds symptom tracking
+Patients are processed in a process pool; progress is checkpointed so runs resume
+
+Run from the repository root (best while the app is not writing visits):
+    python -m core.clinical.symptom_backfill --workers 8
+"""
+
+import os
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional
+import logging
+
+from core.clinical.symptom_analyzer import SymptomAnalyzer
+from core.visits.symptom_tracking import rebuild_symptom_tracking
+
+logger = logging.getLogger(__name__)
+
+# Visit fields sent to workers
+VISIT_FIELDS = ('visit_id', 'timestamp', 'chief_complaint', 'summary', 'extracted_symptoms')
+
+# Analyzer of a worker process, built once by _init_worker
+_analyzer = None
+
+
+def _init_worker():
+    global _analyzer
+    _analyzer = SymptomAnalyzer()
+
+
+def _backfill_chunk(payloads: List[Dict]) -> List[Dict]:
+    """Re-extract one chunk of patients; runs in a worker process"""
+    return [_backfill_patient(_analyzer, payload) for payload in payloads]
+
+
+def _backfill_patient(analyzer: SymptomAnalyzer, payload: Dict) -> Dict:
+    """Visits whose symptoms changed, plus the rebuilt tracking if any did"""
+    patient_id = payload['id']
+    try:
+        changed = {}
+        for visit in payload['visits']:
+            texts = [visit.get('chief_complaint'), visit.get('summary')]
+            if not any(texts):
+                continue  # Nothing to re-extract from; keep what is stored
+
+            symptoms = set()
+            for text in texts:
+                if text:
+                    symptoms.update(analyzer.extract_symptoms(text))
+
+            if symptoms != set(visit.get('extracted_symptoms') or []):
+                visit['extracted_symptoms'] = sorted(symptoms)
+                changed[visit['visit_id']] = visit['extracted_symptoms']
+
+        result = {'patient_id': patient_id, 'visits': len(payload['visits']), 'changed': changed}
+        if changed:
+            rebuild_symptom_tracking(payload)
+            result['symptom_tracking'] = payload['symptom_tracking']
+        return result
+
+    except Exception as e:
+        return {'patient_id': patient_id, 'visits': len(payload['visits']), 'error': str(e)}
+
+
+def _backfill_payload(patient_data: Dict) -> Optional[Dict]:
+    """Compact worker input: just the visit fields extraction and tracking read"""
+    visits = [
+        {key: visit[key] for key in VISIT_FIELDS if key in visit}
+        for visit in patient_data.get('visits') or []
+        if visit.get('visit_id') and visit.get('timestamp')
+    ]
+    if not visits:
+        return None
+    return {'id': patient_data['id'], 'visits': visits}
+
+
+class BackfillRun:
+    """
+    One backfill run on disk, under results_dir/{run_id}/:
+      run.json  run metadata (fingerprint, status, totals when complete)
+      done.txt  patient ids already written back, appended per chunk
+    """
+
+    def __init__(self, run_dir: Path):
+        self.run_dir = run_dir
+        self.meta_path = run_dir / "run.json"
+        self.done_path = run_dir / "done.txt"
+
+    @classmethod
+    def open(cls, results_dir: str, fingerprint: str, resume: bool) -> 'BackfillRun':
+        """Latest unfinished run for this vocabulary if resuming, else a new one"""
+        root = Path(results_dir)
+        root.mkdir(parents=True, exist_ok=True)
+
+        if resume:
+            for run_dir in sorted(root.iterdir(), reverse=True):
+                run = cls(run_dir)
+                meta = run.load_meta()
+                if meta.get('status') == 'running' and meta.get('fingerprint') == fingerprint:
+                    logger.info(f"Resuming symptom backfill {run_dir.name}")
+                    return run
+
+        run = cls(root / datetime.now().strftime("%Y%m%dT%H%M%S%f"))
+        run.run_dir.mkdir()
+        run.save_meta({
+            'fingerprint': fingerprint,
+            'status': 'running',
+            'started_at': datetime.now().isoformat()
+        })
+        return run
+
+    def load_meta(self) -> Dict:
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_meta(self, meta: Dict):
+        tmp_path = self.meta_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, self.meta_path)
+
+    def done_ids(self) -> set:
+        if not self.done_path.exists():
+            return set()
+        with open(self.done_path, 'r', encoding='utf-8') as f:
+            return {line.strip() for line in f if line.strip()}
+
+    def mark_done(self, patient_ids: List[str]):
+        with open(self.done_path, 'a', encoding='utf-8') as f:
+            f.write("".join(f"{patient_id}\n" for patient_id in patient_ids))
+
+
+def backfill_symptoms(data_adapter=None, results_dir: str = "data/backfill",
+                      workers: Optional[int] = None, chunk_size: int = 100,
+                      resume: bool = True, dry_run: bool = False,
+                      progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Re-extract symptoms for every stored visit and write back, per patient,
+    the visits whose extracted_symptoms changed together with the rebuilt
+    symptom_tracking in one update_visits call. A visit's symptoms are the
+    union of those in its chief complaint and its summary, as when it was
+    saved. progress(stats) is called after each chunk. Returns the stats.
+    """
+    if data_adapter is None:
+        from data.db.factory import create_adapter
+        data_adapter = create_adapter()
+
+    workers = workers or os.cpu_count() or 1
+    # A dry run writes nothing, not even a checkpoint
+    run = None if dry_run else BackfillRun.open(
+        results_dir, SymptomAnalyzer().vocabulary_version, resume
+    )
+    done = run.done_ids() if run else set()
+
+    stats = {'patients': 0, 'skipped': len(done), 'no_visits': 0, 'visits': 0,
+             'changed_patients': 0, 'changed_visits': 0, 'failed': 0}
+    started = time.perf_counter()
+
+    def collect(futures):
+        for future in futures:
+            results = future.result()
+            finished = []
+            for result in results:
+                patient_id = result['patient_id']
+                stats['patients'] += 1
+                stats['visits'] += result['visits']
+
+                if 'error' in result:
+                    stats['failed'] += 1
+                    logger.warning(f"Symptom backfill failed for {patient_id}: {result['error']}")
+                    continue
+
+                if result['changed']:
+                    stats['changed_patients'] += 1
+                    stats['changed_visits'] += len(result['changed'])
+                    if not dry_run and not data_adapter.update_visits(
+                        patient_id,
+                        {visit_id: {'extracted_symptoms': symptoms}
+                         for visit_id, symptoms in result['changed'].items()},
+                        {'symptom_tracking': result['symptom_tracking']}
+                    ):
+                        stats['failed'] += 1
+                        continue
+                finished.append(patient_id)
+
+            if run:
+                run.mark_done(finished)
+
+        elapsed = time.perf_counter() - started
+        stats['elapsed_seconds'] = round(elapsed, 1)
+        stats['visits_per_second'] = round(stats['visits'] / elapsed, 1) if elapsed else 0
+        logger.info(f"Backfilled {stats['patients']} patients ({stats['visits_per_second']} visits/s)")
+        if progress:
+            progress(dict(stats))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = set()
+        chunk = []
+
+        for patient_data in data_adapter.iter_patients(fields=['visits']):
+            if patient_data['id'] in done:
+                continue
+
+            payload = _backfill_payload(patient_data)
+            if payload is None:
+                stats['no_visits'] += 1
+                continue
+
+            chunk.append(payload)
+            if len(chunk) >= chunk_size:
+                pending.add(pool.submit(_backfill_chunk, chunk))
+                chunk = []
+
+            # Keep memory flat: at most 2 * workers chunks in flight
+            if len(pending) >= workers * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+
+        if chunk:
+            pending.add(pool.submit(_backfill_chunk, chunk))
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            collect(finished)
+
+    if run:
+        run.save_meta({**run.load_meta(), **stats, 'status': 'complete',
+                       'completed_at': datetime.now().isoformat()})
+    logger.info(f"Symptom backfill complete: {stats['changed_visits']} visits "
+                f"in {stats['changed_patients']} patients changed")
+    return {'run_id': run.run_dir.name if run else None, 'dry_run': dry_run, **stats}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Re-extract symptoms for all stored visits")
+    parser.add_argument("--results-dir", default="data/backfill")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=100)
+    parser.add_argument("--restart", action="store_true", help="ignore unfinished runs")
+    parser.add_argument("--dry-run", action="store_true", help="count changes without writing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    def show(stats: Dict):
+        print(f"\r⏳ {stats['patients']} patients, {stats['changed_visits']} visits changed "
+              f"({stats['visits_per_second']} visits/s)", end="", flush=True)
+
+    result = backfill_symptoms(
+        results_dir=args.results_dir, workers=args.workers, chunk_size=args.chunk_size,
+        resume=not args.restart, dry_run=args.dry_run, progress=show
+    )
+    print(f"\n✅ {'Checked' if result['dry_run'] else 'Backfilled'} {result['patients']} patients: "
+          f"{result['changed_visits']} visits in {result['changed_patients']} patients changed "
+          f"({result['failed']} failed)")
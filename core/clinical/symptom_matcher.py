@@ -0,0 +1,114 @@
+"""
+Symptom Matcher
+Token trie over the symptom vocabulary: every phrase is found in one pass
+over the note, at word boundaries, preferring the longest phrase
+"""
+
+import re
+from typing import Dict, Iterable, List, Tuple
+
+# Word tokens; the text between two tokens is their separator
+_TOKEN = re.compile(r"\w+")
+
+# Key for "a phrase ends here" inside trie nodes
+_END = None
+
+
+def _tokens(text: str) -> List[Tuple[str, str, int, int]]:
+    """(separator, word, start, end) per token; whitespace separators read as ' '"""
+    tokens = []
+    previous_end = None
+    for match in _TOKEN.finditer(text):
+        if previous_end is None:
+            separator = ''
+        else:
+            gap = text[previous_end:match.start()]
+            separator = ' ' if not gap.strip() else gap.strip()
+        tokens.append((separator, match.group(), match.start(), match.end()))
+        previous_end = match.end()
+    return tokens
+
+
+class SymptomMatcher:
+    """
+    Phrases are keyed word by word together with the separator in front of
+    each word, so "kayser-fleischer rings" needs the hyphen but any run of
+    whitespace matches a space. A phrase can't start or end inside a word,
+    which is the same boundary rule as r'\\b<phrase>\\b'.
+
+    Matching walks the trie from each token and keeps the longest phrase
+    that ends there; the scan resumes after it, so 'chest pain' is reported
+    instead of 'chest pain' and 'pain'. With nested=True the shorter phrases
+    inside each match are reported too ('severe abdominal pain' also gives
+    'abdominal pain' and 'pain'). Cost is the token count times the longest
+    phrase's length, independent of vocabulary size.
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        self._root: Dict = {}
+        self.phrases = set()
+
+        for phrase in phrases:
+            if not isinstance(phrase, str):
+                continue
+            phrase = ' '.join(phrase.lower().split())
+            tokens = _tokens(phrase)
+            if not tokens:
+                continue
+
+            node = self._root
+            for index, (separator, word, _, _) in enumerate(tokens):
+                node = node.setdefault((separator if index else '', word), {})
+            node[_END] = phrase
+            self.phrases.add(phrase)
+
+    def __len__(self) -> int:
+        return len(self.phrases)
+
+    def find_all(self, text: str, nested: bool = False) -> List[Tuple[str, int, int]]:
+        """
+        (phrase, start, end) for each leftmost-longest match in text, each
+        followed by the phrases nested inside it when nested is set
+        """
+        if not text:
+            return []
+
+        tokens = _tokens(text.lower())
+        matches = []
+        i = 0
+
+        while i < len(tokens):
+            ends = self._ends_from(tokens, i, len(tokens) - 1)
+            if not ends:
+                i += 1
+                continue
+
+            phrase, last = ends[-1]
+            matches.append((phrase, tokens[i][2], tokens[last][3]))
+            if nested:
+                for start in range(i, last + 1):
+                    for inner, inner_last in self._ends_from(tokens, start, last):
+                        if (start, inner_last) != (i, last):
+                            matches.append((inner, tokens[start][2], tokens[inner_last][3]))
+            i = last + 1
+
+        return matches
+
+    def find(self, text: str, nested: bool = False) -> List[str]:
+        """Distinct matched phrases in order of first appearance"""
+        return list(dict.fromkeys(phrase for phrase, _, _ in self.find_all(text, nested)))
+
+    def _ends_from(self, tokens: List[Tuple[str, str, int, int]], i: int,
+                   limit: int) -> List[Tuple[str, int]]:
+        """(phrase, last token) for every phrase starting at token i and ending by limit"""
+        ends = []
+        node = self._root.get(('', tokens[i][1]))
+        j = i
+        while node is not None:
+            if _END in node:
+                ends.append((node[_END], j))
+            j += 1
+            if j > limit:
+                break
+            node = node.get((tokens[j][0], tokens[j][1]))
+        return ends
@@ -0,0 +1,91 @@
+"""
+Symptom Timeline
+symptom_tracking parsed once into sorted day ordinals per symptom
+Window queries are bisect range lookups; no date strings are re-parsed
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def day_ordinal(value) -> Optional[int]:
+    """Calendar day of an ISO date or timestamp string, or None if it isn't one"""
+    if not isinstance(value, str):
+        return None
+    return _parse_day(value)
+
+
+# Patients share a small set of visit dates, so parse each string once
+@lru_cache(maxsize=8192)
+def _parse_day(value: str) -> Optional[int]:
+    try:
+        return datetime.fromisoformat(value).toordinal()
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=8192)
+def day_string(ordinal: int) -> str:
+    """ISO date for a day ordinal (the format symptom_tracking stores)"""
+    return date.fromordinal(ordinal).isoformat()
+
+
+class SymptomTimeline:
+    """
+    Sorted day ordinals per tracked symptom, parsed on first use.
+    Entries whose 'date' isn't an ISO date are skipped with a warning
+    instead of being silently dropped at every window check.
+    """
+
+    __slots__ = ('tracking', '_days')
+
+    def __init__(self, symptom_tracking: Dict):
+        self.tracking = symptom_tracking
+        self._days: Dict[str, List[int]] = {}
+
+    def __contains__(self, symptom: str) -> bool:
+        return symptom in self.tracking
+
+    def __iter__(self):
+        return iter(self.tracking)
+
+    def days(self, symptom: str) -> List[int]:
+        """All days the symptom was recorded, ascending"""
+        days = self._days.get(symptom)
+        if days is None:
+            days = self._days[symptom] = (
+                self._parse(symptom) if symptom in self.tracking else []
+            )
+        return days
+
+    def window(self, symptom: str, end_day: Optional[int], window_days: int) -> List[int]:
+        """Days in [end_day - window_days, end_day]; every day if end_day is None"""
+        days = self._days.get(symptom)
+        if days is None:
+            days = self.days(symptom)
+        if not days:
+            return days
+        if end_day is None:
+            return days
+
+        lo = bisect_left(days, end_day - window_days)
+        hi = bisect_right(days, end_day)
+        return days[lo:hi]
+
+    def _parse(self, symptom: str) -> List[int]:
+        days = []
+        for occ in self.tracking[symptom] or []:
+            value = occ.get('date') if isinstance(occ, dict) else None
+            ordinal = _parse_day(value) if isinstance(value, str) else None
+            if ordinal is None:
+                logger.warning(f"Skipping symptom '{symptom}' entry with bad date: {occ!r}")
+                continue
+            days.append(ordinal)
+
+        days.sort()
+        return days
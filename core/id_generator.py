@@ -0,0 +1,87 @@
+"""
+ID Generator
+Monotonic, sortable patient and visit IDs that never collide within a host
+"""
+
+import os
+import time
+import random
+import threading
+
+_BASE36 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# Per-millisecond sequence width (36^3 = 46,656 IDs per ms per process)
+_SEQ_CHARS = 3
+_SEQ_MAX = 36 ** _SEQ_CHARS
+
+# Process node width; pid-derived so live processes on one host never share it
+_NODE_CHARS = 5
+
+
+def _base36(value: int, width: int) -> str:
+    chars = []
+    for _ in range(width):
+        value, digit = divmod(value, 36)
+        chars.append(_BASE36[digit])
+    return ''.join(reversed(chars))
+
+
+class IDGenerator:
+    """
+    ULID-style ID generator.
+    Layout after the prefix:
+        YYYYmmddHHMMSS  local time to the second (same as the legacy IDs)
+        mmm             milliseconds
+        SSS             base36 sequence within the millisecond
+        NNNNN           base36 process node
+    Legacy IDs (prefix + 14 digits) are a prefix of new IDs from the same
+    second, so old and new IDs still sort by creation time.
+    """
+
+    def __init__(self):
+        self._reset_node()
+
+    def _reset_node(self):
+        """Fresh node and sequence; also runs in forked children"""
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._seq = 0
+        node = (os.getpid() % (1 << 22)) << 3 | random.getrandbits(3)
+        self._node = _base36(node, _NODE_CHARS)
+
+    def new_id(self, prefix: str) -> str:
+        """Generate the next ID for a prefix such as 'P' or 'V'"""
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._seq = 0
+            else:
+                # Same millisecond or clock stepped back: keep counting
+                self._seq += 1
+                if self._seq >= _SEQ_MAX:
+                    self._last_ms += 1
+                    self._seq = 0
+
+            ms = self._last_ms
+            seq = self._seq
+
+        seconds, millis = divmod(ms, 1000)
+        stamp = time.strftime("%Y%m%d%H%M%S", time.localtime(seconds))
+        return f"{prefix}{stamp}{millis:03d}{_base36(seq, _SEQ_CHARS)}{self._node}"
+
+
+_generator = IDGenerator()
+
+# Forked workers must not reuse the parent's node or sequence
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_generator._reset_node)
+
+
+def new_patient_id() -> str:
+    return _generator.new_id("P")
+
+
+def new_visit_id() -> str:
+    return _generator.new_id("V")
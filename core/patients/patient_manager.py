@@ -10,6 +10,7 @@ from typing import Dict, List, Optional
 import logging
 
 from core.patients.patient_model import Patient, PatientCreate, PatientUpdate
+from core.id_generator import new_patient_id
 from data.db.json_adapter import JSONAdapter
 
 logger = logging.getLogger(__name__)
@@ -89,54 +90,29 @@ class PatientManager:
         return {"success": True, "message": "Patient deleted successfully"}
     
     def get_all_patients(self) -> List[Dict]:
-        """Get all patients with summary info"""
-        patients = []
-        
-        for patient_data in self.db.get_all_patients():
-            patients.append({
-                'id': patient_data['id'],
-                'name': patient_data['name'],
-                'age': patient_data.get('age'),
-                'sex': patient_data.get('sex'),
-                'mobile': patient_data.get('mobile'),
-                'registration_date': patient_data.get('registration_date'),
-                'visit_count': len(patient_data.get('visits', [])),
-                'last_visit': patient_data.get('visits', [{}])[-1].get('timestamp') 
-                             if patient_data.get('visits') else None
-            })
-        
-        # Sort by registration date (newest first)
-        patients.sort(key=lambda x: x.get('registration_date', ''), reverse=True)
-        return patients
+        """Get all patients with summary info (newest registration first)"""
+        return self.db.get_patient_summaries()
     
     def search_patients(self, search_term: str) -> List[Dict]:
         """Search patients by name or mobile"""
-        results = []
-        search_term = search_term.lower()
-        
-        for patient_data in self.db.get_all_patients():
-            name = patient_data.get('name', '').lower()
-            mobile = patient_data.get('mobile', '').lower()
-            
-            if search_term in name or search_term in mobile:
-                results.append({
-                    'id': patient_data['id'],
-                    'name': patient_data['name'],
-                    'mobile': patient_data['mobile'],
-                    'age': patient_data.get('age'),
-                    'sex': patient_data.get('sex')
-                })
-        
-        return results
+        return [
+            {
+                'id': summary['id'],
+                'name': summary['name'],
+                'mobile': summary['mobile'],
+                'age': summary.get('age'),
+                'sex': summary.get('sex')
+            }
+            for summary in self.db.search_patient_summaries(search_term)
+        ]
     
     def find_by_mobile(self, mobile: str) -> Optional[Dict]:
         """Find patient by mobile number"""
-        for patient_data in self.db.get_all_patients():
-            if patient_data.get('mobile') == mobile:
-                return patient_data
+        patient_id = self.db.find_patient_id_by_mobile(mobile)
+        if patient_id:
+            return self.db.load_patient(patient_id)
         return None
     
     def _generate_patient_id(self) -> str:
         """Generate unique patient ID"""
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        return f"P{timestamp}"
\ No newline at end of file
+        return new_patient_id()
\ No newline at end of file
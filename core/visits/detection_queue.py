@@ -0,0 +1,251 @@
+"""
+Detection Queue
+Runs rare-disease detection for saved visits on a background worker pool
+Pending jobs are persisted so a restart picks them up again
+"""
+
+import os
+import json
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+import threading
+import logging
+
+from core.clinical.memo import BoundedMemo
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETE = "complete"
+FAILED = "failed"
+
+
+class DetectionQueue:
+    """
+    Background detection for visits that are already persisted.
+    Each job is one (patient_id, visit_id) pair stored as
+    queue_dir/{visit_id}.json until it finishes; results are written back
+    to the visit record through the storage adapter, together with a
+    'disease_detection' status block the UI can poll.
+
+    A failed run is retried up to max_attempts times, retry_delay seconds
+    apart (doubling). Jobs run under patient_lock(patient_id), which other
+    read-modify-write paths (visit deletion) take too, so a write-back and
+    a snapshot rewrite of the same patient never interleave.
+    """
+
+    def __init__(self, data_adapter, disease_detector,
+                 queue_dir: str = "data/detection_queue", workers: int = 2,
+                 max_attempts: int = 3, retry_delay: float = 5.0):
+        self.db = data_adapter
+        self.disease_detector = disease_detector
+        self.queue_dir = Path(queue_dir)
+        self.queue_dir.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="detection")
+        self._lock = threading.Lock()
+        self._patient_locks = [threading.RLock() for _ in range(64)]
+        self._jobs: Dict[str, Dict] = {}
+        self._finished = BoundedMemo(maxsize=4096)
+        self._listeners: List[Callable[[Dict], None]] = []
+        self._recover()
+
+    def submit(self, patient_id: str, visit_id: str) -> Dict:
+        """Queue detection for a saved visit; returns the job's status"""
+        return self._enqueue({
+            'patient_id': patient_id,
+            'visit_id': visit_id,
+            'status': PENDING,
+            'queued_at': datetime.now().isoformat()
+        })
+
+    def status(self, visit_id: str) -> Optional[Dict]:
+        """Status of a queued or recently finished job, None if unknown"""
+        with self._lock:
+            job = self._jobs.get(visit_id)
+            if job is not None:
+                return dict(job)
+        job = self._finished.get(visit_id)
+        return dict(job) if job is not None else None
+
+    def pending_count(self) -> int:
+        """Jobs not yet finished"""
+        with self._lock:
+            return len(self._jobs)
+
+    def patient_lock(self, patient_id: str) -> threading.RLock:
+        """Lock serialising detection write-backs with other writers of a patient"""
+        return self._patient_locks[hash(patient_id) % len(self._patient_locks)]
+
+    def subscribe(self, callback: Callable[[Dict], None]):
+        """Call callback(job) when a job completes or fails"""
+        self._listeners.append(callback)
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work; unfinished jobs stay on disk for the next start"""
+        self._pool.shutdown(wait=wait)
+
+    def _enqueue(self, job: Dict) -> Dict:
+        with self._lock:
+            # A re-queued visit is re-run against its latest data
+            self._jobs[job['visit_id']] = job
+            snapshot = dict(job)
+        self._finished.pop(job['visit_id'])
+
+        self._persist(snapshot)
+        self._pool.submit(self._run, job)
+        return snapshot
+
+    def _run(self, job: Dict):
+        patient_id, visit_id = job['patient_id'], job['visit_id']
+        with self._lock:
+            if self._jobs.get(visit_id) is not job:
+                return  # superseded by a later submit for the same visit
+            job['status'] = RUNNING
+            job['attempts'] = job.get('attempts', 0) + 1
+            attempts = job['attempts']
+
+        with self.patient_lock(patient_id):
+            outcome, updates = self._detect(patient_id, visit_id)
+            completed_at = datetime.now().isoformat()
+
+            if outcome['status'] == COMPLETE and \
+                    not self._write_back(job, updates, COMPLETE, completed_at):
+                outcome = {'status': FAILED, 'error': "could not write detection results"}
+                updates = {'disease_detection_error': outcome['error']}
+
+            # updates is None when the visit is gone: nothing to write or retry
+            if outcome['status'] == FAILED and updates is not None:
+                if attempts < self.max_attempts:
+                    self._retry_later(job, outcome['error'])
+                    return
+                if not self._write_back(job, updates, FAILED, completed_at):
+                    logger.error(f"Could not write detection failure for visit {visit_id}")
+
+        with self._lock:
+            if self._jobs.get(visit_id) is not job:
+                return
+            del self._jobs[visit_id]
+            job.pop('error', None)
+            job.update(outcome, completed_at=completed_at)
+            finished = dict(job)
+
+        self._finished.put(visit_id, finished)
+        self._discard(visit_id)
+
+        for callback in self._listeners:
+            try:
+                callback(dict(finished))
+            except Exception as e:
+                logger.error(f"Detection listener failed for visit {visit_id}: {e}")
+
+    def _write_back(self, job: Dict, updates: Dict, status: str, completed_at: str) -> bool:
+        """Write results to the visit unless a later submit superseded the job"""
+        with self._lock:
+            if self._jobs.get(job['visit_id']) is not job:
+                return True  # the newer job writes its own results
+        updates['disease_detection'] = {
+            'status': status, 'queued_at': job['queued_at'], 'completed_at': completed_at
+        }
+        return self.db.update_visit(job['patient_id'], job['visit_id'], updates)
+
+    def _detect(self, patient_id: str, visit_id: str):
+        """
+        (outcome, visit updates) for one detection run. Updates are None
+        when the visit no longer exists, so there is nothing to write or retry.
+        """
+        try:
+            patient_data = self.db.load_patient(patient_id)
+            visit = _find_visit(patient_data, visit_id)
+            if visit is None:
+                message = f"visit {visit_id} not found for patient {patient_id}"
+                logger.warning(f"Dropping detection job: {message}")
+                return {'status': FAILED, 'error': message}, None
+
+            disease_alerts = self.disease_detector.detect_rare_diseases(
+                patient_data,
+                current_symptoms=visit.get('extracted_symptoms', []),
+                visit_date=visit['timestamp']
+            )
+            if disease_alerts:
+                logger.info(f"Detected {len(disease_alerts)} disease alerts for patient {patient_id}")
+
+            # A success clears any error left by an earlier run
+            return (
+                {'status': COMPLETE, 'alert_count': len(disease_alerts)},
+                {'disease_alerts': disease_alerts, 'disease_detection_error': None}
+            )
+
+        except Exception as e:
+            logger.error(f"Background disease detection failed for patient {patient_id}: {e}")
+            return {'status': FAILED, 'error': str(e)}, {'disease_detection_error': str(e)}
+
+    def _retry_later(self, job: Dict, error: str):
+        """Put a failed job back to pending and re-run it after a backoff"""
+        with self._lock:
+            if self._jobs.get(job['visit_id']) is not job:
+                return
+            job['status'] = PENDING
+            job['error'] = error
+            snapshot = dict(job)
+        self._persist(snapshot)
+
+        delay = self.retry_delay * 2 ** (snapshot['attempts'] - 1)
+        logger.info(f"Retrying detection for visit {job['visit_id']} in {delay:.0f}s "
+                    f"(attempt {snapshot['attempts']} of {self.max_attempts} failed)")
+        timer = threading.Timer(delay, self._resubmit, (job,))
+        timer.daemon = True
+        timer.start()
+
+    def _resubmit(self, job: Dict):
+        try:
+            self._pool.submit(self._run, job)
+        except RuntimeError:
+            pass  # shut down; the job file is picked up on the next start
+
+    def _recover(self):
+        """Re-queue jobs left on disk by a previous process"""
+        for path in sorted(self.queue_dir.glob("*.json")):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    job = json.load(f)
+                # Keep queued_at and the attempt count across restarts
+                self._enqueue({
+                    'patient_id': job['patient_id'],
+                    'visit_id': job['visit_id'],
+                    'status': PENDING,
+                    'queued_at': job.get('queued_at') or datetime.now().isoformat(),
+                    'attempts': job.get('attempts', 0)
+                })
+            except Exception as e:
+                logger.warning(f"Skipping bad detection job {path.name}: {e}")
+
+    def _persist(self, job: Dict):
+        """Write the job file atomically so a crash never leaves half a job"""
+        path = self._job_path(job['visit_id'])
+        tmp_path = path.with_suffix('.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(job, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Error persisting detection job {job['visit_id']}: {e}")
+
+    def _discard(self, visit_id: str):
+        self._job_path(visit_id).unlink(missing_ok=True)
+
+    def _job_path(self, visit_id: str) -> Path:
+        return self.queue_dir / f"{visit_id}.json"
+
+
+def _find_visit(patient_data: Optional[Dict], visit_id: str) -> Optional[Dict]:
+    if not patient_data:
+        return None
+    for visit in patient_data.get('visits', []):
+        if visit.get('visit_id') == visit_id:
+            return visit
+    return None
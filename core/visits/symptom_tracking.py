@@ -0,0 +1,50 @@
+"""
+Symptom Tracking
+Per-patient index of symptom -> dated occurrences, built from visits'
+extracted symptoms. Shared by VisitManager and the symptom backfill.
+"""
+
+from typing import Dict, List
+
+
+def update_symptom_tracking(patient_data: Dict, symptoms: List[str], visit_date: str):
+    """
+    Update symptom tracking with deduplication per visit
+    """
+    if 'symptom_tracking' not in patient_data:
+        patient_data['symptom_tracking'] = {}
+
+    # Normalize visit date to date string (remove time)
+    visit_date_str = visit_date.split('T')[0] if 'T' in visit_date else visit_date
+
+    # Get unique symptoms for this visit (case-insensitive)
+    unique_symptoms = set()
+    for symptom in symptoms:
+        if isinstance(symptom, str) and symptom.strip():
+            normalized = symptom.strip().lower()
+            unique_symptoms.add(normalized)
+
+    # Update tracking - each symptom appears only ONCE per date
+    for symptom in unique_symptoms:
+        if symptom not in patient_data['symptom_tracking']:
+            patient_data['symptom_tracking'][symptom] = []
+
+        # Only add if not already tracked for this date
+        existing_dates = [
+            entry['date'] for entry in patient_data['symptom_tracking'][symptom]
+        ]
+        if visit_date_str not in existing_dates:
+            patient_data['symptom_tracking'][symptom].append({
+                'date': visit_date_str,
+                'visit_date': visit_date  # Keep full timestamp
+            })
+
+
+def rebuild_symptom_tracking(patient_data: Dict):
+    """Replay every visit's extracted symptoms into a fresh tracking index"""
+    patient_data['symptom_tracking'] = {}
+
+    for visit in patient_data.get('visits', []):
+        symptoms = visit.get('extracted_symptoms', [])
+        if symptoms:
+            update_symptom_tracking(patient_data, symptoms, visit['timestamp'])
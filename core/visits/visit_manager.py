@@ -9,31 +9,73 @@ from datetime import datetime
 from typing import Dict, List, Optional, Set
 import logging
 
+from core.id_generator import new_visit_id
 from data.db.json_adapter import JSONAdapter
 from core.clinical.symptom_analyzer import SymptomAnalyzer
 from core.clinical.disease_detector import DiseaseDetectionEngine
 from core.clinical.vitals_validator import VitalsValidator
+from core.visits.detection_queue import DetectionQueue, PENDING
+from core.visits.symptom_tracking import update_symptom_tracking, rebuild_symptom_tracking
 
 logger = logging.getLogger(__name__)
 
 
 class VisitManager:
-    """Manages patient visits and consultations"""
+    """
+    Manages patient visits and consultations.
     
-    def __init__(self, data_adapter: JSONAdapter):
+    detection_mode "sync" runs rare-disease detection before a save returns;
+    "async" persists the visit first and hands detection to a DetectionQueue,
+    which writes the alerts back to the visit. Defaults to EMR_DETECTION_MODE.
+    """
+    
+    def __init__(self, data_adapter: JSONAdapter, detection_mode: Optional[str] = None):
         self.db = data_adapter
         self.symptom_analyzer = SymptomAnalyzer()
         self.vitals_validator = VitalsValidator()
         
-        # Initialize disease detector with config paths
-        disease_config = "data/config/rare_diseases_comprehensive.json"
+        # Detect against the merged catalogue of every disease config
         symptom_scores = "data/config/symptom_severity_scores.json"
+        self.disease_detector = DiseaseDetectionEngine(None, symptom_scores)
         
-        # Check if configs exist, use watchlist as fallback
-        if not os.path.exists(disease_config):
-            disease_config = "data/config/disease_watchlist.json"
-            
-        self.disease_detector = DiseaseDetectionEngine(disease_config, symptom_scores)
+        self.detection_queue = None
+        self.set_detection_mode(detection_mode or os.getenv("EMR_DETECTION_MODE", "sync"))
+    
+    def set_detection_mode(self, mode: str):
+        """Switch between synchronous and background detection"""
+        if mode not in ("sync", "async"):
+            logger.warning(f"Unknown detection mode '{mode}', using sync")
+            mode = "sync"
+        
+        # Jobs already queued keep running; only new saves change path
+        if mode == "async" and self.detection_queue is None:
+            self.detection_queue = DetectionQueue(
+                self.db, self.disease_detector,
+                workers=int(os.getenv("EMR_DETECTION_WORKERS", "2"))
+            )
+        self.detection_mode = mode
+    
+    def get_detection_status(self, patient_id: str, visit_id: str) -> Dict:
+        """Detection status for a visit: pending, running, complete or failed"""
+        if self.detection_queue is not None:
+            job = self.detection_queue.status(visit_id)
+            if job is not None:
+                return job
+        
+        visit = self.get_visit(patient_id, visit_id)
+        if visit is None:
+            return {"status": "unknown", "visit_id": visit_id}
+        
+        # Visits saved synchronously carry no status block
+        status = visit.get('disease_detection') or {
+            'status': 'failed' if visit.get('disease_detection_error') else 'complete'
+        }
+        return {
+            **status,
+            'patient_id': patient_id,
+            'visit_id': visit_id,
+            'alert_count': len(visit.get('disease_alerts', []))
+        }
     
     def create_visit(self, patient_id: str, visit_data: Dict) -> Dict:
         """
@@ -63,15 +105,32 @@ class VisitManager:
             symptoms = self.symptom_analyzer.extract_symptoms(visit_data['chief_complaint'])
             visit_data['extracted_symptoms'] = symptoms
         
-        # Update symptom tracking
+        # Update symptom tracking; only this visit's symptoms are written
+        track = None
         if symptoms:
             self._update_symptom_tracking(patient_data, symptoms, visit_data['timestamp'])
+            track = {'symptoms': symptoms, 'visit_date': visit_data['timestamp']}
         
         # Add visit to patient record
         if 'visits' not in patient_data:
             patient_data['visits'] = []
         patient_data['visits'].append(visit_data)
         
+        if self.detection_mode == "async":
+            # Persist first; the queue writes alerts back when ready
+            visit_data['disease_detection'] = {'status': PENDING}
+            self.db.append_visit(patient_id, visit_data, track=track)
+            job = self.detection_queue.submit(patient_id, visit_data['visit_id'])
+            
+            return {
+                "success": True,
+                "message": "Visit saved successfully",
+                "visit_id": visit_data['visit_id'],
+                "vitals_validation": vitals_validation,
+                "disease_alerts": [],
+                "detection_status": job['status']
+            }
+        
         # Run disease detection with error handling
         disease_alerts = []
         try:
@@ -90,15 +149,16 @@ class VisitManager:
             # Continue without disease alerts - don't fail the entire visit
             visit_data['disease_detection_error'] = str(e)
         
-        # Save updated patient data
-        self.db.save_patient(patient_data)
+        # Persist only the new visit, not the whole history
+        self.db.append_visit(patient_id, visit_data, track=track)
         
         return {
             "success": True,
             "message": "Visit saved successfully",
             "visit_id": visit_data['visit_id'],
             "vitals_validation": vitals_validation,
-            "disease_alerts": disease_alerts
+            "disease_alerts": disease_alerts,
+            "detection_status": "complete"
         }
     
     def update_consultation(self, patient_id: str, visit_id: str, 
@@ -122,12 +182,14 @@ class VisitManager:
         
         # Update visit with consultation data
         visit = patient_data['visits'][visit_index]
-        visit.update({
+        visit_updates = {
             'summary': consultation_data.get('summary', ''),
             'prescription': consultation_data.get('prescription', ''),
             'consultation_timestamp': datetime.now().isoformat(),
             'format_type': consultation_data.get('format_type', 'SOAP')
-        })
+        }
+        visit.update(visit_updates)
+        track = None
         
         # Extract symptoms from summary for better tracking
         if consultation_data.get('summary'):
@@ -140,42 +202,59 @@ class VisitManager:
                     existing_symptoms = visit.get('extracted_symptoms', [])
                     all_symptoms = list(set(existing_symptoms + new_symptoms))
                     visit['extracted_symptoms'] = all_symptoms
+                    visit_updates['extracted_symptoms'] = all_symptoms
                     
                     # Update tracking
                     self._update_symptom_tracking(
                         patient_data, new_symptoms, visit['timestamp']
                     )
+                    track = {'symptoms': new_symptoms, 'visit_date': visit['timestamp']}
             except Exception as e:
                 logger.error(f"Failed to extract symptoms from summary: {e}")
         
-        # Re-run disease detection with updated data
-        all_symptoms = visit.get('extracted_symptoms', [])
-        try:
-            disease_alerts = self.disease_detector.detect_rare_diseases(
-                patient_data,
-                current_symptoms=all_symptoms,
-                visit_date=visit['timestamp']
-            )
-            
-            if disease_alerts:
-                visit['disease_alerts'] = disease_alerts
-        except Exception as e:
-            logger.error(f"Disease detection failed during consultation update: {e}")
-            # Keep any existing disease alerts
+        if self.detection_mode == "async":
+            visit_updates['disease_detection'] = {'status': PENDING}
+            self.db.update_visit(patient_id, visit_id, visit_updates, track=track)
+            job = self.detection_queue.submit(patient_id, visit_id)
             disease_alerts = visit.get('disease_alerts', [])
-        
-        # Save updated data
-        self.db.save_patient(patient_data)
+            detection_status = job['status']
+        else:
+            # Re-run disease detection with updated data
+            all_symptoms = visit.get('extracted_symptoms', [])
+            try:
+                disease_alerts = self.disease_detector.detect_rare_diseases(
+                    patient_data,
+                    current_symptoms=all_symptoms,
+                    visit_date=visit['timestamp']
+                )
+                
+                if disease_alerts:
+                    visit['disease_alerts'] = disease_alerts
+                    visit_updates['disease_alerts'] = disease_alerts
+            except Exception as e:
+                logger.error(f"Disease detection failed during consultation update: {e}")
+                # Keep any existing disease alerts
+                disease_alerts = visit.get('disease_alerts', [])
+            
+            # Persist only the changed visit fields
+            self.db.update_visit(patient_id, visit_id, visit_updates, track=track)
+            detection_status = "complete"
         
         return {
             "success": True,
             "message": "Consultation saved successfully",
             "disease_alerts": disease_alerts,
+            "detection_status": detection_status,
             "prescription_warnings": []  # TODO: Add drug checker
         }
     
-    def get_patient_visits(self, patient_id: str) -> List[Dict]:
-        """Get all visits for a patient"""
+    def get_patient_visits(self, patient_id: str, limit: Optional[int] = None,
+                           since: Optional[str] = None) -> List[Dict]:
+        """Get visits for a patient, newest first; limit/since read only that page"""
+        if limit is not None or since is not None:
+            page = self.db.load_patient_page(patient_id, limit=limit, since=since)
+            return page['visits'] if page else []
+        
         patient_data = self.db.load_patient(patient_id)
         if not patient_data:
             return []
@@ -187,6 +266,35 @@ class VisitManager:
         
         return visits
     
+    def trace_detection(self, patient_id: str, visit_id: Optional[str] = None) -> Dict:
+        """
+        Re-run detection for a visit (default: the latest) with tracing on.
+        Nothing is saved; the trace explains timings and rejected diseases.
+        """
+        patient_data = self.db.load_patient(patient_id)
+        if not patient_data:
+            return {"success": False, "message": "Patient not found"}
+        
+        visits = patient_data.get('visits', [])
+        if visit_id is not None:
+            visits = [v for v in visits if v.get('visit_id') == visit_id]
+        if not visits:
+            return {"success": False, "message": "Visit not found"}
+        visit = max(visits, key=lambda v: v.get('timestamp', ''))
+        
+        disease_alerts, trace = self.disease_detector.detect_with_trace(
+            patient_data,
+            current_symptoms=visit.get('extracted_symptoms', []),
+            visit_date=visit.get('timestamp')
+        )
+        
+        return {
+            "success": True,
+            "visit_id": visit.get('visit_id'),
+            "disease_alerts": disease_alerts,
+            "trace": trace.to_dict()
+        }
+    
     def get_visit(self, patient_id: str, visit_id: str) -> Optional[Dict]:
         """Get a specific visit"""
         patient_data = self.db.load_patient(patient_id)
@@ -201,6 +309,14 @@ class VisitManager:
     
     def delete_visit(self, patient_id: str, visit_id: str) -> Dict:
         """Delete a specific visit"""
+        if self.detection_queue is None:
+            return self._delete_visit(patient_id, visit_id)
+        
+        # Rewrites the whole record; keep background write-backs out meanwhile
+        with self.detection_queue.patient_lock(patient_id):
+            return self._delete_visit(patient_id, visit_id)
+    
+    def _delete_visit(self, patient_id: str, visit_id: str) -> Dict:
         patient_data = self.db.load_patient(patient_id)
         if not patient_data:
             return {"success": False, "message": "Patient not found"}
@@ -222,53 +338,20 @@ class VisitManager:
     
     def _update_symptom_tracking(self, patient_data: Dict, symptoms: List[str], 
                                visit_date: str):
-        """
-        Update symptom tracking with deduplication per visit
-        """
-        if 'symptom_tracking' not in patient_data:
-            patient_data['symptom_tracking'] = {}
-        
-        # Normalize visit date to date string (remove time)
-        visit_date_str = visit_date.split('T')[0] if 'T' in visit_date else visit_date
-        
-        # Get unique symptoms for this visit (case-insensitive)
-        unique_symptoms = set()
-        for symptom in symptoms:
-            if isinstance(symptom, str) and symptom.strip():
-                normalized = symptom.strip().lower()
-                unique_symptoms.add(normalized)
-        
-        # Update tracking - each symptom appears only ONCE per date
-        for symptom in unique_symptoms:
-            if symptom not in patient_data['symptom_tracking']:
-                patient_data['symptom_tracking'][symptom] = []
-            
-            # Only add if not already tracked for this date
-            existing_dates = [
-                entry['date'] for entry in patient_data['symptom_tracking'][symptom]
-            ]
-            if visit_date_str not in existing_dates:
-                patient_data['symptom_tracking'][symptom].append({
-                    'date': visit_date_str,
-                    'visit_date': visit_date  # Keep full timestamp
-                })
+        """Add one visit's symptoms to the patient's tracking index"""
+        update_symptom_tracking(patient_data, symptoms, visit_date)
     
     def _rebuild_symptom_tracking(self, patient_data: Dict):
         """Rebuild symptom tracking after visit deletion"""
-        patient_data['symptom_tracking'] = {}
+        # Cached detection results may rest on the deleted visit
+        self.disease_detector.invalidate(patient_data.get('id'))
         
         # Re-process all remaining visits
-        for visit in patient_data.get('visits', []):
-            symptoms = visit.get('extracted_symptoms', [])
-            if symptoms:
-                self._update_symptom_tracking(
-                    patient_data, symptoms, visit['timestamp']
-                )
+        rebuild_symptom_tracking(patient_data)
     
     def _generate_visit_id(self) -> str:
         """Generate unique visit ID"""
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        return f"V{timestamp}"
+        return new_visit_id()
     
     def get_visit_statistics(self, patient_id: str) -> Dict:
         """Get statistics about patient visits"""
@@ -0,0 +1,88 @@
+"""
+Patient Record Codecs
+Pluggable on-disk encodings for patient snapshots
+JSON is always available; orjson and msgpack are used when installed
+"""
+
+import json
+from typing import Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+# Binary snapshots start with this marker; anything else is read as JSON
+MSGPACK_MAGIC = b"\x00EMRMP1"
+
+
+class JSONCodec:
+    """Minified UTF-8 JSON"""
+    name = "json"
+
+    def encode(self, record: Dict) -> bytes:
+        return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def decode(self, data: bytes) -> Dict:
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """JSON written and parsed by orjson; readable by the plain JSON codec"""
+    name = "orjson"
+
+    def encode(self, record: Dict) -> bytes:
+        return orjson.dumps(record)
+
+    def decode(self, data: bytes) -> Dict:
+        return orjson.loads(data)
+
+
+class MsgpackCodec:
+    """msgpack with a magic prefix so reads can tell it apart from JSON"""
+    name = "msgpack"
+
+    def encode(self, record: Dict) -> bytes:
+        return MSGPACK_MAGIC + msgpack.packb(record, use_bin_type=True)
+
+    def decode(self, data: bytes) -> Dict:
+        return msgpack.unpackb(data[len(MSGPACK_MAGIC):], raw=False)
+
+
+def available_codecs() -> Dict[str, object]:
+    """Codecs usable in this environment, keyed by name"""
+    codecs = {"json": JSONCodec()}
+    if orjson is not None:
+        codecs["orjson"] = OrjsonCodec()
+    if msgpack is not None:
+        codecs["msgpack"] = MsgpackCodec()
+    return codecs
+
+
+def get_codec(name: str = "json"):
+    """Codec by name, falling back to JSON if it isn't installed"""
+    codecs = available_codecs()
+    if name not in codecs:
+        logger.warning(f"Codec '{name}' not available, using json")
+        return codecs["json"]
+    return codecs[name]
+
+
+def decode_record(data: bytes) -> Dict:
+    """Decode a snapshot written by any codec"""
+    if data.startswith(MSGPACK_MAGIC):
+        if msgpack is None:
+            raise ValueError("Snapshot is msgpack-encoded but msgpack is not installed")
+        return MsgpackCodec().decode(data)
+
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,226 @@
+"""
+Clinical Config Registry
+Parses each config file once and hands out shared, read-only views
+Files are reloaded atomically when they change on disk
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # optional dependency; fall back to mtime polling
+    Observer = None
+    FileSystemEventHandler = object
+
+CONFIG_DIR = Path("data/config")
+
+# Without watchdog, a cached file is re-stat'ed at most this often
+POLL_INTERVAL = 2.0
+
+
+def _read_only(*args, **kwargs):
+    raise TypeError("Config views are read-only; use thaw() for a mutable copy")
+
+
+class FrozenDict(dict):
+    """dict that refuses mutation; json.dumps and isinstance(dict) still work"""
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+    __ior__ = _read_only
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+class FrozenList(list):
+    """list that refuses mutation"""
+    __setitem__ = __delitem__ = _read_only
+    append = extend = insert = pop = remove = reverse = sort = clear = _read_only
+    __iadd__ = __imul__ = _read_only
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+
+def freeze(value: Any) -> Any:
+    """Read-only copy of a parsed JSON tree"""
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Mutable copy of a (possibly frozen) JSON tree"""
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [thaw(v) for v in value]
+    return value
+
+
+class _Entry:
+    __slots__ = ('data', 'mtime_ns', 'size', 'checked', 'stale')
+
+    def __init__(self, data, mtime_ns: int, size: int):
+        self.data = data
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.checked = time.monotonic()
+        self.stale = False
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    """Marks cached entries stale when watchdog sees their file change"""
+
+    def __init__(self, registry: 'ConfigRegistry'):
+        self.registry = registry
+
+    def on_any_event(self, event):
+        for path in (getattr(event, 'src_path', None), getattr(event, 'dest_path', None)):
+            if path:
+                self.registry._mark_stale(Path(path))
+
+
+class ConfigRegistry:
+    """
+    Shared cache of parsed JSON config files.
+    get() returns the same frozen object until the file changes; each
+    reload bumps `version`, which downstream caches can key on.
+    Changes are picked up through watchdog when installed, otherwise by
+    comparing mtime/size at most every POLL_INTERVAL seconds.
+    """
+
+    def __init__(self, config_dir: Path = CONFIG_DIR, watch: bool = True):
+        self.config_dir = Path(config_dir)
+        self.version = 0
+        self._entries: Dict[Path, _Entry] = {}
+        # Resolving hits the filesystem; callers pass the same few paths
+        self._resolved: Dict[Any, Path] = {}
+        self._lock = threading.RLock()
+        self._listeners: List[Callable[[Path], None]] = []
+        self._watch = watch and Observer is not None
+        self._observer = None
+        self._watched_dirs = set()
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Config by name, e.g. 'symptom_severity_scores' -> config_dir/symptom_severity_scores.json"""
+        return self.get_file(self.config_dir / f"{name}.json", default)
+
+    def get_file(self, path, default: Any = None) -> Any:
+        """Config by file path; missing or unparseable files return default"""
+        resolved = self._resolved.get(path)
+        if resolved is None:
+            resolved = self._resolved[path] = Path(path).resolve()
+        path = resolved
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and not self._needs_check(entry):
+                return entry.data
+            return self._refresh(path, entry, default)
+
+    def get_file_stamped(self, path, default: Any = None) -> Tuple[Any, Optional[Tuple[int, int]]]:
+        """get_file plus the (mtime_ns, size) of the file it was parsed from; None if missing"""
+        with self._lock:
+            data = self.get_file(path, default)
+            entry = self._entries.get(self._resolved[path])
+            return data, (entry.mtime_ns, entry.size) if entry is not None else None
+
+    def reload(self, name: Optional[str] = None):
+        """Drop one cached config (or all of them) so the next get() re-reads it"""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop((self.config_dir / f"{name}.json").resolve(), None)
+            self.version += 1
+
+    def subscribe(self, callback: Callable[[Path], None]):
+        """Call callback(path) after a cached config is reloaded"""
+        self._listeners.append(callback)
+
+    def _needs_check(self, entry: _Entry) -> bool:
+        if entry.stale:
+            return True
+        if self._observer is not None:
+            return False
+        return time.monotonic() - entry.checked >= POLL_INTERVAL
+
+    def _refresh(self, path: Path, entry: Optional[_Entry], default: Any) -> Any:
+        """Re-read path if it changed since entry was cached"""
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            if entry is not None:
+                logger.warning(f"Config file removed: {path}")
+                del self._entries[path]
+                self.version += 1
+            return default
+
+        if entry is not None and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+            entry.checked = time.monotonic()
+            entry.stale = False
+            return entry.data
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = freeze(json.load(f))
+        except (OSError, ValueError) as e:
+            # Likely caught mid-write; keep serving the previous version
+            logger.error(f"Error loading config {path}: {e}")
+            return entry.data if entry is not None else default
+
+        self._entries[path] = _Entry(data, stat.st_mtime_ns, stat.st_size)
+        self._start_watching(path.parent)
+
+        if entry is not None:
+            self.version += 1
+            logger.info(f"Reloaded config {path.name} (version {self.version})")
+            for callback in self._listeners:
+                try:
+                    callback(path)
+                except Exception as e:
+                    logger.error(f"Config listener failed for {path.name}: {e}")
+
+        return data
+
+    def _mark_stale(self, path: Path):
+        entry = self._entries.get(path.resolve())
+        if entry is not None:
+            entry.stale = True
+
+    def _start_watching(self, directory: Path):
+        if not self._watch or directory in self._watched_dirs:
+            return
+
+        try:
+            if self._observer is None:
+                self._observer = Observer()
+                self._observer.daemon = True
+                self._observer.start()
+            self._observer.schedule(_ChangeHandler(self), str(directory), recursive=False)
+            self._watched_dirs.add(directory)
+        except Exception as e:
+            logger.warning(f"Could not watch {directory}, polling instead: {e}")
+            self._watch = False
+            self._observer = None
+
+
+config_registry = ConfigRegistry(watch=os.getenv("EMR_CONFIG_WATCH", "1") == "1")
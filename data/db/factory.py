@@ -0,0 +1,34 @@
+"""
+Storage Adapter Factory
+Selects the patient storage backend from the environment
+"""
+
+import os
+import logging
+
+from data.db.json_adapter import JSONAdapter
+
+logger = logging.getLogger(__name__)
+
+
+def create_adapter(backend: str = None) -> JSONAdapter:
+    """
+    Create the configured storage adapter.
+    EMR_DB_BACKEND=sqlite selects SQLiteAdapter (path from EMR_DB_PATH),
+    anything else keeps the JSON file adapter. EMR_DB_JOURNAL=1 turns on
+    the JSON adapter's append-only visit journal and EMR_DB_CODEC picks
+    its snapshot encoding (json, orjson or msgpack).
+    """
+    backend = (backend or os.getenv("EMR_DB_BACKEND", "json")).lower()
+
+    if backend == "sqlite":
+        from data.db.sqlite_adapter import SQLiteAdapter
+        return SQLiteAdapter(os.getenv("EMR_DB_PATH", "data/patients.db"))
+
+    if backend != "json":
+        logger.warning(f"Unknown storage backend '{backend}', using JSON")
+
+    return JSONAdapter(
+        journal=os.getenv("EMR_DB_JOURNAL", "0") == "1",
+        codec=os.getenv("EMR_DB_CODEC", "json")
+    )
@@ -6,31 +6,95 @@ Future: Can be swapped with SQL adapter without changing business logic
 
 import os
 import json
-from typing import Dict, List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterable, Iterator, List, Optional
 import logging
 from pathlib import Path
 
+from data.db.codecs import JSONCodec, decode_record, get_codec
+from data.db.config_registry import config_registry
+from data.db.patient_cache import PatientCache, patient_cache
+from data.db.patient_index import PatientIndex, SUMMARY_FIELDS
+from data.db.sharding import (
+    SHARDED, ShardManifest, hold_store, open_manifest, patient_files, shard_dir
+)
+from core.visits.symptom_tracking import update_symptom_tracking
+
 logger = logging.getLogger(__name__)
 
+# Serializes journal appends and compactions across adapter instances
+_journal_lock = threading.RLock()
+
 
 class JSONAdapter:
     """
     Adapter for JSON file-based storage.
     Implements a clean interface that can be replaced with SQL later.
+    
+    In journal mode, visit creations and updates are appended to a small
+    per-patient log ({id}.journal) and folded into the snapshot on read.
+    An entry carries only the visit's newly tracked symptoms, which replay
+    adds to symptom_tracking, so its size does not grow with the history.
+    The snapshot is rewritten once the log reaches compact_every entries.
+    
+    Parsed records are kept in a shared LRU cache validated against the
+    snapshot and journal mtime/size, so repeated loads skip the disk.
+    
+    Mobile, name and registration-date indexes are updated on every write
+    so lookups and the patient list don't need to parse every record.
+    
+    Files are either flat (data_dir/{id}.json) or, after running
+    python -m data.db.sharding migrate, spread over hashed two-level shard
+    directories. A manifest keeps running count/size totals either way.
+    
+    Snapshots are written with the configured codec (minified JSON by
+    default, or orjson/msgpack when installed); reads detect the codec.
+    JSON snapshots get a {id}.vidx sidecar with the byte range of each
+    visit, so a page of visits can be read without parsing the history.
     """
     
-    def __init__(self, data_dir: str = "data/patients"):
+    def __init__(self, data_dir: str = "data/patients", journal: bool = False,
+                 compact_every: int = 50, cache: Optional[PatientCache] = None,
+                 codec: str = "json"):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.journal = journal
+        self.compact_every = compact_every
+        self.codec = get_codec(codec)
+        self.cache = cache if cache is not None else patient_cache
+        self._cache_prefix = str(self.data_dir.resolve())
+        
+        self.manifest = self._open_manifest()
+        
+        self.index = self._open_index()
+        self._check_index()
         
     def save_patient(self, patient_data: Dict) -> bool:
         """Save patient data to JSON file"""
         try:
             patient_id = patient_data['id']
-            filepath = self.data_dir / f"{patient_id}.json"
+            filepath = self._patient_path(patient_id)
+            filepath.parent.mkdir(parents=True, exist_ok=True)
             
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(patient_data, f, indent=2, ensure_ascii=False)
+            with _journal_lock:
+                old_bytes = self._stored_bytes(patient_id)
+                is_new = not filepath.exists()
+                self.index.mark_pending(patient_id)
+                
+                # Replace atomically; a torn snapshot would lose the journal's base
+                data, visit_index = self._encode_snapshot(patient_data)
+                tmp_path = filepath.with_suffix('.json.tmp')
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, filepath)
+                self._write_visit_index(patient_id, visit_index)
+                
+                # The snapshot now holds the full state
+                self._journal_path(patient_id).unlink(missing_ok=True)
+                self.manifest.apply(int(is_new), self._stored_bytes(patient_id) - old_bytes)
+                self.cache.invalidate(self._cache_key(patient_id))
+                self.index.upsert(patient_data)
             
             logger.info(f"Saved patient {patient_id}")
             return True
@@ -42,13 +106,21 @@ class JSONAdapter:
     def load_patient(self, patient_id: str) -> Optional[Dict]:
         """Load patient data from JSON file"""
         try:
-            filepath = self.data_dir / f"{patient_id}.json"
+            filepath = self._patient_path(patient_id)
             
             if not filepath.exists():
                 return None
             
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            cache_key = self._cache_key(patient_id)
+            validator = self._cache_validator(patient_id)
+            
+            patient_data = self.cache.get(cache_key, validator)
+            if patient_data is not None:
+                return patient_data
+            
+            patient_data = self._apply_journal(decode_record(filepath.read_bytes()))
+            self.cache.put(cache_key, validator, patient_data)
+            return patient_data
                 
         except Exception as e:
             logger.error(f"Error loading patient {patient_id}: {e}")
@@ -57,10 +129,18 @@ class JSONAdapter:
     def delete_patient(self, patient_id: str) -> bool:
         """Delete patient JSON file"""
         try:
-            filepath = self.data_dir / f"{patient_id}.json"
+            filepath = self._patient_path(patient_id)
             
             if filepath.exists():
-                filepath.unlink()
+                with _journal_lock:
+                    old_bytes = self._stored_bytes(patient_id)
+                    self.index.mark_pending(patient_id)
+                    filepath.unlink()
+                    self._journal_path(patient_id).unlink(missing_ok=True)
+                    self._visit_index_path(patient_id).unlink(missing_ok=True)
+                    self.manifest.apply(-1, -old_bytes)
+                self.cache.invalidate(self._cache_key(patient_id))
+                self.index.remove(patient_id)
                 logger.info(f"Deleted patient {patient_id}")
                 return True
             
@@ -75,11 +155,10 @@ class JSONAdapter:
         patients = []
         
         try:
-            for filepath in self.data_dir.glob("*.json"):
+            for filepath in self._patient_files():
                 try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        patient_data = json.load(f)
-                        patients.append(patient_data)
+                    patient_data = decode_record(filepath.read_bytes())
+                    patients.append(self._apply_journal(patient_data))
                 except Exception as e:
                     logger.warning(f"Error reading {filepath}: {e}")
                     continue
@@ -90,23 +169,401 @@ class JSONAdapter:
             logger.error(f"Error getting all patients: {e}")
             return []
     
+    def iter_patients(self, fields: Optional[Iterable[str]] = None,
+                      workers: int = 4) -> Iterator[Dict]:
+        """
+        Stream patient records for whole-database scans.
+        Files are parsed concurrently and yielded as they are ready (in no
+        particular order). With fields, only those keys (plus id) are kept.
+        At most 2 * workers records are in flight at any time.
+        """
+        keep = set(fields) | {'id'} if fields else None
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            
+            for filepath in self._patient_files():
+                pending.add(pool.submit(self._read_patient_file, filepath, keep))
+                
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from _completed_records(done)
+            
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from _completed_records(done)
+    
+    def _read_patient_file(self, filepath: Path, keep: Optional[set]) -> Optional[Dict]:
+        """Parse one patient file for iter_patients, projecting to keep"""
+        try:
+            patient_data = self._apply_journal(decode_record(filepath.read_bytes()))
+            
+            return project_fields(patient_data, keep)
+            
+        except Exception as e:
+            logger.warning(f"Error reading {filepath}: {e}")
+            return None
+    
+    def append_visit(self, patient_id: str, visit: Dict,
+                     patient_fields: Optional[Dict] = None,
+                     track: Optional[Dict] = None) -> bool:
+        """
+        Add a visit to a patient record.
+        patient_fields replaces top-level keys in the same write; track
+        ({'symptoms': [...], 'visit_date': ...}) adds the visit's symptoms
+        to symptom_tracking.
+        """
+        entry = {'op': 'add_visit', 'visit': visit}
+        if patient_fields:
+            entry['fields'] = patient_fields
+        if track:
+            entry['track'] = track
+        return self._write_entry(patient_id, entry)
+    
+    def update_visit(self, patient_id: str, visit_id: str, updates: Dict,
+                     patient_fields: Optional[Dict] = None,
+                     track: Optional[Dict] = None) -> bool:
+        """Merge updates into one visit of a patient record"""
+        entry = {'op': 'update_visit', 'visit_id': visit_id, 'updates': updates}
+        if patient_fields:
+            entry['fields'] = patient_fields
+        if track:
+            entry['track'] = track
+        return self._write_entry(patient_id, entry)
+    
+    def update_visits(self, patient_id: str, updates: Dict[str, Dict],
+                      patient_fields: Optional[Dict] = None) -> bool:
+        """
+        Merge updates into several visits at once, keyed by visit_id.
+        Written as one snapshot rather than a journal entry per visit.
+        """
+        try:
+            with _journal_lock:
+                patient_data = self.load_patient(patient_id)
+                if not patient_data:
+                    return False
+                
+                for visit in patient_data.get('visits', []):
+                    if visit.get('visit_id') in updates:
+                        visit.update(updates[visit['visit_id']])
+                patient_data.update(patient_fields or {})
+                return self.save_patient(patient_data)
+            
+        except Exception as e:
+            logger.error(f"Error updating visits for patient {patient_id}: {e}")
+            return False
+    
+    def compact_patient(self, patient_id: str) -> bool:
+        """Fold the journal into the snapshot and drop the journal"""
+        with _journal_lock:
+            if not self._journal_path(patient_id).exists():
+                return True
+            
+            patient_data = self.load_patient(patient_id)
+            if not patient_data:
+                return False
+            
+            return self.save_patient(patient_data)
+    
+    def _write_entry(self, patient_id: str, entry: Dict) -> bool:
+        """Append a journal entry, or apply it to the snapshot directly"""
+        try:
+            with _journal_lock:
+                if not self.journal:
+                    patient_data = self.load_patient(patient_id)
+                    if not patient_data:
+                        return False
+                    
+                    _apply_entry(patient_data, entry)
+                    return self.save_patient(patient_data)
+                
+                if not self.patient_exists(patient_id):
+                    return False
+                
+                if self._touches_index(entry):
+                    self.index.mark_pending(patient_id)
+                journal_path = self._journal_path(patient_id)
+                line = json.dumps(entry, ensure_ascii=False) + "\n"
+                with open(journal_path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+                self.manifest.apply(bytes_delta=len(line.encode('utf-8')))
+                self.cache.invalidate(self._cache_key(patient_id))
+                self._update_index(patient_id, entry)
+                
+                with open(journal_path, 'r', encoding='utf-8') as f:
+                    entry_count = sum(1 for _ in f)
+                
+                if entry_count >= self.compact_every:
+                    self.compact_patient(patient_id)
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error writing journal for patient {patient_id}: {e}")
+            return False
+    
+    def _apply_journal(self, patient_data: Dict) -> Dict:
+        """Fold any pending journal entries into a loaded snapshot"""
+        for entry in self._read_journal(patient_data.get('id', '')):
+            try:
+                _apply_entry(patient_data, entry)
+            except KeyError as e:
+                logger.warning(f"Skipping bad journal entry for {patient_data.get('id')}: {e}")
+        
+        return patient_data
+    
+    def _read_journal(self, patient_id: str) -> List[Dict]:
+        """Pending journal entries in write order"""
+        journal_path = self._journal_path(patient_id)
+        
+        if not journal_path.exists():
+            return []
+        
+        entries = []
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError as e:
+                    # A torn last line from an interrupted append
+                    logger.warning(f"Skipping bad journal entry in {journal_path}: {e}")
+        
+        return entries
+    
+    def load_patient_page(self, patient_id: str, limit: Optional[int] = None,
+                          since: Optional[str] = None,
+                          until: Optional[str] = None) -> Optional[Dict]:
+        """
+        Patient header plus a page of visits, newest first.
+        since/until bound the visit timestamp (inclusive ISO strings).
+        Returns {'patient': header without visits, 'visits': page,
+        'total_visits': n}. Only the selected visits are parsed when the
+        snapshot has a valid .vidx sidecar.
+        """
+        try:
+            filepath = self._patient_path(patient_id)
+            
+            if not filepath.exists():
+                return None
+            
+            visit_index = self._load_visit_index(patient_id)
+            if visit_index is None:
+                return _page_from_record(self.load_patient(patient_id), limit, since, until)
+            
+            with open(filepath, 'rb') as f:
+                header = decode_record(f.read(visit_index['header_end']) + b'}')
+                
+                candidates = [
+                    (timestamp, (start, end))
+                    for timestamp, start, end in visit_index['visits']
+                ]
+                updates = []
+                for entry in self._read_journal(patient_id):
+                    if entry.get('op') == 'add_visit':
+                        visit = entry['visit']
+                        candidates.append((visit.get('timestamp') or '', visit))
+                    elif entry.get('op') == 'update_visit':
+                        updates.append(entry)
+                    _apply_patient_fields(header, entry)
+                
+                visits = []
+                for _, source in _select_page(candidates, limit, since, until):
+                    if isinstance(source, dict):
+                        visits.append(source)
+                    else:
+                        f.seek(source[0])
+                        visits.append(decode_record(f.read(source[1] - source[0])))
+            
+            by_id = {visit.get('visit_id'): visit for visit in visits}
+            for entry in updates:
+                if entry['visit_id'] in by_id:
+                    by_id[entry['visit_id']].update(entry['updates'])
+            
+            return {'patient': header, 'visits': visits, 'total_visits': len(candidates)}
+            
+        except Exception as e:
+            logger.error(f"Error loading visit page for {patient_id}: {e}")
+            return None
+    
+    def _encode_snapshot(self, patient_data: Dict):
+        """
+        Encode a snapshot; for JSON codecs also return the visit byte ranges.
+        Visits are written last so the header is a prefix of the file.
+        """
+        if not isinstance(self.codec, JSONCodec):
+            return self.codec.encode(patient_data), None
+        
+        header = {k: v for k, v in patient_data.items() if k != 'visits'}
+        head = self.codec.encode(header)[:-1]
+        parts = [head, b',"visits":[' if len(head) > 1 else b'"visits":[']
+        position = sum(len(part) for part in parts)
+        offsets = []
+        
+        for i, visit in enumerate(patient_data.get('visits', [])):
+            if i:
+                parts.append(b',')
+                position += 1
+            data = self.codec.encode(visit)
+            offsets.append([visit.get('timestamp') or '', position, position + len(data)])
+            parts.append(data)
+            position += len(data)
+        
+        parts.append(b']}')
+        return b''.join(parts), {'header_end': len(head), 'visits': offsets}
+    
+    def _write_visit_index(self, patient_id: str, visit_index: Optional[Dict]):
+        """Write (or drop) the .vidx sidecar for the snapshot just written"""
+        index_path = self._visit_index_path(patient_id)
+        
+        if visit_index is None:
+            index_path.unlink(missing_ok=True)
+            return
+        
+        stat = self._patient_path(patient_id).stat()
+        visit_index['size'] = stat.st_size
+        visit_index['mtime_ns'] = stat.st_mtime_ns
+        
+        tmp_path = index_path.with_suffix('.vidx.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(visit_index, f, separators=(',', ':'))
+        os.replace(tmp_path, index_path)
+    
+    def _load_visit_index(self, patient_id: str) -> Optional[Dict]:
+        """The .vidx sidecar, or None if missing or stale"""
+        index_path = self._visit_index_path(patient_id)
+        
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                visit_index = json.load(f)
+            stat = self._patient_path(patient_id).stat()
+        except (FileNotFoundError, ValueError):
+            return None
+        
+        if (visit_index.get('size'), visit_index.get('mtime_ns')) != \
+                (stat.st_size, stat.st_mtime_ns):
+            return None
+        
+        return visit_index
+    
+    def find_patient_id_by_mobile(self, mobile: str) -> Optional[str]:
+        """Indexed mobile number lookup"""
+        return self.index.find_by_mobile(mobile)
+    
+    def get_patient_summaries(self, limit: Optional[int] = None) -> List[Dict]:
+        """Patient list summaries from the index, newest registration first"""
+        return self.index.summaries(limit)
+    
+    def search_patient_summaries(self, search_term: str) -> List[Dict]:
+        """Search patients by name or mobile using the index"""
+        return self.index.search(search_term)
+    
+    def rebuild_index(self):
+        """Rebuild the secondary indexes from a full, streamed scan"""
+        self.index.rebuild(self.iter_patients())
+    
+    def _check_index(self):
+        """
+        Repair the index after an interrupted write: re-index patients still
+        marked pending, then rebuild if the indexed count disagrees with the
+        stored one
+        """
+        if not self.index.is_built():
+            self.rebuild_index()
+            return
+        
+        for patient_id in self.index.pending_ids():
+            patient_data = self.load_patient(patient_id)
+            if patient_data:
+                self.index.upsert(patient_data)
+            else:
+                self.index.remove(patient_id)
+        
+        indexed, stored = self.index.count(), self.get_patient_count()
+        if indexed != stored:
+            logger.warning(f"Patient index holds {indexed} patients, store has {stored}; rebuilding")
+            self.rebuild_index()
+    
+    def _update_index(self, patient_id: str, entry: Dict):
+        """Keep the index in step with a journal entry"""
+        if entry['op'] == 'add_visit':
+            self.index.record_visit(patient_id, entry['visit'])
+        
+        if set(entry.get('fields', {})) & set(SUMMARY_FIELDS):
+            self.index.upsert(self.load_patient(patient_id))
+    
+    @staticmethod
+    def _touches_index(entry: Dict) -> bool:
+        """Whether _update_index will write for this entry"""
+        return (entry['op'] == 'add_visit'
+                or bool(set(entry.get('fields', {})) & set(SUMMARY_FIELDS)))
+    
+    def _open_index(self) -> PatientIndex:
+        return PatientIndex(self._index_path())
+    
+    def _index_path(self) -> Path:
+        return self.data_dir / "_index" / "patient_index.db"
+    
+    def _open_manifest(self) -> ShardManifest:
+        """Load the layout manifest, creating it from a scan on first use"""
+        hold_store(self.data_dir)
+        manifest = open_manifest(self.data_dir / "_index" / "manifest.json")
+        if not manifest.exists():
+            manifest.rebuild(self.data_dir)
+        return manifest
+    
+    def _patient_path(self, patient_id: str) -> Path:
+        if self.manifest.layout == SHARDED:
+            return shard_dir(self.data_dir, patient_id) / f"{patient_id}.json"
+        return self.data_dir / f"{patient_id}.json"
+    
+    def _patient_files(self):
+        return patient_files(self.data_dir, self.manifest.layout)
+    
+    def _journal_path(self, patient_id: str) -> Path:
+        return self._patient_path(patient_id).with_suffix('.journal')
+    
+    def _visit_index_path(self, patient_id: str) -> Path:
+        return self._patient_path(patient_id).with_suffix('.vidx')
+    
+    def _stored_bytes(self, patient_id: str) -> int:
+        """Bytes on disk for a patient's snapshot and journal"""
+        total = 0
+        for path in (self._patient_path(patient_id), self._journal_path(patient_id)):
+            try:
+                total += path.stat().st_size
+            except FileNotFoundError:
+                pass
+        return total
+    
+    def _cache_key(self, patient_id: str) -> tuple:
+        return (self._cache_prefix, patient_id)
+    
+    def _cache_validator(self, patient_id: str) -> tuple:
+        """mtime/size of the snapshot and journal; any write changes it"""
+        validator = []
+        for path in (self._patient_path(patient_id), self._journal_path(patient_id)):
+            try:
+                stat = path.stat()
+                validator.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                validator.append(None)
+        return tuple(validator)
+    
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters of the patient record cache"""
+        return self.cache.stats()
+    
     def patient_exists(self, patient_id: str) -> bool:
         """Check if patient exists"""
-        filepath = self.data_dir / f"{patient_id}.json"
-        return filepath.exists()
+        return self._patient_path(patient_id).exists()
     
     def get_patient_count(self) -> int:
-        """Get total number of patients"""
-        return len(list(self.data_dir.glob("*.json")))
+        """Get total number of patients (from the manifest)"""
+        return self.manifest.count
     
     def get_database_size_mb(self) -> float:
-        """Get total size of all patient files in MB"""
-        total_size = 0
-        
-        for filepath in self.data_dir.glob("*.json"):
-            total_size += filepath.stat().st_size
-        
-        return round(total_size / (1024 * 1024), 2)
+        """Get total size of all patient files in MB (from the manifest)"""
+        return round(self.manifest.total_bytes / (1024 * 1024), 2)
     
     def backup_patient(self, patient_id: str) -> bool:
         """Create backup of patient data"""
@@ -133,20 +590,18 @@ class JSONAdapter:
             return False
     
     def load_config(self, config_name: str) -> Dict:
-        """Load configuration file from data/config"""
-        try:
-            config_path = Path("data/config") / f"{config_name}.json"
-            
-            if not config_path.exists():
-                logger.warning(f"Config file not found: {config_name}")
-                return {}
-            
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-                
-        except Exception as e:
-            logger.error(f"Error loading config {config_name}: {e}")
+        """
+        Load configuration file from data/config.
+        Returns the registry's shared read-only view; use
+        thaw() from data.db.config_registry for a copy to edit.
+        """
+        config_data = config_registry.get(config_name)
+        
+        if config_data is None:
+            logger.warning(f"Config file not found: {config_name}")
             return {}
+        
+        return config_data
     
     def save_config(self, config_name: str, config_data: Dict) -> bool:
         """Save configuration file"""
@@ -158,10 +613,77 @@ class JSONAdapter:
             
             with open(config_path, 'w', encoding='utf-8') as f:
                 json.dump(config_data, f, indent=2, ensure_ascii=False)
+            config_registry.reload(config_name)
             
             logger.info(f"Saved config {config_name}")
             return True
             
         except Exception as e:
             logger.error(f"Error saving config {config_name}: {e}")
-            return False
\ No newline at end of file
+            return False
+
+
+def project_fields(patient_data: Dict, keep: Optional[set]) -> Dict:
+    """Keep only the requested top-level keys"""
+    if keep is None:
+        return patient_data
+    return {k: v for k, v in patient_data.items() if k in keep}
+
+
+def _select_page(candidates: List, limit: Optional[int], since: Optional[str],
+                 until: Optional[str]) -> List:
+    """Newest-first page of (timestamp, source) pairs within the time range"""
+    selected = [
+        candidate for candidate in candidates
+        if (since is None or candidate[0] >= since)
+        and (until is None or candidate[0] <= until)
+    ]
+    selected.sort(key=lambda candidate: candidate[0], reverse=True)
+    return selected if limit is None else selected[:limit]
+
+
+def _page_from_record(patient_data: Optional[Dict], limit: Optional[int],
+                      since: Optional[str], until: Optional[str]) -> Optional[Dict]:
+    """load_patient_page result built from a fully loaded record"""
+    if patient_data is None:
+        return None
+    
+    visits = patient_data.pop('visits', [])
+    candidates = [(visit.get('timestamp') or '', visit) for visit in visits]
+    
+    return {
+        'patient': patient_data,
+        'visits': [visit for _, visit in _select_page(candidates, limit, since, until)],
+        'total_visits': len(visits)
+    }
+
+
+def _completed_records(futures) -> Iterator[Dict]:
+    for future in futures:
+        record = future.result()
+        if record is not None:
+            yield record
+
+
+def _apply_entry(patient_data: Dict, entry: Dict):
+    """Apply a single journal entry to a patient record in place"""
+    if entry['op'] == 'add_visit':
+        patient_data.setdefault('visits', []).append(entry['visit'])
+    elif entry['op'] == 'update_visit':
+        for visit in patient_data.get('visits', []):
+            if visit.get('visit_id') == entry['visit_id']:
+                visit.update(entry['updates'])
+                break
+    else:
+        raise KeyError(f"Unknown journal op {entry['op']}")
+    
+    _apply_patient_fields(patient_data, entry)
+
+
+def _apply_patient_fields(patient_data: Dict, entry: Dict):
+    """Apply an entry's top-level fields and tracked symptoms"""
+    patient_data.update(entry.get('fields', {}))
+    if 'track' in entry:
+        update_symptom_tracking(
+            patient_data, entry['track']['symptoms'], entry['track']['visit_date']
+        )
@@ -0,0 +1,96 @@
+"""
+Patient Record Cache
+Bounded, thread-safe LRU cache of parsed patient records shared by all adapters
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PatientCache:
+    """
+    LRU cache of parsed patient records.
+    Each entry carries a validator (e.g. file mtime/size); a lookup with a
+    different validator counts as a miss and drops the stale entry.
+    Records are copied on the way in and out so callers can mutate freely.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, validator: Any) -> Optional[Dict]:
+        """Return a copy of the cached record, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry[0] != validator:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            record = entry[1]
+
+        return _clone(record)
+
+    def put(self, key: Hashable, validator: Any, record: Dict):
+        """Store a copy of a record"""
+        if self.maxsize <= 0:
+            return
+
+        record = _clone(record)
+
+        with self._lock:
+            self._entries[key] = (validator, record)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        """Drop one record"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop all records and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0
+            }
+
+
+def _clone(value: Any) -> Any:
+    """Copy a JSON-shaped value (dicts, lists and scalars)"""
+    if isinstance(value, dict):
+        return {k: _clone(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_clone(v) for v in value]
+    return value
+
+
+# Shared by every adapter in the process so the separate route modules
+# hit the same entries during a single Streamlit rerun
+patient_cache = PatientCache()
@@ -0,0 +1,336 @@
+"""
+Patient Secondary Indexes
+Mobile, name-token, substring and registration-date lookups maintained on
+every write
+Stored in SQLite tables so each update is a small atomic transaction
+"""
+
+import re
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Patient keys copied into the summary row
+SUMMARY_FIELDS = ('name', 'age', 'sex', 'mobile', 'registration_date')
+
+# Bump when the tables below change; older indexes are dropped and rebuilt
+INDEX_VERSION = '2'
+
+_INDEX_TABLES = ('patient_index', 'name_tokens', 'name_trigrams', 'pending')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS patient_index (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    age INTEGER,
+    sex TEXT,
+    mobile TEXT,
+    mobile_reversed TEXT,
+    registration_date TEXT,
+    visit_count INTEGER NOT NULL DEFAULT 0,
+    last_visit TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_index_mobile ON patient_index(mobile);
+CREATE INDEX IF NOT EXISTS idx_index_mobile_reversed ON patient_index(mobile_reversed);
+CREATE INDEX IF NOT EXISTS idx_index_registration ON patient_index(registration_date);
+
+CREATE TABLE IF NOT EXISTS name_tokens (
+    token TEXT NOT NULL,
+    id TEXT NOT NULL,
+    PRIMARY KEY (token, id)
+);
+CREATE INDEX IF NOT EXISTS idx_name_tokens_id ON name_tokens(id);
+
+CREATE TABLE IF NOT EXISTS pending (
+    id TEXT PRIMARY KEY
+);
+"""
+
+_META_SCHEMA = """
+CREATE TABLE IF NOT EXISTS index_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Rowids follow patient_index, so a patient's row is found without a scan
+_TRIGRAM_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS name_trigrams
+USING fts5(name, mobile, tokenize='trigram')
+"""
+
+_SUMMARY_COLUMNS = "id, name, age, sex, mobile, registration_date, visit_count, last_visit"
+
+
+class PatientIndex:
+    """
+    Secondary indexes over patient records.
+    - mobile -> id for O(1) duplicate checks at registration
+    - normalized name tokens and mobile prefixes/suffixes -> ids for search
+    - trigrams of name and mobile for substring search (SQLite 3.34+)
+    - registration-date ordered summaries for the patient list
+    
+    Writers whose records live elsewhere call mark_pending before touching
+    them; every index write clears the mark, so ids still pending after a
+    crash name the entries that may be stale.
+    
+    connect lets an adapter whose records share the index's database pass
+    its own per-thread connection; an index write made last inside the
+    adapter's `with conn:` block then commits together with its rows.
+    """
+
+    def __init__(self, index_path: Path,
+                 connect: Optional[Callable[[], sqlite3.Connection]] = None):
+        self.index_path = Path(index_path)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        if connect is not None:
+            self._connect = connect
+
+        conn = self._connect()
+        conn.executescript(_META_SCHEMA)
+        built = self._built_version(conn)
+        if built is not None and built != INDEX_VERSION:
+            logger.info(f"Patient index format {built} is outdated, rebuilding")
+            for table in _INDEX_TABLES:
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.execute("DELETE FROM index_meta")
+        conn.executescript(_SCHEMA)
+        try:
+            conn.execute(_TRIGRAM_SCHEMA)
+            self._trigrams = True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"No trigram tokenizer, substring search limited to prefixes: {e}")
+            self._trigrams = False
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the connection for the current thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.index_path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def upsert(self, patient_data: Dict):
+        """Index (or re-index) one full patient record"""
+        with self._connect() as conn:
+            self._write(conn, patient_data)
+
+    def mark_pending(self, patient_id: str):
+        """Flag a patient whose record is about to change outside the index"""
+        with self._connect() as conn:
+            conn.execute("INSERT OR IGNORE INTO pending (id) VALUES (?)", (patient_id,))
+
+    def pending_ids(self) -> List[str]:
+        """Patients marked pending whose index write never happened"""
+        return [patient_id for (patient_id,) in self._connect().execute("SELECT id FROM pending")]
+
+    def count(self) -> int:
+        """Number of indexed patients"""
+        return self._connect().execute("SELECT COUNT(*) FROM patient_index").fetchone()[0]
+
+    def record_visit(self, patient_id: str, visit: Dict):
+        """Bump visit count and last visit without re-reading the record"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE patient_index SET visit_count = visit_count + 1, last_visit = ? "
+                "WHERE id = ?",
+                (visit.get('timestamp'), patient_id)
+            )
+            conn.execute("DELETE FROM pending WHERE id = ?", (patient_id,))
+
+    def remove(self, patient_id: str):
+        """Drop a patient from all indexes"""
+        with self._connect() as conn:
+            self._remove_trigrams(conn, patient_id)
+            conn.execute("DELETE FROM patient_index WHERE id = ?", (patient_id,))
+            conn.execute("DELETE FROM name_tokens WHERE id = ?", (patient_id,))
+            conn.execute("DELETE FROM pending WHERE id = ?", (patient_id,))
+
+    def rebuild(self, patients: Iterable[Dict]):
+        """Rebuild every index from a full scan of patient records"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM patient_index")
+            conn.execute("DELETE FROM name_tokens")
+            conn.execute("DELETE FROM pending")
+            if self._trigrams:
+                conn.execute("DELETE FROM name_trigrams")
+            count = 0
+            for patient_data in patients:
+                self._write(conn, patient_data)
+                count += 1
+            conn.execute(
+                "INSERT OR REPLACE INTO index_meta (key, value) VALUES ('built', ?)",
+                (INDEX_VERSION,)
+            )
+        logger.info(f"Rebuilt patient index with {count} patients")
+
+    def is_built(self) -> bool:
+        """Whether the index has been populated in the current format"""
+        return self._built_version(self._connect()) == INDEX_VERSION
+
+    @staticmethod
+    def _built_version(conn: sqlite3.Connection) -> Optional[str]:
+        row = conn.execute("SELECT value FROM index_meta WHERE key = 'built'").fetchone()
+        return row[0] if row else None
+
+    def find_by_mobile(self, mobile: str) -> Optional[str]:
+        """Patient ID registered with this mobile number"""
+        row = self._connect().execute(
+            "SELECT id FROM patient_index WHERE mobile = ? "
+            "ORDER BY registration_date LIMIT 1",
+            (mobile,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def find_by_name_token(self, token: str) -> List[str]:
+        """Patient IDs whose name contains a token starting with the given prefix"""
+        token = token.lower()
+        return [
+            patient_id for (patient_id,) in self._connect().execute(
+                "SELECT DISTINCT id FROM name_tokens WHERE token >= ? AND token < ?",
+                (token, token + '\uffff')
+            )
+        ]
+
+    def summaries(self, limit: Optional[int] = None) -> List[Dict]:
+        """Patient summaries, newest registration first"""
+        query = (f"SELECT {_SUMMARY_COLUMNS} FROM patient_index "
+                 "ORDER BY registration_date DESC")
+        params = ()
+        if limit is not None:
+            query += " LIMIT ?"
+            params = (limit,)
+
+        return [self._summary_from_row(row) for row in self._connect().execute(query, params)]
+
+    def find_by_mobile_prefix(self, prefix: str) -> List[str]:
+        """Patient IDs whose mobile number starts with the given prefix"""
+        return self._range_ids('mobile', prefix)
+
+    def find_by_mobile_suffix(self, suffix: str) -> List[str]:
+        """Patient IDs whose mobile number ends with the given suffix"""
+        return self._range_ids('mobile_reversed', suffix[::-1])
+
+    def find_by_substring(self, text: str) -> List[str]:
+        """Patient IDs whose name or mobile contains text (3+ characters)"""
+        if not self._trigrams or len(text) < 3:
+            return []
+        phrase = '"' + text.replace('"', '""') + '"'
+        return [
+            patient_id for (patient_id,) in self._connect().execute(
+                "SELECT p.id FROM name_trigrams t JOIN patient_index p ON p.rowid = t.rowid "
+                "WHERE name_trigrams MATCH ?",
+                (phrase,)
+            )
+        ]
+
+    def search(self, search_term: str) -> List[Dict]:
+        """
+        Summaries matching a search term, using only indexed lookups.
+        Matches a name or mobile containing the term (as the old full scan
+        did), every word prefixing a name token, or the term prefixing or
+        ending the mobile. Terms under 3 characters skip the substring part.
+        """
+        search_term = search_term.lower().strip()
+        if not search_term:
+            return []
+
+        conn = self._connect()
+        ids = None
+        for word in tokenize_name(search_term):
+            word_ids = set(self.find_by_name_token(word))
+            ids = word_ids if ids is None else ids & word_ids
+
+        ids = ids or set()
+        ids.update(self.find_by_substring(search_term))
+        if not any(char.isspace() for char in search_term):
+            ids.update(self.find_by_mobile_prefix(search_term))
+            ids.update(self.find_by_mobile_suffix(search_term))
+
+        if not ids:
+            return []
+
+        placeholders = ','.join('?' * len(ids))
+        rows = conn.execute(
+            f"SELECT {_SUMMARY_COLUMNS} FROM patient_index WHERE id IN ({placeholders}) "
+            "ORDER BY registration_date DESC",
+            tuple(ids)
+        )
+        return [self._summary_from_row(row) for row in rows]
+
+    def _range_ids(self, column: str, prefix: str) -> List[str]:
+        """Patient IDs whose indexed column starts with prefix"""
+        return [
+            patient_id for (patient_id,) in self._connect().execute(
+                f"SELECT id FROM patient_index WHERE {column} >= ? AND {column} < ?",
+                (prefix, prefix + '\uffff')
+            )
+        ]
+
+    def _remove_trigrams(self, conn: sqlite3.Connection, patient_id: str):
+        if not self._trigrams:
+            return
+        row = conn.execute("SELECT rowid FROM patient_index WHERE id = ?", (patient_id,)).fetchone()
+        if row is not None:
+            conn.execute("DELETE FROM name_trigrams WHERE rowid = ?", row)
+
+    def _write(self, conn: sqlite3.Connection, patient_data: Dict):
+        patient_id = patient_data['id']
+        conn.execute("DELETE FROM pending WHERE id = ?", (patient_id,))
+        visits = patient_data.get('visits', [])
+        name = patient_data.get('name', '')
+        mobile = patient_data.get('mobile')
+
+        self._remove_trigrams(conn, patient_id)
+        cursor = conn.execute(
+            "INSERT OR REPLACE INTO patient_index "
+            "(id, name, age, sex, mobile, mobile_reversed, registration_date, "
+            "visit_count, last_visit) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                patient_id, name,
+                patient_data.get('age'), patient_data.get('sex'),
+                mobile, mobile[::-1] if isinstance(mobile, str) else None,
+                patient_data.get('registration_date'),
+                len(visits),
+                visits[-1].get('timestamp') if visits else None
+            )
+        )
+        if self._trigrams:
+            conn.execute(
+                "INSERT INTO name_trigrams (rowid, name, mobile) VALUES (?, ?, ?)",
+                (cursor.lastrowid, name, mobile if isinstance(mobile, str) else '')
+            )
+
+        conn.execute("DELETE FROM name_tokens WHERE id = ?", (patient_id,))
+        conn.executemany(
+            "INSERT OR IGNORE INTO name_tokens (token, id) VALUES (?, ?)",
+            [(token, patient_id) for token in tokenize_name(name)]
+        )
+
+    @staticmethod
+    def _summary_from_row(row) -> Dict:
+        patient_id, name, age, sex, mobile, registration_date, visit_count, last_visit = row
+        return {
+            'id': patient_id,
+            'name': name,
+            'age': age,
+            'sex': sex,
+            'mobile': mobile,
+            'registration_date': registration_date,
+            'visit_count': visit_count,
+            'last_visit': last_visit
+        }
+
+
+def tokenize_name(name: str) -> List[str]:
+    """Lowercase alphanumeric tokens of a patient name"""
+    return re.findall(r"[a-z0-9]+", (name or '').lower())
@@ -0,0 +1,282 @@
+"""
+Sharded Patient Directory Layout
+Hashed two-level directories plus a manifest with running count/size totals
+"""
+
+import os
+import json
+import hashlib
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator
+import logging
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: locking stays within the process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+FLAT = "flat"
+SHARDED = "sharded"
+
+# Only two-hex-digit directories are shards (skips backups/, _index/)
+SHARD_GLOB = "[0-9a-f][0-9a-f]/[0-9a-f][0-9a-f]/*.json"
+
+
+def shard_dir(data_dir: Path, patient_id: str) -> Path:
+    """data_dir/ab/cd for a patient whose ID hashes to abcd..."""
+    digest = hashlib.sha1(patient_id.encode('utf-8')).hexdigest()
+    return data_dir / digest[:2] / digest[2:4]
+
+
+def patient_files(data_dir: Path, layout: str) -> Iterator[Path]:
+    """All patient snapshot files for a layout"""
+    return data_dir.glob(SHARD_GLOB if layout == SHARDED else "*.json")
+
+
+class ShardManifest:
+    """
+    Records the directory layout and running totals of patient files.
+    Adapters apply deltas on every write so count/size queries never list
+    the directory.
+
+    Several processes may share a manifest (the app, backfill and rescreen
+    CLIs): reads pick up the file again whenever its mtime/size changes,
+    and updates re-read, change and rewrite it under an exclusive lock on
+    {manifest}.lock, so no process overwrites another's totals.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._lock_path = self.path.with_suffix('.lock')
+        self._layout = FLAT
+        self._count = 0
+        self._total_bytes = 0
+        self._stamp = None
+        self._refresh()
+
+    @property
+    def layout(self) -> str:
+        self._refresh()
+        return self._layout
+
+    @property
+    def count(self) -> int:
+        self._refresh()
+        return self._count
+
+    @property
+    def total_bytes(self) -> int:
+        self._refresh()
+        return self._total_bytes
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def apply(self, count_delta: int = 0, bytes_delta: int = 0):
+        """Apply a change in patient count and/or stored bytes"""
+        if not count_delta and not bytes_delta:
+            return
+
+        with self._file_lock():
+            self._refresh(force=True)
+            self._count += count_delta
+            self._total_bytes += bytes_delta
+            self._write()
+
+    def rebuild(self, data_dir: Path, layout: str = None):
+        """Recompute totals from a scan of the data directory"""
+        with self._file_lock():
+            self._refresh(force=True)
+            self._layout = layout or self._layout
+            self._count = 0
+            self._total_bytes = 0
+
+            for filepath in patient_files(data_dir, self._layout):
+                self._count += 1
+                self._total_bytes += filepath.stat().st_size
+                journal = filepath.with_suffix('.journal')
+                if journal.exists():
+                    self._total_bytes += journal.stat().st_size
+
+            self._write()
+
+        logger.info(f"Manifest rebuilt: {self._count} patients, {self._total_bytes} bytes")
+
+    def _refresh(self, force: bool = False):
+        """Re-read the manifest if another process has rewritten it"""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return
+
+        # Every write is a rename, so the inode changes too
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp and not force:
+            return
+
+        with self._lock:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._layout = data.get('layout', FLAT)
+            self._count = data.get('count', 0)
+            self._total_bytes = data.get('total_bytes', 0)
+            self._stamp = stamp
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive across threads and, where fcntl exists, processes"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+
+            self._lock_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write(self):
+        """Atomically replace the manifest file"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': 1,
+                'layout': self._layout,
+                'count': self._count,
+                'total_bytes': self._total_bytes,
+                'updated': datetime.now().isoformat()
+            }, f, indent=2)
+
+        os.replace(tmp_path, self.path)
+        stat = self.path.stat()
+        self._stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+_manifests = {}
+_manifests_lock = threading.Lock()
+
+
+def open_manifest(path: Path) -> ShardManifest:
+    """Shared manifest instance per file so adapters don't overwrite each other's totals"""
+    key = str(Path(path).resolve())
+    with _manifests_lock:
+        if key not in _manifests:
+            _manifests[key] = ShardManifest(path)
+        return _manifests[key]
+
+
+class StoreInUseError(RuntimeError):
+    """The data directory is open in another adapter or process"""
+
+
+# Shared store locks held by this process, one open file per data directory
+_store_locks = {}
+
+
+def hold_store(data_dir: Path):
+    """
+    Mark data_dir as open for the life of the process (a shared lock on
+    _index/store.lock), so a layout migration can tell it is in use
+    """
+    if fcntl is None:
+        return
+
+    key = str(Path(data_dir).resolve())
+    with _manifests_lock:
+        if key in _store_locks:
+            return
+        lock_path = Path(data_dir) / "_index" / "store.lock"
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(lock_path, 'a')
+        fcntl.flock(lock_file, fcntl.LOCK_SH)
+        _store_locks[key] = lock_file
+
+
+@contextmanager
+def exclusive_store(data_dir: Path):
+    """Hold data_dir exclusively; raises StoreInUseError if any adapter has it open"""
+    if fcntl is None:
+        yield
+        return
+
+    lock_path = Path(data_dir) / "_index" / "store.lock"
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'a') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise StoreInUseError(
+                f"{data_dir} is open in another process; stop the app before migrating"
+            )
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def migrate_to_sharded(data_dir: str = "data/patients") -> Dict:
+    """
+    Move flat data_dir/*.json (and journals) into the sharded layout.
+    Safe to re-run; files already in shards are left alone. Raises
+    StoreInUseError while an adapter in any process has data_dir open.
+    """
+    data_dir = Path(data_dir)
+    manifest = open_manifest(data_dir / "_index" / "manifest.json")
+    moved = 0
+
+    # Running adapters cache file paths by layout; refuse while any is open
+    with exclusive_store(data_dir):
+        for filepath in list(data_dir.glob("*.json")):
+            patient_id = filepath.stem
+            target_dir = shard_dir(data_dir, patient_id)
+            target_dir.mkdir(parents=True, exist_ok=True)
+
+            os.replace(filepath, target_dir / filepath.name)
+
+            for suffix in ('.journal', '.vidx'):
+                sidecar = filepath.with_suffix(suffix)
+                if sidecar.exists():
+                    os.replace(sidecar, target_dir / sidecar.name)
+
+            moved += 1
+
+        manifest.rebuild(data_dir, SHARDED)
+    logger.info(f"Moved {moved} patient files into shards under {data_dir}")
+
+    return {
+        "moved": moved,
+        "count": manifest.count,
+        "total_bytes": manifest.total_bytes
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Shard the patient data directory")
+    parser.add_argument("command", choices=["migrate", "rebuild-manifest"])
+    parser.add_argument("--data-dir", default="data/patients")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        try:
+            result = migrate_to_sharded(args.data_dir)
+        except StoreInUseError as e:
+            raise SystemExit(f"❌ {e}")
+        print(f"✅ Moved {result['moved']} files; manifest now lists {result['count']} patients")
+    else:
+        data_path = Path(args.data_dir)
+        manifest = open_manifest(data_path / "_index" / "manifest.json")
+        manifest.rebuild(data_path)
+        print(f"✅ Manifest lists {manifest.count} patients ({manifest.total_bytes} bytes)")
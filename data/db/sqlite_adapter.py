@@ -0,0 +1,558 @@
+"""
+SQLite Database Adapter
+Drop-in replacement for JSONAdapter backed by indexed SQLite tables
+Patient headers, visits and symptom tracking rows live in separate tables
+"""
+
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional
+import logging
+from pathlib import Path
+
+from data.db.json_adapter import JSONAdapter, project_fields
+from data.db.patient_index import PatientIndex
+from core.visits.symptom_tracking import update_symptom_tracking
+
+logger = logging.getLogger(__name__)
+
+# Keys stored in their own tables rather than in the header blob
+_ROW_KEYS = ('visits', 'symptom_tracking')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS patients (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    mobile TEXT,
+    registration_date TEXT,
+    header TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_patients_mobile ON patients(mobile);
+CREATE INDEX IF NOT EXISTS idx_patients_registration ON patients(registration_date);
+
+CREATE TABLE IF NOT EXISTS visits (
+    patient_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    visit_id TEXT,
+    timestamp TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (patient_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_visits_timestamp ON visits(patient_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_visits_visit_id ON visits(visit_id);
+
+CREATE TABLE IF NOT EXISTS symptom_tracking (
+    patient_id TEXT NOT NULL,
+    symptom TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    date TEXT,
+    entry TEXT NOT NULL,
+    PRIMARY KEY (patient_id, symptom, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_tracking_symptom ON symptom_tracking(symptom, date);
+"""
+
+
+class SQLiteAdapter(JSONAdapter):
+    """
+    Adapter for SQLite storage.
+    Exposes the same interface as JSONAdapter so PatientManager and
+    VisitManager can use it unchanged. Config files stay in data/config;
+    data_dir holds the remaining file-side data such as backups.
+    Patient files, journals and the shard manifest are not used.
+    """
+
+    def __init__(self, db_path: str = "data/patients.db", data_dir: str = "data/patients"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._init_schema()
+        super().__init__(data_dir)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the connection for the current thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        """Create tables and indexes if missing"""
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        conn.commit()
+
+    def save_patient(self, patient_data: Dict) -> bool:
+        """Save patient header, visits and symptom tracking rows"""
+        try:
+            patient_id = patient_data['id']
+            conn = self._connect()
+
+            with conn:
+                self._write_patient(conn, patient_data)
+                self.index.upsert(patient_data)
+
+            logger.info(f"Saved patient {patient_id}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error saving patient: {e}")
+            return False
+
+    def load_patient(self, patient_id: str) -> Optional[Dict]:
+        """Load and reassemble a patient record"""
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT header FROM patients WHERE id = ?", (patient_id,)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            patient_data = json.loads(row[0])
+            patient_data['visits'] = [
+                json.loads(data) for (data,) in conn.execute(
+                    "SELECT data FROM visits WHERE patient_id = ? ORDER BY seq",
+                    (patient_id,)
+                )
+            ]
+            patient_data['symptom_tracking'] = self._tracking_from_rows(
+                conn.execute(
+                    "SELECT symptom, entry FROM symptom_tracking "
+                    "WHERE patient_id = ? ORDER BY rowid",
+                    (patient_id,)
+                )
+            )
+            return patient_data
+
+        except Exception as e:
+            logger.error(f"Error loading patient {patient_id}: {e}")
+            return None
+
+    def load_patient_page(self, patient_id: str, limit: Optional[int] = None,
+                          since: Optional[str] = None,
+                          until: Optional[str] = None) -> Optional[Dict]:
+        """Patient header plus a page of visits, newest first, selected in SQL"""
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT header FROM patients WHERE id = ?", (patient_id,)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            header = json.loads(row[0])
+            header['symptom_tracking'] = self._tracking_from_rows(
+                conn.execute(
+                    "SELECT symptom, entry FROM symptom_tracking "
+                    "WHERE patient_id = ? ORDER BY rowid",
+                    (patient_id,)
+                )
+            )
+
+            where = "patient_id = ?"
+            params = [patient_id]
+            if since is not None:
+                where += " AND COALESCE(timestamp, '') >= ?"
+                params.append(since)
+            if until is not None:
+                where += " AND COALESCE(timestamp, '') <= ?"
+                params.append(until)
+
+            visits = [
+                json.loads(data) for (data,) in conn.execute(
+                    f"SELECT data FROM visits WHERE {where} "
+                    "ORDER BY COALESCE(timestamp, '') DESC, seq LIMIT ?",
+                    params + [-1 if limit is None else limit]
+                )
+            ]
+            (total,) = conn.execute(
+                "SELECT COUNT(*) FROM visits WHERE patient_id = ?", (patient_id,)
+            ).fetchone()
+
+            return {'patient': header, 'visits': visits, 'total_visits': total}
+
+        except Exception as e:
+            logger.error(f"Error loading visit page for {patient_id}: {e}")
+            return None
+
+    def delete_patient(self, patient_id: str) -> bool:
+        """Delete patient and all dependent rows"""
+        try:
+            conn = self._connect()
+
+            with conn:
+                cursor = conn.execute("DELETE FROM patients WHERE id = ?", (patient_id,))
+                conn.execute("DELETE FROM visits WHERE patient_id = ?", (patient_id,))
+                conn.execute("DELETE FROM symptom_tracking WHERE patient_id = ?", (patient_id,))
+                if cursor.rowcount:
+                    self.index.remove(patient_id)
+
+            if cursor.rowcount:
+                logger.info(f"Deleted patient {patient_id}")
+                return True
+
+            return False
+
+        except Exception as e:
+            logger.error(f"Error deleting patient {patient_id}: {e}")
+            return False
+
+    def get_all_patients(self) -> List[Dict]:
+        """Get all patient records using three table scans instead of one parse per file"""
+        try:
+            conn = self._connect()
+            patients = {}
+
+            for patient_id, header in conn.execute("SELECT id, header FROM patients"):
+                patient_data = json.loads(header)
+                patient_data['visits'] = []
+                patient_data['symptom_tracking'] = {}
+                patients[patient_id] = patient_data
+
+            for patient_id, data in conn.execute(
+                "SELECT patient_id, data FROM visits ORDER BY patient_id, seq"
+            ):
+                if patient_id in patients:
+                    patients[patient_id]['visits'].append(json.loads(data))
+
+            for patient_id, symptom, entry in conn.execute(
+                "SELECT patient_id, symptom, entry FROM symptom_tracking "
+                "ORDER BY rowid"
+            ):
+                if patient_id in patients:
+                    tracking = patients[patient_id]['symptom_tracking']
+                    tracking.setdefault(symptom, []).append(json.loads(entry))
+
+            return list(patients.values())
+
+        except Exception as e:
+            logger.error(f"Error getting all patients: {e}")
+            return []
+
+    def iter_patients(self, fields: Optional[Iterable[str]] = None,
+                      workers: int = 4) -> Iterator[Dict]:
+        """
+        Stream patient records one at a time.
+        Visit and tracking rows are only read when fields asks for them;
+        workers is accepted for interface parity with JSONAdapter.
+        """
+        keep = set(fields) | {'id'} if fields else None
+        header_only = keep is not None and not keep & set(_ROW_KEYS)
+
+        patient_ids = [
+            patient_id for (patient_id,) in self._connect().execute("SELECT id FROM patients")
+        ]
+
+        for patient_id in patient_ids:
+            if header_only:
+                row = self._connect().execute(
+                    "SELECT header FROM patients WHERE id = ?", (patient_id,)
+                ).fetchone()
+                patient_data = json.loads(row[0]) if row else None
+            else:
+                patient_data = self.load_patient(patient_id)
+
+            if patient_data is not None:
+                yield project_fields(patient_data, keep)
+
+    def append_visit(self, patient_id: str, visit: Dict,
+                     patient_fields: Optional[Dict] = None,
+                     track: Optional[Dict] = None) -> bool:
+        """Insert a single visit row (plus patient_fields and tracked symptoms) in one transaction"""
+        try:
+            conn = self._connect()
+
+            with conn:
+                if not self.patient_exists(patient_id):
+                    return False
+
+                seq = conn.execute(
+                    "SELECT COALESCE(MAX(seq) + 1, 0) FROM visits WHERE patient_id = ?",
+                    (patient_id,)
+                ).fetchone()[0]
+                conn.execute(
+                    "INSERT INTO visits (patient_id, seq, visit_id, timestamp, data) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (patient_id, seq, visit.get('visit_id'), visit.get('timestamp'),
+                     json.dumps(visit, ensure_ascii=False))
+                )
+
+                if patient_fields:
+                    self._write_fields(conn, patient_id, patient_fields)
+                if track:
+                    self._add_tracking(conn, patient_id, track)
+
+                self._update_index(patient_id, {
+                    'op': 'add_visit', 'visit': visit, 'fields': patient_fields or {}
+                })
+            return True
+
+        except Exception as e:
+            logger.error(f"Error appending visit for patient {patient_id}: {e}")
+            return False
+
+    def update_visit(self, patient_id: str, visit_id: str, updates: Dict,
+                     patient_fields: Optional[Dict] = None,
+                     track: Optional[Dict] = None) -> bool:
+        """Merge updates into a single visit row"""
+        try:
+            conn = self._connect()
+
+            with conn:
+                row = conn.execute(
+                    "SELECT seq, data FROM visits WHERE patient_id = ? AND visit_id = ?",
+                    (patient_id, visit_id)
+                ).fetchone()
+
+                if row is None:
+                    return False
+
+                seq, data = row
+                visit = json.loads(data)
+                visit.update(updates)
+                conn.execute(
+                    "UPDATE visits SET timestamp = ?, data = ? WHERE patient_id = ? AND seq = ?",
+                    (visit.get('timestamp'), json.dumps(visit, ensure_ascii=False),
+                     patient_id, seq)
+                )
+
+                if patient_fields:
+                    self._write_fields(conn, patient_id, patient_fields)
+                if track:
+                    self._add_tracking(conn, patient_id, track)
+
+                self._update_index(patient_id, {
+                    'op': 'update_visit', 'fields': patient_fields or {}
+                })
+            return True
+
+        except Exception as e:
+            logger.error(f"Error updating visit {visit_id}: {e}")
+            return False
+
+    def update_visits(self, patient_id: str, updates: Dict[str, Dict],
+                      patient_fields: Optional[Dict] = None) -> bool:
+        """Merge updates into several visit rows, keyed by visit_id, in one transaction"""
+        try:
+            conn = self._connect()
+
+            with conn:
+                if not self.patient_exists(patient_id):
+                    return False
+
+                rows = conn.execute(
+                    "SELECT seq, visit_id, data FROM visits WHERE patient_id = ?",
+                    (patient_id,)
+                ).fetchall()
+
+                changed = []
+                for seq, visit_id, data in rows:
+                    if visit_id not in updates:
+                        continue
+                    visit = json.loads(data)
+                    visit.update(updates[visit_id])
+                    changed.append((visit.get('timestamp'), json.dumps(visit, ensure_ascii=False),
+                                    patient_id, seq))
+                conn.executemany(
+                    "UPDATE visits SET timestamp = ?, data = ? WHERE patient_id = ? AND seq = ?",
+                    changed
+                )
+
+                if patient_fields:
+                    self._write_fields(conn, patient_id, patient_fields)
+
+                self._update_index(patient_id, {
+                    'op': 'update_visit', 'fields': patient_fields or {}
+                })
+            return True
+
+        except Exception as e:
+            logger.error(f"Error updating visits for patient {patient_id}: {e}")
+            return False
+
+    def compact_patient(self, patient_id: str) -> bool:
+        """Rows are updated in place, so there is nothing to compact"""
+        return self.patient_exists(patient_id)
+
+    def patient_exists(self, patient_id: str) -> bool:
+        """Check if patient exists"""
+        row = self._connect().execute(
+            "SELECT 1 FROM patients WHERE id = ?", (patient_id,)
+        ).fetchone()
+        return row is not None
+
+    def get_patient_count(self) -> int:
+        """Get total number of patients"""
+        return self._connect().execute("SELECT COUNT(*) FROM patients").fetchone()[0]
+
+    def get_database_size_mb(self) -> float:
+        """Get size of the database file and its WAL in MB"""
+        total_size = 0
+
+        for suffix in ('', '-wal'):
+            path = Path(f"{self.db_path}{suffix}")
+            if path.exists():
+                total_size += path.stat().st_size
+
+        return round(total_size / (1024 * 1024), 2)
+
+    def _open_manifest(self):
+        """Counts and sizes come straight from the database"""
+        return None
+
+    def _open_index(self) -> PatientIndex:
+        """Index tables share the adapter's connection, so they commit with the rows"""
+        return PatientIndex(self.db_path, connect=self._connect)
+
+    def _index_path(self) -> Path:
+        """Index tables live in the same database file"""
+        return self.db_path
+
+    def _write_patient(self, conn: sqlite3.Connection, patient_data: Dict):
+        """Replace all rows for one patient inside the caller's transaction"""
+        patient_id = patient_data['id']
+        header = {k: v for k, v in patient_data.items() if k not in _ROW_KEYS}
+
+        conn.execute(
+            "INSERT OR REPLACE INTO patients (id, name, mobile, registration_date, header) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                patient_id,
+                patient_data.get('name'),
+                patient_data.get('mobile'),
+                patient_data.get('registration_date'),
+                json.dumps(header, ensure_ascii=False)
+            )
+        )
+
+        conn.execute("DELETE FROM visits WHERE patient_id = ?", (patient_id,))
+        conn.executemany(
+            "INSERT INTO visits (patient_id, seq, visit_id, timestamp, data) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (patient_id, seq, visit.get('visit_id'), visit.get('timestamp'),
+                 json.dumps(visit, ensure_ascii=False))
+                for seq, visit in enumerate(patient_data.get('visits', []))
+            ]
+        )
+
+        self._write_tracking(conn, patient_id, patient_data.get('symptom_tracking', {}))
+
+    def _write_tracking(self, conn: sqlite3.Connection, patient_id: str, tracking: Dict):
+        """Replace the symptom tracking rows of one patient"""
+        conn.execute("DELETE FROM symptom_tracking WHERE patient_id = ?", (patient_id,))
+        conn.executemany(
+            "INSERT INTO symptom_tracking (patient_id, symptom, seq, date, entry) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (patient_id, symptom, seq, entry.get('date'),
+                 json.dumps(entry, ensure_ascii=False))
+                for symptom, entries in tracking.items()
+                for seq, entry in enumerate(entries)
+            ]
+        )
+
+    def _add_tracking(self, conn: sqlite3.Connection, patient_id: str, track: Dict):
+        """Insert only the tracking rows one visit's symptoms add"""
+        symptoms = {
+            symptom.strip().lower() for symptom in track['symptoms']
+            if isinstance(symptom, str) and symptom.strip()
+        }
+        if not symptoms:
+            return
+
+        placeholders = ", ".join("?" * len(symptoms))
+        current = {'symptom_tracking': self._tracking_from_rows(conn.execute(
+            "SELECT symptom, entry FROM symptom_tracking "
+            f"WHERE patient_id = ? AND symptom IN ({placeholders}) ORDER BY rowid",
+            (patient_id, *symptoms)
+        ))}
+        stored = {symptom: len(entries) for symptom, entries in current['symptom_tracking'].items()}
+
+        update_symptom_tracking(current, track['symptoms'], track['visit_date'])
+        conn.executemany(
+            "INSERT INTO symptom_tracking (patient_id, symptom, seq, date, entry) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (patient_id, symptom, seq, entries[seq].get('date'),
+                 json.dumps(entries[seq], ensure_ascii=False))
+                for symptom, entries in current['symptom_tracking'].items()
+                for seq in range(stored.get(symptom, 0), len(entries))
+            ]
+        )
+
+    def _write_fields(self, conn: sqlite3.Connection, patient_id: str, fields: Dict):
+        """Replace top-level patient fields without touching the visit rows"""
+        if 'symptom_tracking' in fields:
+            self._write_tracking(conn, patient_id, fields['symptom_tracking'])
+
+        header_fields = {k: v for k, v in fields.items() if k not in _ROW_KEYS}
+        if not header_fields:
+            return
+
+        row = conn.execute(
+            "SELECT header FROM patients WHERE id = ?", (patient_id,)
+        ).fetchone()
+        header = json.loads(row[0])
+        header.update(header_fields)
+
+        conn.execute(
+            "UPDATE patients SET name = ?, mobile = ?, registration_date = ?, header = ? "
+            "WHERE id = ?",
+            (header.get('name'), header.get('mobile'), header.get('registration_date'),
+             json.dumps(header, ensure_ascii=False), patient_id)
+        )
+
+    @staticmethod
+    def _tracking_from_rows(rows) -> Dict:
+        """Rebuild the symptom_tracking dict from (symptom, entry) rows"""
+        tracking = {}
+        for symptom, entry in rows:
+            tracking.setdefault(symptom, []).append(json.loads(entry))
+        return tracking
+
+
+def migrate_json_to_sqlite(json_dir: str = "data/patients",
+                           db_path: str = "data/patients.db") -> Dict:
+    """
+    One-shot migration of data/patients/*.json into a SQLite database.
+    Existing rows with the same patient ID are replaced.
+    """
+    source = JSONAdapter(json_dir)
+    target = SQLiteAdapter(db_path, data_dir=json_dir)
+    stats = {"migrated": 0, "failed": 0}
+
+    # Streamed: one parsed record in memory at a time
+    conn = target._connect()
+    with conn:
+        for patient_data in source.iter_patients():
+            try:
+                target._write_patient(conn, patient_data)
+                stats["migrated"] += 1
+            except Exception as e:
+                logger.warning(f"Could not migrate {patient_data.get('id')}: {e}")
+                stats["failed"] += 1
+
+    target.rebuild_index()
+
+    logger.info(f"Migrated {stats['migrated']} patients to {db_path}")
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Migrate JSON patient files to SQLite")
+    parser.add_argument("--json-dir", default="data/patients")
+    parser.add_argument("--db-path", default="data/patients.db")
+    args = parser.parse_args()
+
+    result = migrate_json_to_sqlite(args.json_dir, args.db_path)
+    print(f"✅ Migrated {result['migrated']} patients ({result['failed']} failed) to {args.db_path}")
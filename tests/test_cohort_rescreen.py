@@ -0,0 +1,45 @@
+"""
+Cohort rescreen checkpoints: failed patients are retried on resume
+"""
+
+from core.clinical.cohort_rescreen import RescreenRun, rescreen_cohort
+from data.db.json_adapter import JSONAdapter
+from data.db.patient_cache import PatientCache
+
+TRACKING = {
+    'fever': [{'date': "2024-01-01"}, {'date': "2024-02-01"}],
+    'rash': [{'date': "2024-02-01"}],
+}
+
+
+def patient(patient_id: str, timestamp: str) -> dict:
+    return {'id': patient_id, 'name': patient_id, 'age': 40, 'sex': 'F',
+            'symptom_tracking': TRACKING,
+            'visits': [{'visit_id': f"{patient_id}-V1", 'timestamp': timestamp}]}
+
+
+def test_failed_patients_are_retried_on_resume(tmp_path):
+    db = JSONAdapter(str(tmp_path / "patients"), cache=PatientCache())
+    db.save_patient(patient("A", "2024-02-01T10:00:00"))
+    db.save_patient(patient("B", "not a date"))
+    results_dir = str(tmp_path / "rescreen")
+
+    first = rescreen_cohort(db, results_dir=results_dir, workers=1)
+    assert first['failed'] == 1
+    assert first['patients_screened'] == 1
+
+    run = RescreenRun(tmp_path / "rescreen" / first['run_id'])
+    assert run.done_ids() == {"A"}
+    assert all('error' not in result for result in run.results())
+
+    # The run stays open; resuming screens only B again
+    assert run.load_meta()['status'] == 'running'
+    db.save_patient(patient("B", "2024-02-01T10:00:00"))
+    second = rescreen_cohort(db, results_dir=results_dir, workers=1)
+
+    assert second['run_id'] == first['run_id']
+    assert second['failed'] == 0
+    assert second['skipped_already_screened'] == 1
+    assert second['screened_this_session'] == 1
+    assert run.done_ids() == {"A", "B"}
+    assert run.load_meta()['status'] == 'complete'
@@ -0,0 +1,125 @@
+"""
+Background detection: retries, error clearing, and serialisation with
+visit deletion
+"""
+
+import threading
+import time
+
+import pytest
+
+from core.visits.detection_queue import COMPLETE, FAILED, DetectionQueue
+from core.visits.visit_manager import VisitManager
+from data.db.json_adapter import JSONAdapter
+from data.db.patient_cache import PatientCache
+
+
+class FlakyDetector:
+    """Fails the first `failures` calls, then returns one alert"""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.calls = 0
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def detect_rare_diseases(self, patient_data, current_symptoms=None, visit_date=None):
+        self.calls += 1
+        self.entered.set()
+        self.release.wait(10)
+        if self.calls <= self.failures:
+            raise RuntimeError(f"boom {self.calls}")
+        return [{'disease': 'Test', 'confidence': 0.5}]
+
+
+@pytest.fixture
+def db(tmp_path):
+    adapter = JSONAdapter(str(tmp_path / "patients"), journal=True, cache=PatientCache())
+    adapter.save_patient({'id': 'P1', 'name': 'Test', 'visits': [
+        {'visit_id': 'V1', 'timestamp': "2024-01-01T09:00:00"},
+        {'visit_id': 'V2', 'timestamp': "2024-01-02T09:00:00"},
+    ]})
+    return adapter
+
+
+def make_queue(db, tmp_path, detector, **kwargs):
+    return DetectionQueue(db, detector, queue_dir=str(tmp_path / "queue"),
+                          workers=1, retry_delay=0.01, **kwargs)
+
+
+def wait_for(queue, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while queue.pending_count() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not queue.pending_count()
+
+
+def visit(db, visit_id):
+    return next(v for v in db.load_patient('P1')['visits'] if v['visit_id'] == visit_id)
+
+
+def test_retry_succeeds_and_clears_error(db, tmp_path):
+    db.update_visit('P1', 'V1', {'disease_detection_error': "old failure"})
+    queue = make_queue(db, tmp_path, FlakyDetector(failures=1))
+
+    queue.submit('P1', 'V1')
+    wait_for(queue)
+
+    job = queue.status('V1')
+    assert job['status'] == COMPLETE and job['attempts'] == 2 and 'error' not in job
+    stored = visit(db, 'V1')
+    assert stored['disease_detection_error'] is None
+    assert stored['disease_detection']['status'] == COMPLETE
+    assert not list((tmp_path / "queue").glob("*.json"))
+
+
+def test_gives_up_after_max_attempts(db, tmp_path):
+    detector = FlakyDetector(failures=10)
+    queue = make_queue(db, tmp_path, detector, max_attempts=3)
+
+    queue.submit('P1', 'V1')
+    wait_for(queue)
+
+    assert detector.calls == 3
+    assert queue.status('V1')['status'] == FAILED
+    assert visit(db, 'V1')['disease_detection_error'] == "boom 3"
+
+
+def test_missing_visit_is_not_retried(db, tmp_path):
+    detector = FlakyDetector()
+    queue = make_queue(db, tmp_path, detector)
+
+    queue.submit('P1', 'V9')
+    wait_for(queue)
+
+    assert detector.calls == 0
+    assert queue.status('V9')['status'] == FAILED
+
+
+def test_delete_waits_for_write_back(db, tmp_path):
+    detector = FlakyDetector()
+    detector.release.clear()
+    manager = VisitManager(db, "sync")
+    manager.detection_queue = make_queue(db, tmp_path, detector)
+    manager.set_detection_mode("async")
+
+    manager.detection_queue.submit('P1', 'V2')
+    assert detector.entered.wait(5)
+
+    deleted = []
+    deleter = threading.Thread(
+        target=lambda: deleted.append(manager.delete_visit('P1', 'V1'))
+    )
+    deleter.start()
+    time.sleep(0.05)
+    assert not deleted  # blocked behind the running detection
+
+    detector.release.set()
+    deleter.join(5)
+    wait_for(manager.detection_queue)
+
+    assert deleted[0]['success']
+    visits = db.load_patient('P1')['visits']
+    assert [v['visit_id'] for v in visits] == ['V2']
+    assert visits[0]['disease_alerts'] == [{'disease': 'Test', 'confidence': 0.5}]
@@ -0,0 +1,86 @@
+"""
+Disease catalogue artifact: plain JSON, reused only while it matches the
+sources it was built from, rebuilt when stale or damaged
+"""
+
+import json
+
+from core.clinical import disease_catalogue
+from core.clinical.disease_catalogue import CATALOGUE_FORMAT, build_catalogue, load_catalogue
+from data.db.config_registry import config_registry
+
+
+def write_source(path, diseases):
+    path.write_text(json.dumps({'diseases': diseases}), encoding='utf-8')
+
+
+def test_artifact_round_trip(tmp_path):
+    source = tmp_path / "diseases.json"
+    write_source(source, {'wilson': {'name': "Wilson's Disease",
+                                     'symptoms': ['tremor', 'jaundice'], 'min_symptoms': 2}})
+    artifact = tmp_path / "catalogue.json"
+
+    built = build_catalogue((str(source),), str(artifact))
+    stored = json.loads(artifact.read_text(encoding='utf-8'))
+    assert stored['format'] == CATALOGUE_FORMAT and stored['version'] == built.version
+
+    loaded = load_catalogue((str(source),), str(artifact))
+    assert loaded.version == built.version
+    assert loaded.diseases == built.diseases
+    assert loaded.diseases['wilson']['min_matches'] == 2
+    assert len(loaded.matrix) == 1
+
+
+def test_damaged_artifact_is_rebuilt(tmp_path):
+    source = tmp_path / "diseases.json"
+    write_source(source, {'fabry': {'name': "Fabry Disease", 'symptoms': ['burning pain']}})
+    artifact = tmp_path / "catalogue.json"
+    built = build_catalogue((str(source),), str(artifact))
+
+    stored = json.loads(artifact.read_text(encoding='utf-8'))
+    stored['diseases']['fabry']['name'] = "Edited"
+    artifact.write_text(json.dumps(stored), encoding='utf-8')
+    assert load_catalogue((str(source),), str(artifact)).diseases == built.diseases
+
+    artifact.write_bytes(b"\x80\x04not json")
+    assert load_catalogue((str(source),), str(artifact)).diseases == built.diseases
+    assert json.loads(artifact.read_text(encoding='utf-8'))['version'] == built.version
+
+
+def test_current_catalogue_follows_source_edits(tmp_path, monkeypatch):
+    source = tmp_path / "diseases.json"
+    write_source(source, {'fabry': {'name': "Fabry Disease", 'symptoms': ['burning pain']}})
+    artifact = tmp_path / "catalogue.json"
+    monkeypatch.setattr(disease_catalogue, 'SOURCES', (str(source),))
+    monkeypatch.setattr(disease_catalogue, 'ARTIFACT', str(artifact))
+    monkeypatch.setattr(disease_catalogue, '_current', None)
+
+    first = disease_catalogue.current_catalogue()
+    assert set(first.diseases) == {'fabry'}
+    assert disease_catalogue.current_catalogue() is first
+
+    write_source(source, {'fabry': {'name': "Fabry Disease", 'symptoms': ['burning pain']},
+                          'wilson': {'name': "Wilson's Disease", 'symptoms': ['tremor']}})
+    # What the file watcher (or the next poll) does on a change
+    config_registry._mark_stale(source)
+    assert set(disease_catalogue.current_catalogue().diseases) == {'fabry', 'wilson'}
+
+    # A fresh process reuses the artifact, which carries the new diseases
+    stored = json.loads(artifact.read_text(encoding='utf-8'))
+    assert set(stored['diseases']) == {'fabry', 'wilson'}
+
+
+def test_artifact_fingerprints_what_was_read(tmp_path):
+    source = tmp_path / "diseases.json"
+    write_source(source, {'fabry': {'name': "Fabry Disease", 'symptoms': ['burning pain']}})
+    artifact = tmp_path / "catalogue.json"
+    build_catalogue((str(source),), str(artifact))
+
+    # Edited after the registry cached it: a build now still sees the old
+    # contents, and must not label them with the new file's stamp
+    write_source(source, {'wilson': {'name': "Wilson's Disease", 'symptoms': ['tremor']}})
+    assert set(build_catalogue((str(source),), str(artifact)).diseases) == {'fabry'}
+
+    # A restart re-reads the file and so rebuilds the artifact
+    config_registry._mark_stale(source)
+    assert set(load_catalogue((str(source),), str(artifact)).diseases) == {'wilson'}
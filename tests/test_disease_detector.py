@@ -0,0 +1,78 @@
+"""
+Detection engine: a run scores against one snapshot of the disease tables,
+and its trace explains every disease that did not alert
+"""
+
+import json
+
+from core.clinical.disease_detector import DiseaseDetectionEngine
+from data.db.config_registry import config_registry
+
+DISEASES = {'diseases': {
+    'wilson': {'name': "Wilson's Disease", 'symptoms': ['tremor', 'jaundice'],
+               'min_symptoms': 2, 'min_visits': 2, 'time_window': 365},
+    'fabry': {'name': "Fabry Disease", 'symptoms': ['burning pain', 'tremor', 'rash'],
+              'min_symptoms': 2},
+    'gaucher': {'name': "Gaucher Disease", 'symptoms': ['bone pain', 'fatigue'],
+                'min_symptoms': 2},
+}}
+
+PATIENT = {'id': 'P1', 'age': 30, 'sex': 'M', 'symptom_tracking': {
+    'tremor': [{'date': "2024-01-01"}, {'date': "2024-03-01"}],
+    'jaundice': [{'date': "2024-03-01"}],
+}}
+
+
+def write_scores(path, rarity):
+    path.write_text(json.dumps({'tremor': {'rarity_score': rarity},
+                                'jaundice': {'rarity_score': rarity}}), encoding='utf-8')
+    config_registry._mark_stale(path)
+
+
+def confidences(alerts):
+    return [alert['confidence'] for alert in alerts]
+
+
+def test_reload_mid_run_keeps_the_run_snapshot(tmp_path):
+    diseases = tmp_path / "diseases.json"
+    diseases.write_text(json.dumps(DISEASES), encoding='utf-8')
+    scores = tmp_path / "scores.json"
+    write_scores(scores, 0.1)
+    engine = DiseaseDetectionEngine(str(diseases), str(scores))
+
+    before = engine.detect_rare_diseases(PATIENT, visit_date="2024-03-01")
+    assert before
+    engine.invalidate()
+
+    # New scores land while the run is between candidate lookup and scoring
+    check = engine._check_disease_pattern
+
+    def reload_then_check(config, *args, **kwargs):
+        write_scores(scores, 0.9)
+        assert engine._refresh_config() is not config
+        return check(config, *args, **kwargs)
+
+    engine._check_disease_pattern = reload_then_check
+    during = engine.detect_rare_diseases(PATIENT, visit_date="2024-03-01")
+    assert confidences(during) == confidences(before)
+
+    del engine._check_disease_pattern
+    engine.invalidate()
+    after = engine.detect_rare_diseases(PATIENT, visit_date="2024-03-01")
+    assert engine.symptom_scores['tremor']['rarity_score'] == 0.9
+    assert confidences(after) > confidences(before)
+
+
+def test_trace_explains_prefiltered_diseases(tmp_path):
+    diseases = tmp_path / "diseases.json"
+    diseases.write_text(json.dumps(DISEASES), encoding='utf-8')
+    scores = tmp_path / "scores.json"
+    write_scores(scores, 0.1)
+    engine = DiseaseDetectionEngine(str(diseases), str(scores))
+
+    alerts, trace = engine.detect_with_trace(PATIENT, visit_date="2024-03-01")
+
+    assert [alert['disease_id'] for alert in alerts] == ['wilson']
+    assert trace.counts['candidates'] == 1 and trace.counts['prefiltered'] == 2
+    assert trace.rejections['fabry'] == "prefilter: 1 of 2 required symptoms ever tracked"
+    assert trace.rejections['gaucher'].startswith("prefilter: 0 of 2")
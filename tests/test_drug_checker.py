@@ -0,0 +1,31 @@
+"""
+Drug interaction checks against the shipped data/config/indian_drugs.json
+"""
+
+from pathlib import Path
+
+from utils.drug_checker import DrugInteractionChecker
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_interacting_pair_from_config(monkeypatch):
+    monkeypatch.chdir(REPO_ROOT)
+    result = DrugInteractionChecker().check_prescription("Tab omeprazole and tab clopidogrel")
+
+    assert result['has_interactions']
+    assert result['interactions'][0] == {
+        'drug1': 'omeprazole', 'drug2': 'clopidogrel', 'severity': 'major',
+        'description': "Omeprazole + Clopidogrel: Reduced clopidogrel efficacy"
+    }
+
+
+def test_every_configured_interaction_is_described(monkeypatch):
+    monkeypatch.chdir(REPO_ROOT)
+    checker = DrugInteractionChecker()
+    drugs = checker.drug_database['drugs']
+
+    for drug, info in drugs.items():
+        for other in info.get('interactions', {}):
+            for interaction in checker.check_interactions([drug, other]):
+                assert interaction['description'].split(': ', 1)[1]
@@ -0,0 +1,70 @@
+"""
+Journal mode: entries carry only per-visit symptom deltas, and replaying
+them gives the tracking a full rebuild from the visits would
+"""
+
+import copy
+
+import pytest
+
+from data.db.json_adapter import JSONAdapter
+from data.db.patient_cache import PatientCache
+from core.visits.symptom_tracking import rebuild_symptom_tracking, update_symptom_tracking
+
+VISITS = [
+    ("V1", "2024-01-01T09:00:00", ["fever", "cough"]),
+    ("V2", "2024-01-01T17:00:00", ["fever", "rash"]),
+    ("V3", "2024-02-10T10:00:00", ["Joint Pain", "fever"]),
+]
+
+
+@pytest.fixture(params=[100, 2], ids=["pending", "compacted"])
+def db(tmp_path, request):
+    adapter = JSONAdapter(str(tmp_path), journal=True, compact_every=request.param,
+                          cache=PatientCache())
+    adapter.save_patient({'id': 'P1', 'name': 'Test', 'mobile': '9000000001'})
+    for visit_id, timestamp, symptoms in VISITS:
+        visit = {'visit_id': visit_id, 'timestamp': timestamp, 'extracted_symptoms': symptoms}
+        assert adapter.append_visit(
+            'P1', visit, track={'symptoms': symptoms, 'visit_date': timestamp}
+        )
+    return adapter
+
+
+def test_replay_matches_rebuild(db):
+    patient = db.load_patient('P1')
+    expected = copy.deepcopy(patient)
+    rebuild_symptom_tracking(expected)
+    assert patient['symptom_tracking'] == expected['symptom_tracking']
+
+
+def test_update_visit_adds_symptoms(db):
+    assert db.update_visit('P1', 'V1', {'summary': 'nausea'},
+                           track={'symptoms': ['nausea'], 'visit_date': VISITS[0][1]})
+    patient = db.load_patient('P1')
+    assert patient['symptom_tracking']['nausea'][0]['date'] == "2024-01-01"
+    page = db.load_patient_page('P1', limit=1)
+    assert page['patient']['symptom_tracking'] == patient['symptom_tracking']
+
+
+def test_entries_do_not_carry_history(db, tmp_path):
+    journal = tmp_path / "P1.journal"
+    if journal.exists():
+        assert 'symptom_tracking' not in journal.read_text(encoding='utf-8')
+
+
+def test_legacy_field_entries_still_replay(tmp_path):
+    adapter = JSONAdapter(str(tmp_path), journal=True, cache=PatientCache())
+    adapter.save_patient({'id': 'P2', 'name': 'Legacy'})
+    tracking = {}
+    update_symptom_tracking({'symptom_tracking': tracking}, ["fever"], "2024-03-01")
+    adapter.append_visit('P2', {'visit_id': 'V1', 'timestamp': "2024-03-01"},
+                         {'symptom_tracking': tracking})
+    assert adapter.load_patient('P2')['symptom_tracking'] == tracking
+
+
+def test_snapshot_written_via_temp_file(tmp_path):
+    adapter = JSONAdapter(str(tmp_path), cache=PatientCache())
+    assert adapter.save_patient({'id': 'P3', 'name': 'Atomic'})
+    assert not list(tmp_path.glob("*.tmp"))
+    assert adapter.load_patient('P3')['name'] == 'Atomic'
@@ -0,0 +1,105 @@
+"""
+Patient index: search finds what the old full scan did through indexed
+lookups, and an index left behind by an interrupted write is repaired when
+the store is reopened
+"""
+
+from data.db.json_adapter import JSONAdapter
+from data.db.patient_cache import PatientCache
+from data.db.sqlite_adapter import SQLiteAdapter
+
+
+def open_json(tmp_path):
+    return JSONAdapter(str(tmp_path / "patients"), cache=PatientCache())
+
+
+def ids(summaries):
+    return sorted(summary['id'] for summary in summaries)
+
+
+def test_search_matches_like_the_old_scan(tmp_path):
+    db = open_json(tmp_path)
+    db.save_patient({'id': 'P1', 'name': "Asha Rao", 'mobile': "9876500001"})
+    db.save_patient({'id': 'P2', 'name': "Ravi Kumar", 'mobile': "9123400002"})
+
+    assert ids(db.search_patient_summaries("ra")) == ['P1', 'P2']
+    assert ids(db.search_patient_summaries("asha r")) == ['P1']
+    assert ids(db.search_patient_summaries("91234")) == ['P2']
+    # Substrings and mobile suffixes, which the full scan used to find
+    assert ids(db.search_patient_summaries("sha")) == ['P1']
+    assert ids(db.search_patient_summaries("umar")) == ['P2']
+    assert ids(db.search_patient_summaries("00002")) == ['P2']
+    assert ids(db.search_patient_summaries("01")) == ['P1']
+    assert ids(db.search_patient_summaries("7650")) == ['P1']
+    assert db.search_patient_summaries("xyz") == []
+
+
+def test_search_after_update_and_delete(tmp_path):
+    db = SQLiteAdapter(str(tmp_path / "patients.db"), data_dir=str(tmp_path / "patients"))
+    db.save_patient({'id': 'P1', 'name': "Asha Rao", 'mobile': "9876500001"})
+    db.save_patient({'id': 'P2', 'name': "Ravi Kumar", 'mobile': "9123400002"})
+    db.save_patient({'id': 'P1', 'name': "Meena Rao", 'mobile': "9876500001"})
+
+    assert ids(db.search_patient_summaries("00002")) == ['P2']
+    assert ids(db.search_patient_summaries("eena")) == ['P1']
+    assert db.search_patient_summaries("asha") == []
+
+    db.delete_patient('P2')
+    assert db.search_patient_summaries("umar") == []
+    assert db.search_patient_summaries("00002") == []
+
+
+def test_interrupted_save_is_reindexed_on_open(tmp_path, monkeypatch):
+    db = open_json(tmp_path)
+    db.save_patient({'id': 'P1', 'name': "Old Name"})
+
+    def crash(patient_data):
+        raise OSError("crashed before the index write")
+
+    monkeypatch.setattr(db.index, 'upsert', crash)
+    assert not db.save_patient({'id': 'P1', 'name': "New Name"})
+    assert db.index.pending_ids() == ['P1']
+
+    reopened = open_json(tmp_path)
+    assert reopened.index.pending_ids() == []
+    assert ids(reopened.search_patient_summaries("new")) == ['P1']
+    assert reopened.search_patient_summaries("old") == []
+
+
+def test_count_mismatch_rebuilds(tmp_path):
+    db = open_json(tmp_path)
+    for i in range(3):
+        db.save_patient({'id': f"P{i}", 'name': f"Patient {i}"})
+    db.index.remove('P1')
+    assert db.index.count() == 2
+
+    reopened = open_json(tmp_path)
+    assert reopened.index.count() == 3
+    assert ids(reopened.search_patient_summaries("patient")) == ['P0', 'P1', 'P2']
+
+
+def test_sqlite_index_commits_with_rows(tmp_path, monkeypatch):
+    db = SQLiteAdapter(str(tmp_path / "patients.db"), data_dir=str(tmp_path / "patients"))
+    db.save_patient({'id': 'P1', 'name': "Old Name"})
+
+    def crash(patient_data):
+        raise OSError("index write failed")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(db.index, 'upsert', crash)
+        assert not db.save_patient({'id': 'P1', 'name': "New Name"})
+
+    assert db.load_patient('P1')['name'] == "Old Name"
+    assert ids(db.search_patient_summaries("old")) == ['P1']
+
+
+def test_outdated_index_format_is_rebuilt(tmp_path):
+    db = open_json(tmp_path)
+    db.save_patient({'id': 'P1', 'name': "Asha Rao", 'mobile': "9876500001"})
+    conn = db.index._connect()
+    with conn:
+        conn.execute("DROP TABLE name_trigrams")
+        conn.execute("UPDATE index_meta SET value = '1' WHERE key = 'built'")
+
+    reopened = open_json(tmp_path)
+    assert ids(reopened.search_patient_summaries("sha")) == ['P1']
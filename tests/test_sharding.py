@@ -0,0 +1,74 @@
+"""
+Shard manifest shared between processes: totals are not lost, and the
+layout migration refuses to run while the store is open elsewhere
+"""
+
+import multiprocessing
+
+import pytest
+
+from data.db.json_adapter import JSONAdapter
+from data.db.patient_cache import PatientCache
+from data.db.sharding import SHARDED, StoreInUseError, migrate_to_sharded
+
+HAS_FORK = "fork" in multiprocessing.get_all_start_methods()
+pytestmark = pytest.mark.skipif(not HAS_FORK, reason="needs fork")
+_fork = multiprocessing.get_context("fork") if HAS_FORK else None
+
+
+def _save_patients(data_dir: str, prefix: str, count: int):
+    adapter = JSONAdapter(data_dir, cache=PatientCache())
+    for i in range(count):
+        adapter.save_patient({'id': f"{prefix}{i}", 'name': f"Patient {i}"})
+
+
+def _hold_open(data_dir: str, opened, release):
+    JSONAdapter(data_dir, cache=PatientCache())
+    opened.set()
+    release.wait(10)
+
+
+def test_counts_from_concurrent_processes(tmp_path):
+    adapter = JSONAdapter(str(tmp_path), cache=PatientCache())
+    workers = [
+        _fork.Process(target=_save_patients, args=(str(tmp_path), prefix, 25))
+        for prefix in ("A", "B", "C")
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    # The long-lived adapter sees the other processes' totals
+    assert adapter.get_patient_count() == 75
+    adapter.save_patient({'id': "D0", 'name': "Patient"})
+    assert adapter.get_patient_count() == 76
+
+
+def test_migrate_refused_while_store_open(tmp_path):
+    _save_patients_in_child(tmp_path)
+    opened, release = _fork.Event(), _fork.Event()
+    holder = _fork.Process(target=_hold_open, args=(str(tmp_path), opened, release))
+    holder.start()
+    try:
+        assert opened.wait(10)
+        with pytest.raises(StoreInUseError):
+            migrate_to_sharded(str(tmp_path))
+        assert list(tmp_path.glob("*.json"))
+    finally:
+        release.set()
+        holder.join()
+
+    result = migrate_to_sharded(str(tmp_path))
+    assert result['moved'] == 5 and result['count'] == 5
+
+    adapter = JSONAdapter(str(tmp_path), cache=PatientCache())
+    assert adapter.manifest.layout == SHARDED
+    assert adapter.load_patient("A0")['name'] == "Patient 0"
+
+
+def _save_patients_in_child(tmp_path):
+    """Create patients without this process holding the store open"""
+    child = _fork.Process(target=_save_patients, args=(str(tmp_path), "A", 5))
+    child.start()
+    child.join()
@@ -0,0 +1,37 @@
+"""
+SQLite adapter: JSON-side paths stay under the data dir, and the JSON
+migration carries every record across
+"""
+
+from data.db.json_adapter import JSONAdapter
+from data.db.patient_cache import PatientCache
+from data.db.sqlite_adapter import SQLiteAdapter, migrate_json_to_sqlite
+
+
+def test_backups_go_to_data_dir(tmp_path):
+    adapter = SQLiteAdapter(str(tmp_path / "db" / "patients.db"),
+                            data_dir=str(tmp_path / "patients"))
+    adapter.save_patient({'id': 'P1', 'name': 'Test'})
+
+    assert adapter.backup_patient('P1')
+    assert len(list((tmp_path / "patients" / "backups").glob("P1_*.json"))) == 1
+    assert not (tmp_path / "db" / "backups").exists()
+
+
+def test_migration_copies_every_patient(tmp_path):
+    json_dir = tmp_path / "patients"
+    source = JSONAdapter(str(json_dir), cache=PatientCache())
+    for i in range(30):
+        source.save_patient({
+            'id': f"P{i}", 'name': f"Patient {i}", 'mobile': f"90000000{i:02d}",
+            'visits': [{'visit_id': f"V{i}", 'timestamp': "2024-01-01T09:00:00"}],
+            'symptom_tracking': {'fever': [{'date': "2024-01-01"}]}
+        })
+
+    db_path = tmp_path / "patients.db"
+    assert migrate_json_to_sqlite(str(json_dir), str(db_path)) == {"migrated": 30, "failed": 0}
+
+    target = SQLiteAdapter(str(db_path), data_dir=str(json_dir))
+    assert target.get_patient_count() == 30
+    assert target.load_patient('P7') == source.load_patient('P7')
+    assert target.find_patient_id_by_mobile("9000000007") == 'P7'
@@ -0,0 +1,141 @@
+"""
+Symptom extraction parity: final extract_symptoms output against the
+pre-grammar extractor's correct outputs, and the cases it got wrong
+"""
+
+import json
+
+import pytest
+
+from core.clinical.disease_detector import DiseaseDetectionEngine
+from core.clinical.extraction_cache import ExtractionCache
+from core.clinical.extraction_grammar import DEFAULT_GRAMMAR
+from core.clinical.symptom_analyzer import SymptomAnalyzer
+from core.visits.symptom_tracking import update_symptom_tracking
+
+# Notes the old extractor handled correctly -> its output
+BASELINE_CASES = [
+    ("Reports nausea and vomiting since morning", ['nausea', 'vomiting']),
+    ("Presents with fever, cough and vomiting since yesterday.", ['cough', 'fever', 'vomiting']),
+    ("Patient complains of chest pain and shortness of breath.",
+     ['chest pain', 'shortness of breath']),
+    ("c/o headache, blurred vision and photophobia for 2 weeks.",
+     ['blurred vision', 'headache', 'photophobia']),
+    ("Complains of fever with chills.", ['chills', 'fever']),
+    ("Experiencing dizziness for 3 days.", ['dizziness']),
+    ("Has been having joint pain and fatigue for months.", ['fatigue', 'joint pain']),
+    ("Suffering from insomnia, anxiety.", ['anxiety', 'insomnia']),
+    ("Chief complaint: abdominal pain.", ['abdominal pain']),
+    ("Symptoms include rash, itching.", ['itching', 'rash']),
+    ("Reports back pain x 3 days.", ['back pain']),
+    ("Reports fever, cough and headache.", ['cough', 'fever', 'headache']),
+    ("Patient reports palpitations and irregular heartbeat since last week.",
+     ['irregular heartbeat', 'palpitations']),
+    ("Presents with weight loss, night sweats and fever for 1 month.",
+     ['fever', 'night sweats', 'weight loss']),
+    ("Reports tremor, jaundice.", ['jaundice', 'tremor']),
+    ("Has had diarrhea and bloating after meals.", ['bloating', 'diarrhea']),
+    ("Experiencing memory loss and confusion.", ['confusion', 'memory loss']),
+    ("c/o sore throat, runny nose and sneezing since 2 days.",
+     ['runny nose', 'sneezing', 'sore throat']),
+    ("Complains of burning urination and frequency.", ['burning urination', 'frequency']),
+    ("Presents with seizure.", ['seizure']),
+    ("c/o pain in abdomen.", ['pain in abdomen']),
+    ("Complains of swelling of legs and fever.", ['fever', 'swelling of legs']),
+]
+
+# Notes the old extractor got wrong -> the correct output
+FIXED_CASES = [
+    # 'and' inside "hand" ended the list
+    ("C/o burning urination, hand stiffness and lethargy.",
+     ['burning urination', 'hand stiffness', 'lethargy']),
+    ("C/o hand pain.", ['hand pain']),
+    ("C/o tingling in hands and feet.", ['tingling in hands']),
+    # 'and' inside "bandlike"
+    ("Reports lethargy, bandlike sensation and hoarseness.",
+     ['bandlike sensation', 'hoarseness', 'lethargy']),
+    ("Presents with band-like headache.", ['band-like headache']),
+    # 'for' inside "before"
+    ("Experiencing hoarseness before meals.", ['hoarseness']),
+    # Only the first item of a list was kept
+    ("Suffering from brain fog and forgetfulness.", ['brain fog', 'forgetfulness']),
+    ("Reports difficulty sleeping and lethargy since 3 days.", ['difficulty sleeping', 'lethargy']),
+    ("Reports numbness and tingling in hands.", ['numbness', 'tingling in hands']),
+    # A location's tail is not a symptom of its own
+    ("Reports numbness and tingling in hands and feet.", ['numbness', 'tingling in hands']),
+    ("c/o pain in hands, feet.", ['pain in hands']),
+    # Trailing timing stayed in the item
+    ("Presents with hoarseness since monday.", ['hoarseness']),
+    # Lists ran across ';'
+    ("c/o dizziness; vertigo noted.", ['dizziness', 'vertigo']),
+]
+
+
+@pytest.fixture
+def analyzer():
+    return SymptomAnalyzer(cache=ExtractionCache(maxsize=0))
+
+
+@pytest.mark.parametrize("note, expected", BASELINE_CASES)
+def test_matches_baseline(analyzer, note, expected):
+    assert sorted(analyzer.extract_symptoms(note)) == expected
+
+
+@pytest.mark.parametrize("note, expected", FIXED_CASES)
+def test_fixed_cases(analyzer, note, expected):
+    assert sorted(analyzer.extract_symptoms(note)) == expected
+
+
+@pytest.mark.parametrize("clause, expected", [
+    ("reports vomiting since morning", ['vomiting']),
+    ("c/o fever x 3 days, cough", ['fever', 'cough']),
+    ("complains of pain without relief", ['pain']),
+    ("presents with hand pain", ['hand pain']),
+])
+def test_items_cut_at_qualifiers(clause, expected):
+    assert DEFAULT_GRAMMAR.items(clause) == expected
+
+
+def test_cached_output_matches_uncached(analyzer):
+    cached = SymptomAnalyzer(cache=ExtractionCache(maxsize=1024))
+    notes = [note for note, _ in BASELINE_CASES + FIXED_CASES]
+    # A note restating earlier ones hits the per-sentence entries
+    notes.append(" ".join(notes[:5]))
+
+    for _ in range(2):
+        for note in notes:
+            assert sorted(cached.extract_symptoms(note)) == sorted(analyzer.extract_symptoms(note))
+    assert cached.cache_stats()['hits'] > 0
+
+
+@pytest.mark.parametrize("note, canonical", [
+    ("Severe abdominal pain.", 'abdominal pain'),
+    ("Recurrent fever.", 'fever'),
+    ("Chronic fatigue.", 'fatigue'),
+    ("Progressive muscle weakness.", 'weakness'),
+])
+def test_catalogue_phrases_keep_canonical_symptom(analyzer, note, canonical):
+    assert canonical in analyzer.extract_symptoms(note)
+
+
+@pytest.mark.parametrize("note, listed", [
+    ("Severe abdominal pain and jaundice.", ['abdominal pain', 'jaundice']),
+    ("Progressive muscle weakness and tremor.", ['muscle weakness', 'tremor']),
+    ("Recurrent fever and joint swelling.", ['fever', 'joint swelling']),
+])
+def test_qualified_phrases_still_trigger_detection(analyzer, tmp_path, note, listed):
+    """A disease listing the short symptoms matches notes using the long ones"""
+    diseases = tmp_path / "diseases.json"
+    diseases.write_text(json.dumps({'diseases': {'target': {
+        'name': "Target Disease", 'symptoms': listed, 'min_symptoms': 2, 'min_visits': 2,
+    }}}), encoding='utf-8')
+    scores = tmp_path / "scores.json"
+    scores.write_text("{}", encoding='utf-8')
+
+    patient = {'id': 'P1', 'age': 25, 'sex': 'F'}
+    for visit_date in ("2024-01-05", "2024-02-10"):
+        update_symptom_tracking(patient, analyzer.extract_symptoms(note), visit_date)
+
+    engine = DiseaseDetectionEngine(str(diseases), str(scores))
+    alerts = engine.detect_rare_diseases(patient, visit_date="2024-02-10")
+    assert [alert['disease_id'] for alert in alerts] == ['target']
@@ -12,11 +12,16 @@ import plotly.graph_objects as go
 from pathlib import Path
 import os
 
+from data.db.factory import create_adapter
+
 class EMRDashboard:
     """Analytics dashboard for monitoring Smart EMR usage and AI performance"""
     
-    def __init__(self, data_path="data/patients/", analytics_path="data/analytics/"):
+    def __init__(self, data_path="data/patients/", analytics_path="data/analytics/",
+                 data_adapter=None):
         self.data_path = Path(data_path)
+        # The configured backend (EMR_DB_BACKEND), the same store the app writes to
+        self.db = data_adapter if data_adapter is not None else create_adapter()
         self.analytics_path = Path(analytics_path)
         self.metrics_file = self.analytics_path / "metrics.json"
         self.feedback_file = self.analytics_path / "clinician_feedback.json"
@@ -29,11 +34,14 @@ class EMRDashboard:
         all_visits = []
         all_patients = []
         
-        for patient_file in self.data_path.glob("*.json"):
+        patient_fields = [
+            'patient_id', 'name', 'age', 'sex', 'ethnicity', 'registration_date',
+            'allergies', 'medical_history', 'visits',
+            'rare_disease_alerts', 'cancer_screening_alerts'
+        ]
+        
+        for patient_data in self.db.iter_patients(fields=patient_fields):
             try:
-                with open(patient_file, 'r') as f:
-                    patient_data = json.load(f)
-                
                 # Patient-level data
                 patient_record = {
                     'patient_id': patient_data.get('id', patient_data.get('patient_id')),
@@ -70,7 +78,7 @@ class EMRDashboard:
                     pass
                     
             except Exception as e:
-                print(f"Error loading {patient_file}: {e}")
+                print(f"Error loading {patient_data.get('id')}: {e}")
                 continue
         
         return pd.DataFrame(all_visits), pd.DataFrame(all_patients)
@@ -92,11 +100,8 @@ class EMRDashboard:
         """Load rare disease detection history"""
         detections = []
         
-        for patient_file in self.data_path.glob("*.json"):
+        for patient_data in self.db.iter_patients(fields=['symptom_tracking']):
             try:
-                with open(patient_file, 'r') as f:
-                    patient_data = json.load(f)
-                
                 # Check symptom tracking
                 patient_id = patient_data.get('id')
                 
@@ -1,26 +1,28 @@
-import json
-import os
 import re
 from typing import Dict, List, Tuple
 
+from data.db.config_registry import config_registry
+
+
+def _interaction_text(interaction: Dict) -> str:
+    """Interaction note; the built-in table says 'description', indian_drugs.json 'effect'"""
+    return interaction.get("description") or interaction.get("effect", "")
+
+
 class DrugInteractionChecker:
     def __init__(self):
         """Initialize the drug interaction checker"""
-        self.drug_database = self.load_drug_database()
+        self._default_database = self.get_default_database()
+    
+    @property
+    def drug_database(self) -> Dict:
+        """Indian drug database, reloaded when data/config/indian_drugs.json changes"""
+        return self.load_drug_database()
     
     def load_drug_database(self) -> Dict:
         """Load the Indian drug database"""
-        try:
-            filepath = os.path.join("data", "indian_drugs.json")
-            if os.path.exists(filepath):
-                with open(filepath, 'r') as f:
-                    return json.load(f)
-            else:
-                # Return default database if file doesn't exist
-                return self.get_default_database()
-        except Exception as e:
-            print(f"Error loading drug database: {e}")
-            return self.get_default_database()
+        # Return default database if file doesn't exist
+        return config_registry.get("indian_drugs") or self._default_database
     
     def get_default_database(self) -> Dict:
         """Return default Indian drug database"""
@@ -189,8 +191,8 @@ class DrugInteractionChecker:
                     interactions.append({
                         "drug1": drug1,
                         "drug2": drug2,
-                        "severity": interaction["severity"],
-                        "description": f"{drug1.title()} + {drug2.title()}: {interaction['description']}"
+                        "severity": interaction.get("severity", "unknown"),
+                        "description": f"{drug1.title()} + {drug2.title()}: {_interaction_text(interaction)}"
                     })
                 
                 # Check reverse interaction
@@ -206,8 +208,8 @@ class DrugInteractionChecker:
                         interactions.append({
                             "drug1": drug2,
                             "drug2": drug1,
-                            "severity": interaction["severity"],
-                            "description": f"{drug2.title()} + {drug1.title()}: {interaction['description']}"
+                            "severity": interaction.get("severity", "unknown"),
+                            "description": f"{drug2.title()} + {drug1.title()}: {_interaction_text(interaction)}"
                         })
         
         return interactions
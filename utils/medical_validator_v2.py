@@ -3,25 +3,26 @@ Medical Validator 2.0 - Physiological Validation Engine for Smart EMR
 Age-aware, context-sensitive vital signs validation for Indian clinics
 """
 
-import json
 import re
 from typing import Dict, List, Tuple, Optional, Union
 
+from data.db.config_registry import config_registry
+
 
 class PhysiologyEngine:
-    def __init__(self, ranges_file: str = 'data/physiological_ranges.json'):
+    def __init__(self, ranges_file: str = 'data/config/physiological_ranges.json'):
         """Initialize with physiological ranges data"""
         self.ranges_file = ranges_file
-        self._load_ranges()
+        self._default_ranges = self._get_default_ranges()
     
-    def _load_ranges(self):
-        """Load physiological ranges from JSON file"""
-        try:
-            with open(self.ranges_file, 'r') as f:
-                self.ranges = json.load(f)
-        except FileNotFoundError:
+    @property
+    def ranges(self) -> dict:
+        """Physiological ranges from the shared config registry (hot-reloaded)"""
+        ranges = config_registry.get_file(self.ranges_file)
+        if ranges is None:
             # Fallback to hardcoded ranges if file not found
-            self.ranges = self._get_default_ranges()
+            return self._default_ranges
+        return ranges
     
     def _get_default_ranges(self) -> dict:
         """Hardcoded physiological ranges as fallback"""